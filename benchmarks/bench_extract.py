@@ -0,0 +1,105 @@
+"""
+Benchmark main-content extraction engines on a corpus of saved pages.
+
+对比各正文提取引擎（见 web_search/extract.py）在一组已保存网页上的耗时和输出，
+并以 readabilipy（原有的 Node.js 路径）为基准计算输出的相似度。
+
+用法:
+    python benchmarks/bench_extract.py [CORPUS_DIR] [--extractors lxml,simple,readabilipy] [--repeat 3]
+
+CORPUS_DIR 下的每个 *.html 文件为一个页面，默认使用 benchmarks/fixtures/articles/ 中的几个网页
+（仿照博客、论坛、新闻、Wiki、文档、问答和代码仓库网站的页面结构编写）。也可以用自己保存的网页，例如用
+    curl -L -o corpus/page1.html https://example.com/article
+保存。readabilipy 引擎需要 Node.js 及其 npm 依赖。
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
+
+from web_service.web_search.extract import EXTRACTORS  # noqa: E402
+from web_service.web_search.util import extract_main_content  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "fixtures" / "articles"
+BASELINE = "readabilipy"
+
+
+def _tokens(text):
+    return set((text or "").split())
+
+
+def _similarity(a, b):
+    ta, tb = _tokens(a), _tokens(b)
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(corpus, extractors, repeat):
+    pages = sorted(Path(corpus).glob("*.html"))
+    if not pages:
+        sys.exit(f"no *.html pages found in {corpus}")
+    htmls = [page.read_text(encoding="utf-8", errors="replace") for page in pages]
+    print(f"corpus: {len(pages)} pages, {sum(len(h) for h in htmls) / 1024:.0f} KiB")
+
+    outputs = {}
+    print(f"{'extractor':<12} {'total s':>8} {'mean ms':>8} {'p95 ms':>8} {'fail':>5} {'avg chars':>10}")
+    for name in extractors:
+        timings = []
+        results = []
+        failures = 0
+        for html in htmls:
+            best = None
+            content = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                try:
+                    content = extract_main_content(html, name)
+                except Exception:
+                    content = None
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+            results.append(content)
+            failures += content is None
+        outputs[name] = results
+        chars = statistics.mean(len(c or "") for c in results)
+        print(f"{name:<12} {sum(timings):>8.2f} {statistics.mean(timings) * 1000:>8.1f} "
+              f"{_percentile(timings, 0.95) * 1000:>8.1f} {failures:>5} {chars:>10.0f}")
+
+    if BASELINE in outputs:
+        print(f"\ntoken similarity to {BASELINE}:")
+        for name, results in outputs.items():
+            if name == BASELINE:
+                continue
+            scores = [_similarity(a, b) for a, b in zip(results, outputs[BASELINE])]
+            print(f"  {name:<12} mean {statistics.mean(scores):.2f}  min {min(scores):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=str(DEFAULT_CORPUS),
+                        help="directory of saved *.html pages (default: fixtures/articles)")
+    parser.add_argument("--extractors", default=",".join(EXTRACTORS),
+                        help=f"comma-separated extractors (default: {','.join(EXTRACTORS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page, best time is kept")
+    args = parser.parse_args()
+
+    extractors = [name.strip() for name in args.extractors.split(",") if name.strip()]
+    unknown = [name for name in extractors if name not in EXTRACTORS]
+    if unknown:
+        sys.exit(f"unknown extractors: {', '.join(unknown)}")
+    run(args.corpus, extractors, max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
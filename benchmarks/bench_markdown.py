@@ -0,0 +1,113 @@
+"""
+Microbenchmark of the markdown stage of extract_main_content.
+
+检查单次遍历的 normalize_markdown 与原先四次 re.sub 的结果完全一致（不一致时退出码为 1），
+并比较两者的耗时；同时检查复用的转换器与 markdownify 默认调用的输出一致。
+
+用法:
+    python benchmarks/bench_markdown.py [--corpus CORPUS_DIR] [--repeat 20]
+
+不指定 CORPUS_DIR 时使用生成的文章；指定时使用目录下每个 *.html 页面的正文部分。
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import markdownify
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
+
+from web_service.web_search.extract import extract_html  # noqa: E402
+from web_service.web_search.util import _MARKDOWN_CONVERTER, normalize_markdown  # noqa: E402
+
+EDGE_CASES = [
+    "",
+    "\n\n",
+    "   \t",
+    "  leading\n\n\ntrailing  \n\n",
+    "a\n \nb",
+    "　全角空格\n\n\n段落 \n",
+    "line\r\n\r\nwindows\r\n",
+    "# 标题\n\n\n\n* item\n\n* item\n\n    code\n",
+]
+
+
+def legacy_normalize(content):
+    """The original four-pass cleanup."""
+    content = re.sub(r"^[^\S\n]+", "", content)
+    content = re.sub(r"\n+", "\n", content)
+    content = re.sub(r"^\s*", "", content)
+    content = re.sub(r"\s*$", "", content)
+    return content
+
+
+def legacy_convert(html):
+    return markdownify.markdownify(html, heading_style=markdownify.ATX)
+
+
+def synthetic_articles():
+    paragraph = "<p>这是一段测试正文，包含 <b>加粗</b>、<a href='https://example.com'>链接</a> 和 <code>code_span</code>。</p>\n\n"
+    section = "<h2>小节</h2>\n" + paragraph * 20 + "<ul>" + "<li>列表项</li>\n" * 10 + "</ul>\n<pre>x = 1\n\n\ny = 2</pre>\n"
+    return [("small", "<article>" + section + "</article>"), ("large", "<article>" + section * 40 + "</article>")]
+
+
+def best_time(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per input, best time is kept")
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+
+    if args.corpus:
+        pages = sorted(Path(args.corpus).glob("*.html"))
+        articles = [(page.name, extract_html(page.read_text(encoding="utf-8", errors="replace")) or "")
+                    for page in pages]
+    else:
+        articles = synthetic_articles()
+
+    mismatches = 0
+    for case in EDGE_CASES:
+        if normalize_markdown(case) != legacy_normalize(case):
+            print(f"mismatch on edge case {case!r}")
+            mismatches += 1
+
+    print(f"{'input':<28} {'md KiB':>7} {'4-pass ms':>10} {'1-pass ms':>10}")
+    totals = [0.0, 0.0]
+    for name, html in articles:
+        markdown = legacy_convert(html)
+        if _MARKDOWN_CONVERTER.convert(html) != markdown:
+            print(f"converter mismatch on {name}")
+            mismatches += 1
+        if normalize_markdown(markdown) != legacy_normalize(markdown):
+            print(f"mismatch on {name}")
+            mismatches += 1
+        timings = [
+            best_time(legacy_normalize, markdown, repeat),
+            best_time(normalize_markdown, markdown, repeat),
+        ]
+        totals = [total + t for total, t in zip(totals, timings)]
+        print(f"{name[:28]:<28} {len(markdown) / 1024:>7.0f} " + " ".join(f"{t * 1000:>10.2f}" for t in timings))
+
+    print(f"{'total':<28} {'':>7} " + " ".join(f"{t * 1000:>10.2f}" for t in totals))
+    if totals[1]:
+        print(f"normalize {totals[0] / totals[1]:.1f}x faster")
+    if mismatches:
+        print(f"{mismatches} mismatches")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
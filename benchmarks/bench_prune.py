@@ -0,0 +1,110 @@
+"""
+Benchmark the HTML pre-pruning stage on a corpus of saved pages.
+
+对每个已保存的网页分别在关闭和开启预处理（web_search/prune.py）的情况下运行
+解码 + 正文提取 + Markdown 转换的完整流程，输出各阶段耗时、端到端加速比，
+以及两种输出的词元相似度。预处理不应改变提取结果，有页面输出不同时以非零状态退出。
+
+用法:
+    python benchmarks/bench_prune.py [CORPUS_DIR] [--extractor lxml] [--repeat 3]
+
+CORPUS_DIR 下的每个 *.html 文件为一个页面（原始字节，编码由页面自身声明），默认使用
+benchmarks/fixtures/articles/ 中的几个网页。也可以用自己保存的网页，例如用
+    curl -L -o corpus/page1.html https://example.com/article
+保存。
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
+
+from web_service.web_search.extract import EXTRACTORS  # noqa: E402
+from web_service.web_search.util import decode_body, extract_main_content, timed_stage  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "fixtures" / "articles"
+STAGES = ("decode", "prune", "extract", "markdown")
+
+
+def _similarity(a, b):
+    ta, tb = set((a or "").split()), set((b or "").split())
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def run_page(body, extractor, prune, repeat):
+    """Run the pipeline repeat times; returns (output, stage timings of the fastest run, total seconds)."""
+    best = None
+    for _ in range(repeat):
+        timings = {}
+        start = time.perf_counter()
+        with timed_stage(timings, "decode"):
+            html = decode_body(body, "text/html")
+        try:
+            content = extract_main_content(html, extractor, timings, prune=prune)
+        except Exception:
+            content = None
+        total = time.perf_counter() - start
+        if best is None or total < best[2]:
+            best = (content, timings, total)
+    return best
+
+
+def run(corpus, extractor, repeat):
+    pages = sorted(Path(corpus).glob("*.html"))
+    if not pages:
+        sys.exit(f"no *.html pages found in {corpus}")
+    bodies = [page.read_bytes() for page in pages]
+    print(f"corpus: {len(pages)} pages, {sum(len(b) for b in bodies) / 1024:.0f} KiB, extractor {extractor}")
+
+    totals = {False: {}, True: {}}
+    print(f"{'page':<28} {'off ms':>8} {'on ms':>8} {'speedup':>8} {'similar':>8}")
+    speedups = []
+    scores = []
+    changed = []
+    for page, body in zip(pages, bodies):
+        outputs = {}
+        elapsed = {}
+        for prune in (False, True):
+            content, timings, total = run_page(body, extractor, prune, repeat)
+            outputs[prune] = content
+            elapsed[prune] = total
+            for stage, seconds in timings.items():
+                totals[prune][stage] = totals[prune].get(stage, 0.0) + seconds
+        speedup = elapsed[False] / elapsed[True] if elapsed[True] else 0
+        score = _similarity(outputs[False], outputs[True])
+        speedups.append(speedup)
+        scores.append(score)
+        if outputs[False] != outputs[True]:
+            changed.append(page.name)
+        print(f"{page.name[:28]:<28} {elapsed[False] * 1000:>8.1f} {elapsed[True] * 1000:>8.1f} "
+              f"{speedup:>7.2f}x {score:>8.2f}")
+
+    print(f"\n{'stage':<10} {'off s':>8} {'on s':>8}")
+    for stage in STAGES:
+        print(f"{stage:<10} {totals[False].get(stage, 0.0):>8.3f} {totals[True].get(stage, 0.0):>8.3f}")
+    off, on = sum(totals[False].values()), sum(totals[True].values())
+    print(f"{'total':<10} {off:>8.3f} {on:>8.3f}  ({off / on if on else 0:.2f}x end to end)")
+    print(f"median speedup {statistics.median(speedups):.2f}x, "
+          f"mean similarity {statistics.mean(scores):.2f}, min {min(scores):.2f}")
+    if changed:
+        print(f"pruning changed the output of {len(changed)} pages: {', '.join(changed)}")
+    return not changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=str(DEFAULT_CORPUS),
+                        help="directory of saved *.html pages (default: fixtures/articles)")
+    parser.add_argument("--extractor", default="lxml", choices=sorted(EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page, fastest run is kept")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.corpus, args.extractor, max(1, args.repeat)) else 1)
+
+
+if __name__ == "__main__":
+    main()
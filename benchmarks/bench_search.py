@@ -0,0 +1,174 @@
+"""
+End-to-end benchmark of web_search against the offline replay server.
+
+在本地回放服务器（见 replay_server.py）上运行完整的 _web_search 流程（搜索、跳转解析、抓取、
+正文提取、去重），不访问外网，测量：
+    - 逐个执行查询时的端到端延迟 (p50/p95/max)
+    - N 个查询并发执行时的吞吐量（查询/秒）和延迟
+    - 各阶段耗时（取自每次调用的时间预算报告，见 web_search/deadline.py）：
+      search/<引擎> 为各引擎的搜索耗时，fetch/<阶段> 为所有结果在该阶段的累计耗时
+      （各结果并发处理，累计值可以超过端到端耗时）
+
+默认关闭搜索结果缓存、网页内容缓存和本地索引，使每次查询都走完整流程（--warm 保留缓存）；
+所有请求都发往同一个本地地址，因此默认也关闭按主机限速（--polite 保留）。
+注入的延迟、错误和无响应请求见 replay_server.py 的选项。
+
+用法:
+    python benchmarks/bench_search.py [--runs 10] [--concurrency 1,4,16] [--mode hedge|merge]
+        [--providers baidu,sogou,bing] [--page-latency 0.2] [--failure-rate 0.05] [--stall-rate 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from replay_server import add_fault_arguments, server_from_args  # noqa: E402
+
+DEFAULT_QUERIES = ("deepin 23 发布", "deepin 安装教程", "deepin 应用商店", "deepin 内核更新", "deepin 桌面环境")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _configure(args):
+    """Environment for the search modules; must run before they are imported."""
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="bench-search-")
+    os.environ["DEEPIN_MCP_SEARCH_PROVIDERS"] = args.providers
+    if not args.warm:
+        os.environ.update(DEEPIN_MCP_SEARCH_CACHE="0", DEEPIN_MCP_CONTENT_CACHE="0", DEEPIN_MCP_PAGE_INDEX="0")
+    if not args.polite:
+        os.environ.update(DEEPIN_MCP_HOST_RATE="0", DEEPIN_MCP_HOST_CONCURRENCY="1000")
+
+
+def _summary(latencies):
+    return (f"p50 {_percentile(latencies, 50) * 1000:7.0f} ms  p95 {_percentile(latencies, 95) * 1000:7.0f} ms  "
+            f"max {max(latencies) * 1000:7.0f} ms")
+
+
+async def _timed_search(services, query, mode):
+    started = time.perf_counter()
+    output = await services._web_search(query, mode=mode)
+    elapsed = time.perf_counter() - started
+    try:
+        results = len(json.loads(output))
+    except ValueError:
+        results = 0
+    return elapsed, results
+
+
+async def measure_latency(services, queries, runs, mode):
+    """Sequential searches; returns latencies, result counts and the per-call stage reports."""
+    latencies, counts, reports = [], [], []
+    for run in range(runs):
+        # 查询各不相同，避免结果存储等按查询去重的逻辑影响计时
+        query = f"{queries[run % len(queries)]} {run}"
+        elapsed, results = await _timed_search(services, query, mode)
+        latencies.append(elapsed)
+        counts.append(results)
+        reports.append(services._last_search_report)
+    return latencies, counts, reports
+
+
+async def measure_throughput(services, queries, concurrency, rounds, mode):
+    """rounds * concurrency searches, concurrency at a time; returns (latencies, wall seconds)."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(number):
+        async with semaphore:
+            elapsed, _ = await _timed_search(services, f"{queries[number % len(queries)]} c{concurrency}-{number}", mode)
+            return elapsed
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(number) for number in range(concurrency * rounds)))
+    return list(latencies), time.perf_counter() - started
+
+
+def print_stages(reports):
+    stages = defaultdict(list)
+    elapsed = [report["elapsed"] for report in reports if report]
+    for report in reports:
+        for name, seconds in (report or {}).get("stages", {}).items():
+            stages[name].append(seconds)
+    exhausted = sum(1 for report in reports if report and report.get("exhausted_by"))
+    print(f"\nstage time per query (mean over {len(elapsed)} queries, end-to-end {statistics.mean(elapsed):.3f}s)")
+    print(f"{'stage':<24} {'mean s':>8} {'p95 s':>8} {'share':>7}")
+    for name in sorted(stages):
+        values = stages[name] + [0.0] * (len(elapsed) - len(stages[name]))
+        mean = statistics.mean(values)
+        print(f"{name:<24} {mean:>8.3f} {_percentile(values, 95):>8.3f} {mean / statistics.mean(elapsed):>6.0%}")
+    if exhausted:
+        print(f"{exhausted} queries ran out of their time budget")
+
+
+async def run(args, services, server):
+    queries = server.recordings.queries or list(DEFAULT_QUERIES)
+    # 第一次查询包含模块和连接池的初始化，不计入结果
+    await _timed_search(services, "warm up", args.mode)
+
+    latencies, counts, reports = await measure_latency(services, queries, args.runs, args.mode)
+    print(f"sequential   {args.runs:>4} queries  {_summary(latencies)}  "
+          f"results/query {statistics.mean(counts):.1f}")
+
+    for concurrency in args.concurrency:
+        latencies, wall = await measure_throughput(services, queries, concurrency, args.rounds, args.mode)
+        print(f"concurrency {concurrency:>3}  {len(latencies):>4} queries  {_summary(latencies)}  "
+              f"{len(latencies) / wall:6.2f} queries/s")
+
+    print_stages(reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="sequential queries for latency and stage times")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrent query counts")
+    parser.add_argument("--rounds", type=int, default=3, help="queries per concurrent slot in the throughput runs")
+    parser.add_argument("--mode", default="hedge", choices=("hedge", "merge"))
+    parser.add_argument("--providers", default="baidu,sogou,bing", help="comma-separated engines to search")
+    parser.add_argument("--warm", action="store_true", help="keep the search and page caches enabled")
+    parser.add_argument("--polite", action="store_true", help="keep per-host rate limiting enabled")
+    parser.add_argument("--log-level", default="ERROR", help="log level of the search modules")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    args.concurrency = [int(value) for value in args.concurrency.split(",") if value.strip()]
+
+    _configure(args)
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(name)s: %(message)s")
+    from web_service import services
+    from web_service.web_search.http_pool import pool_stats
+
+    server = server_from_args(args).start()
+    server.route_engines(services.SEARCH_PROVIDERS)
+    print(f"replay server {server.base}, providers {','.join(services.SEARCH_PROVIDERS)}, mode {args.mode}, "
+          f"{'warm' if args.warm else 'cold'} caches")
+    try:
+        asyncio.run(run(args, services, server))
+    finally:
+        server.stop()
+
+    stats = server.stats()
+    print(f"\nreplay requests {stats['requests']}, injected {stats['injected']}")
+    # 所有请求都应发往回放服务器，出现其他主机说明有链接没有被改写
+    stats = pool_stats()
+    hosts = {host for side in ("sync", "async") for host in stats[side]["requests_by_host"]
+             if not server.base.endswith(host)}
+    if hosts:
+        print(f"warning: requests escaped to {sorted(hosts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Parity check and benchmark for the SERP parser backends.
+
+用保存的搜索结果页（benchmarks/fixtures/serp/<engine>*.html）分别以各解析后端
+（见 web_search/parsers.py）运行引擎的解析逻辑，检查结果完全一致，并比较解析耗时。
+每个页面旁的 <engine>*.expected.json 保存了原有实现（各引擎直接用 BeautifulSoup 解析）
+在该页面上的结果（百度的 /s?word=...&url= 链接按 _extract_real_url 解码），各后端的结果
+都与它比较；没有该文件的页面以 bs4 后端的结果为准。
+结果不一致时以非零状态退出，可用于发现解析回归。
+
+用法:
+    python benchmarks/bench_serp_parse.py [--fixtures DIR] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
+
+from web_service.web_search.parsers import BACKENDS  # noqa: E402
+from web_service.web_search.engines.baidu import BaiduSearchEngine  # noqa: E402
+from web_service.web_search.engines.bing import BingSearchEngine  # noqa: E402
+from web_service.web_search.engines.duckduckgo import DuckDuckGoSearchEngine  # noqa: E402
+from web_service.web_search.engines.google import GoogleSearchEngine  # noqa: E402
+from web_service.web_search.engines.sogou import SogouSearchEngine  # noqa: E402
+
+ENGINES = {
+    "baidu": BaiduSearchEngine,
+    "bing": BingSearchEngine,
+    "duckduckgo": DuckDuckGoSearchEngine,
+    "google": GoogleSearchEngine,
+    "sogou": SogouSearchEngine,
+}
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "serp"
+
+
+def parse_fixture(engine, html, repeat):
+    """Run engine.search against a saved page; returns (results, best seconds)."""
+    engine._make_request = lambda url, params=None, deadline=None: html
+    best = None
+    response = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = engine.search("fixture", 10)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return [(r.title, r.url, r.content) for r in response.results], best
+
+
+def load_expected(fixture):
+    """Results saved from the original parsing code for fixture, or None when there are none."""
+    path = fixture.with_suffix(".expected.json")
+    if not path.exists():
+        return None
+    return [(r["title"], r["url"], r["content"]) for r in json.loads(path.read_text(encoding="utf-8"))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES), help="directory of saved SERP pages")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per fixture, best time is kept")
+    args = parser.parse_args()
+
+    fixtures = sorted(Path(args.fixtures).glob("*.html"))
+    if not fixtures:
+        sys.exit(f"no *.html fixtures found in {args.fixtures}")
+
+    backends = list(BACKENDS)
+    mismatches = 0
+    print(f"{'fixture':<20} {'results':>7} " + " ".join(f"{name + ' ms':>9}" for name in backends) + "  speedup  parity")
+    for fixture in fixtures:
+        engine_name = fixture.stem.split("-")[0]
+        engine_class = ENGINES.get(engine_name)
+        if engine_class is None:
+            print(f"{fixture.name:<20} skipped (unknown engine {engine_name})")
+            continue
+        html = fixture.read_text(encoding="utf-8")
+        outputs = {}
+        timings = {}
+        for name in backends:
+            # 只测量解析，不解析跳转链接，避免发起网络请求
+            engine = engine_class()
+            engine.config.defer_redirects = True
+            engine.set_parser(name)
+            outputs[name], timings[name] = parse_fixture(engine, html, max(1, args.repeat))
+
+        expected = load_expected(fixture)
+        baseline = "expected" if expected is not None else "bs4"
+        reference = expected if expected is not None else outputs["bs4"]
+        same = all(outputs[name] == reference for name in backends)
+        mismatches += not same
+        speedup = timings["bs4"] / timings["lxml"] if timings.get("lxml") else 0
+        print(f"{fixture.name:<20} {len(reference):>7} "
+              + " ".join(f"{timings[name] * 1000:>9.2f}" for name in backends)
+              + f"  {speedup:>6.1f}x  {'ok' if same else 'MISMATCH'} ({baseline})")
+        if not same:
+            for name in backends:
+                if outputs[name] != reference:
+                    for wanted, actual in zip(reference, outputs[name]):
+                        if wanted != actual:
+                            print(f"    {baseline}: {wanted}\n    {name}: {actual}")
+                            break
+                    if len(outputs[name]) != len(reference):
+                        print(f"    {name} returned {len(outputs[name])} results, {baseline} {len(reference)}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Offline record/replay stand-in for search engines and web pages.
+
+在本地启动一个 HTTP 服务器，代替百度、搜狗、必应等搜索引擎和搜索结果中的网页，
+用于在没有网络的环境中测试和压测 web_search 的完整流程（见 bench_search.py）：
+
+    - 请求路径 /<scheme>/<host>/<path>?<query> 对应原始 URL <scheme>://<host>/<path>?<query>。
+      返回的页面和 Location 中的绝对 URL（包括 URL 编码的形式）都改写成这种形式，
+      因此解析出的结果链接、跳转目标和抓取的网页都指向本地，不会访问外网
+    - 优先返回录制的响应（record 子命令，需要联网）。没有录制时，搜索结果页使用
+      benchmarks/fixtures/serp/<引擎>.html，百度、搜狗的 /link?url= 跳转链接分别返回 302
+      和 JavaScript 跳转页，其他网页按 URL 生成确定性的文章页面（或取自 --corpus 目录）
+    - 可按请求类型（serp/redirect/page）注入延迟（对数正态分布）、错误状态码和无响应的请求
+
+route_engines() 把已注册的搜索引擎指向本服务器，并为改写后的跳转链接注册解析函数，
+之后在同一进程中调用 _web_search 即可离线运行。
+
+用法:
+    python benchmarks/replay_server.py serve [--port 8765] [--fixtures DIR] [--corpus DIR]
+        [--page-latency 0.2] [--failure-rate 0.05] [--stall-rate 0.01]
+    python benchmarks/replay_server.py record QUERY [QUERY ...] [--fixtures DIR] [--providers baidu,sogou,bing]
+
+录制的响应保存在 --fixtures 目录（默认 benchmarks/fixtures/replay）的 responses.json 和 bodies/ 中。
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+SERP_DIR = FIXTURES_DIR / "serp"
+DEFAULT_RECORDINGS = FIXTURES_DIR / "replay"
+
+_ABSOLUTE_URL = re.compile(r"(https?)://([A-Za-z0-9.-]+(?::\d+)?)")
+_ENCODED_URL = re.compile(r"(https?)%3A%2F%2F([A-Za-z0-9.-]+(?:%3A\d+)?)", re.IGNORECASE)
+_BAIDU_LINK = re.compile(r"^https?://(www\.)?baidu\.com/link\?url=(.+)$")
+_SOGOU_LINK = re.compile(r"^https?://(www\.)?sogou\.com/link\?url=(.+)$")
+_WORDS = ("deepin", "linux", "桌面", "系统", "发布", "更新", "内核", "驱动", "应用", "商店", "社区", "版本",
+          "性能", "优化", "安装", "教程", "用户", "界面", "文件", "管理器", "终端", "网络", "搜索", "服务",
+          "release", "kernel", "desktop", "package", "install", "update", "support", "performance")
+
+
+@dataclass
+class Faults:
+    """Latency and failure injection, per request kind (serp, redirect, page)."""
+    latency: Dict[str, float] = field(default_factory=lambda: {"serp": 0.3, "redirect": 0.05, "page": 0.2})
+    # 延迟为 latency * lognormvariate(0, jitter)
+    jitter: float = 0.5
+    failure_rate: float = 0.0
+    failure_status: int = 503
+    # 无响应的请求在 stall 秒后才返回，用于模拟超时
+    stall_rate: float = 0.0
+    stall: float = 30.0
+    seed: int = 0
+
+
+@dataclass
+class Recorded:
+    """One recorded response."""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    kind: str = "page"
+
+
+class Recordings:
+    """Responses captured from live traffic, keyed by the original request URL."""
+
+    def __init__(self, directory: Path = DEFAULT_RECORDINGS):
+        self.directory = Path(directory)
+        self.entries: Dict[str, dict] = {}
+        self.queries: List[str] = []
+        self._lock = threading.Lock()
+        index = self.directory / "responses.json"
+        if index.exists():
+            data = json.loads(index.read_text(encoding="utf-8"))
+            self.entries = data.get("responses", {})
+            self.queries = data.get("queries", [])
+
+    def get(self, url: str) -> Optional[Recorded]:
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        body = (self.directory / entry["body"]).read_bytes() if entry.get("body") else b""
+        return Recorded(entry["status"], entry["headers"], body, entry.get("kind", "page"))
+
+    def add(self, url: str, status: int, headers, body: bytes, kind: str) -> None:
+        kept = {name: headers[name] for name in ("Content-Type", "Location", "Retry-After") if name in headers}
+        entry = {"status": status, "headers": kept, "kind": kind}
+        if body:
+            name = f"bodies/{hashlib.sha1(url.encode()).hexdigest()[:20]}.bin"
+            (self.directory / "bodies").mkdir(parents=True, exist_ok=True)
+            (self.directory / name).write_bytes(body)
+            entry["body"] = name
+        with self._lock:
+            # HEAD 请求的记录不覆盖同一 URL 的 GET 记录
+            if body or url not in self.entries:
+                self.entries[url] = entry
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = {"queries": self.queries, "responses": self.entries}
+        (self.directory / "responses.json").write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def default_serps(names: Optional[Iterable[str]] = None) -> Dict[str, Path]:
+    """Saved SERP fixture for each registered engine, keyed by the host and path of its search URL."""
+    from web_service.web_search.registry import get_engine_registry
+
+    registry = get_engine_registry()
+    serps = {}
+    for name in names or registry.names():
+        fixture = SERP_DIR / f"{name}.html"
+        if fixture.exists():
+            parts = urlsplit(registry.get(name).config.base_url)
+            serps[parts.netloc + parts.path] = fixture
+    return serps
+
+
+def synthetic_page(url: str) -> bytes:
+    """A deterministic article page for url, with navigation, scripts and 20-60 paragraphs."""
+    rng = random.Random(hashlib.sha1(url.encode()).digest())
+
+    def sentence():
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 30))) + "。"
+
+    title = html.escape(sentence()[:40])
+    nav = "".join(f'<li><a href="/section/{i}">{rng.choice(_WORDS)}</a></li>' for i in range(30))
+    paragraphs = "".join(f"<p>{' '.join(sentence() for _ in range(rng.randint(2, 6)))}</p>"
+                         for _ in range(rng.randint(20, 60)))
+    related = "".join(f'<li><a href="/article/{rng.randrange(10**6)}">{sentence()[:30]}</a></li>' for _ in range(10))
+    script = "var data = " + json.dumps([rng.random() for _ in range(300)]) + ";"
+    page = (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title>"
+        f"<script>{script}</script><style>body {{ font-family: sans-serif; }}</style></head>"
+        f"<body><header><nav><ul>{nav}</ul></nav></header>"
+        f"<main><article><h1>{title}</h1>{paragraphs}</article></main>"
+        f"<aside><ul>{related}</ul></aside><footer>{sentence()}</footer></body></html>"
+    )
+    return page.encode("utf-8")
+
+
+def rewrite(text: str, base: str) -> str:
+    """Point every absolute http(s) URL in text (plain or URL-encoded) at the replay server at base."""
+    text = _ABSOLUTE_URL.sub(lambda m: f"{base}/{m.group(1)}/{m.group(2)}", text)
+    return _ENCODED_URL.sub(
+        lambda m: quote(f"{base}/{m.group(1).lower()}/", safe="") + m.group(2), text
+    )
+
+
+def original_url(path: str) -> Optional[str]:
+    """The original URL behind a replay request path /<scheme>/<host>/<rest>, or None."""
+    scheme, _, rest = path.lstrip("/").partition("/")
+    if scheme not in ("http", "https") or not rest:
+        return None
+    return f"{scheme}://{rest}"
+
+
+class ReplayServer:
+    """Threaded HTTP server replaying recorded or synthetic responses with injected faults."""
+
+    def __init__(self, port: int = 0, recordings: Optional[Recordings] = None,
+                 serps: Optional[Dict[str, Path]] = None, corpus: Optional[Path] = None,
+                 faults: Optional[Faults] = None):
+        self.recordings = recordings or Recordings()
+        self.serps = default_serps() if serps is None else serps
+        self.corpus = sorted(Path(corpus).glob("*.html")) if corpus else []
+        self.faults = faults or Faults()
+        self.requests: Dict[str, int] = {"serp": 0, "redirect": 0, "page": 0}
+        self.injected: Dict[str, int] = {"failure": 0, "stall": 0}
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="replay-server")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def route_engines(self, names: Optional[Iterable[str]] = None) -> None:
+        """Send the registered engines' searches, and their redirect links, to this server."""
+        from web_service.web_search import redirects
+        from web_service.web_search.registry import get_engine_registry
+
+        registry = get_engine_registry()
+        for name in names or registry.names():
+            engine = registry.get(name)
+            engine.config.base_url = rewrite(engine.config.base_url, self.base)
+            if hasattr(engine, "host_url"):
+                engine.host_url = rewrite(engine.host_url, self.base)
+        local = re.escape(self.base)
+        redirects.RESOLVERS[:0] = [
+            (re.compile(rf"^{local}/https?/(www\.)?sogou\.com/link\?url="), redirects._resolve_sogou),
+            (re.compile(rf"^{local}/https?/(www\.)?baidu\.com/link\?url="), redirects._resolve_baidu),
+        ]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {"requests": dict(self.requests), "injected": dict(self.injected)}
+
+    def respond(self, url: str) -> Recorded:
+        """The response for an original URL: recorded, default SERP, engine redirect or synthetic page."""
+        recorded = self.recordings.get(url)
+        if recorded is not None:
+            return recorded
+        parts = urlsplit(url)
+        serp = self.serps.get(parts.netloc + parts.path)
+        if serp is not None:
+            return Recorded(200, {"Content-Type": "text/html; charset=utf-8"}, serp.read_bytes(), "serp")
+        match = _BAIDU_LINK.match(url)
+        if match:
+            target = f"https://baidu-target.example.com/{hashlib.sha1(match.group(2).encode()).hexdigest()[:12]}"
+            return Recorded(302, {"Location": target}, b"", "redirect")
+        match = _SOGOU_LINK.match(url)
+        if match:
+            target = f"https://sogou-target.example.com/{hashlib.sha1(match.group(2).encode()).hexdigest()[:12]}"
+            page = f'<html><script>window.location.replace("{target}")</script></html>'
+            return Recorded(200, {"Content-Type": "text/html; charset=utf-8"}, page.encode(), "redirect")
+        if self.corpus:
+            page = self.corpus[int(hashlib.sha1(url.encode()).hexdigest(), 16) % len(self.corpus)].read_bytes()
+        else:
+            page = synthetic_page(url)
+        return Recorded(200, {"Content-Type": "text/html; charset=utf-8"}, page, "page")
+
+    def _fault(self, kind: str) -> Tuple[float, Optional[int]]:
+        """Delay before answering and the injected error status, if any."""
+        faults = self.faults
+        with self._lock:
+            self.requests[kind] += 1
+            roll = self._rng.random()
+            delay = faults.latency.get(kind, 0.0) * self._rng.lognormvariate(0, faults.jitter)
+            if roll < faults.stall_rate:
+                self.injected["stall"] += 1
+                return faults.stall, None
+            if roll < faults.stall_rate + faults.failure_rate:
+                self.injected["failure"] += 1
+                return delay, faults.failure_status
+        return delay, None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._reply(send_body=True)
+
+            def do_HEAD(self):
+                self._reply(send_body=False)
+
+            def _reply(self, send_body: bool):
+                url = original_url(self.path)
+                if url is None:
+                    self._send(404, {"Content-Type": "text/plain"}, b"not a replay URL", send_body)
+                    return
+                response = server.respond(url)
+                delay, failure = server._fault(response.kind)
+                if delay > 0 and server._stopping.wait(delay):
+                    return
+                if failure is not None:
+                    # 不带 Retry-After：所有主机共用本地地址，暂停会波及全部请求
+                    self._send(failure, {"Content-Type": "text/plain"}, b"injected failure", send_body)
+                    return
+                headers = dict(response.headers)
+                if "Location" in headers:
+                    headers["Location"] = rewrite(headers["Location"], server.base)
+                body = response.body
+                if body and "html" in headers.get("Content-Type", "html"):
+                    body = rewrite(body.decode("utf-8", errors="surrogateescape"), server.base).encode(
+                        "utf-8", errors="surrogateescape")
+                self._send(response.status, headers, body, send_body)
+
+            def _send(self, status: int, headers: Dict[str, str], body: bytes, send_body: bool):
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if send_body:
+                        self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已超时放弃
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(queries: List[str], directory: Path, providers: str, mode: str) -> None:
+    """Run live searches and save every SERP, redirect and page response for replay."""
+    os.environ.update(
+        HOME=tempfile.mkdtemp(prefix="replay-record-"),
+        DEEPIN_MCP_SEARCH_CACHE="0",
+        DEEPIN_MCP_CONTENT_CACHE="0",
+        DEEPIN_MCP_PAGE_INDEX="0",
+        DEEPIN_MCP_SEARCH_PROVIDERS=providers,
+    )
+    import asyncio
+    from web_service import services
+    from web_service.web_search.http_pool import get_async_client, get_session
+    from web_service.web_search.registry import get_engine_registry
+
+    registry = get_engine_registry()
+    search_urls = [registry.get(name).config.base_url for name in services.SEARCH_PROVIDERS]
+    recordings = Recordings(directory)
+
+    def kind_of(url: str) -> str:
+        if any(url.startswith(base) for base in search_urls):
+            return "serp"
+        return "redirect" if _BAIDU_LINK.match(url) or _SOGOU_LINK.match(url) else "page"
+
+    def on_response(response, *args, **kwargs):
+        url = response.request.url
+        body = response.content if response.request.method == "GET" else b""
+        recordings.add(url, response.status_code, response.headers, body, kind_of(url))
+
+    async def on_async_response(response):
+        url = str(response.request.url)
+        body = await response.aread() if response.request.method == "GET" else b""
+        recordings.add(url, response.status_code, response.headers, body, kind_of(url))
+
+    async def run():
+        get_async_client().event_hooks["response"].append(on_async_response)
+        for query in queries:
+            started = time.monotonic()
+            results = await services._web_search(query, mode=mode)
+            print(f"{query}: {time.monotonic() - started:.1f}s, {len(results)} bytes")
+
+    get_session().hooks["response"].append(on_response)
+    asyncio.run(run())
+    recordings.queries = list(dict.fromkeys(recordings.queries + queries))
+    recordings.save()
+    print(f"recorded {len(recordings.entries)} responses into {directory}")
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command line options shared by the server and the benchmarks that embed it."""
+    parser.add_argument("--fixtures", default=str(DEFAULT_RECORDINGS), help="directory of recorded responses")
+    parser.add_argument("--corpus", help="directory of *.html pages served instead of synthetic articles")
+    parser.add_argument("--serp-latency", type=float, default=0.3, help="median SERP latency, seconds")
+    parser.add_argument("--redirect-latency", type=float, default=0.05, help="median redirect latency, seconds")
+    parser.add_argument("--page-latency", type=float, default=0.2, help="median page latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="sigma of the lognormal latency factor")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=503, help="status code of injected errors")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of requests that hang for --stall s")
+    parser.add_argument("--stall", type=float, default=30.0, help="seconds a stalled request hangs")
+    parser.add_argument("--seed", type=int, default=0, help="seed for latency and fault injection")
+
+
+def server_from_args(args: argparse.Namespace, port: int = 0) -> ReplayServer:
+    faults = Faults(
+        latency={"serp": args.serp_latency, "redirect": args.redirect_latency, "page": args.page_latency},
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+        seed=args.seed,
+    )
+    return ReplayServer(port, Recordings(Path(args.fixtures)), corpus=args.corpus, faults=faults)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="replay recorded and synthetic responses")
+    serve.add_argument("--port", type=int, default=8765)
+    add_fault_arguments(serve)
+    capture = commands.add_parser("record", help="record live search traffic (needs network access)")
+    capture.add_argument("queries", nargs="+")
+    capture.add_argument("--fixtures", default=str(DEFAULT_RECORDINGS), help="directory to save responses into")
+    capture.add_argument("--providers", default="baidu,sogou,bing", help="comma-separated engines to record")
+    capture.add_argument("--mode", default="merge", choices=("hedge", "merge"),
+                         help="merge records every engine's SERP")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.queries, Path(args.fixtures), args.providers, args.mode)
+        return
+    server = server_from_args(args, args.port).start()
+    print(f"replaying on {server.base}/<scheme>/<host>/<path>, e.g. {server.base}/https/www.baidu.com/s?wd=deepin")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats()))
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
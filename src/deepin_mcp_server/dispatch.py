@@ -0,0 +1,138 @@
+"""
+Tool dispatch layer.
+
+MCP 工具函数都是 async 的，但底层实现（网络搜索、git、终端命令、文档解析、
+selenium 等）都是同步阻塞调用。这里按类别提供受限的执行器，把阻塞调用移出
+事件循环，使相互独立的工具调用可以并行，服务器在高负载下仍能及时响应。
+
+执行器类别：
+    io:      线程池，用于网络、git、终端命令、DBus、文件操作等 IO 密集型调用
+    cpu:     进程池，用于文档解析等 CPU 密集型调用
+    browser: 线程池，selenium 会话是全局共享的，默认只有 1 个线程以保证串行
+
+池大小可通过环境变量配置：
+    DEEPIN_MCP_IO_WORKERS       (默认 min(32, CPU数 + 4))
+    DEEPIN_MCP_CPU_WORKERS      (默认 min(4, CPU数))
+    DEEPIN_MCP_BROWSER_WORKERS  (默认 1)
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_CPU_COUNT = os.cpu_count() or 1
+
+DEFAULT_POOL_SIZES = {
+    "io": min(32, _CPU_COUNT + 4),
+    "cpu": min(4, _CPU_COUNT),
+    "browser": 1,
+}
+
+_executors: Dict[str, Executor] = {}
+_lock = threading.Lock()
+
+
+def _pool_size(category: str) -> int:
+    """读取类别对应的池大小，环境变量无效时回退到默认值"""
+    env_name = f"DEEPIN_MCP_{category.upper()}_WORKERS"
+    value = os.getenv(env_name)
+    if value:
+        try:
+            size = int(value)
+            if size > 0:
+                return size
+        except ValueError:
+            pass
+        logger.warning(f"环境变量 {env_name}={value} 无效，使用默认值 {DEFAULT_POOL_SIZES[category]}")
+    return DEFAULT_POOL_SIZES[category]
+
+
+def _create_executor(category: str) -> Executor:
+    size = _pool_size(category)
+    logger.info(f"创建 {category} 执行器，大小: {size}")
+    if category == "cpu":
+        # 使用 spawn，避免在多线程进程中 fork 导致子进程死锁
+        return ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"mcp-{category}")
+
+
+def get_executor(category: str) -> Executor:
+    """获取（必要时创建）指定类别的执行器"""
+    if category not in DEFAULT_POOL_SIZES:
+        raise ValueError(f"Unknown executor category: {category}")
+    executor = _executors.get(category)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(category)
+            if executor is None:
+                executor = _create_executor(category)
+                _executors[category] = executor
+    return executor
+
+
+def _reset_executor(category: str, executor: Executor) -> None:
+    with _lock:
+        if _executors.get(category) is executor:
+            del _executors[category]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in(category: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在指定类别的执行器中运行阻塞函数并等待结果"""
+    loop = asyncio.get_running_loop()
+    executor = get_executor(category)
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在 IO 线程池中运行阻塞函数"""
+    return await run_in("io", func, *args, **kwargs)
+
+
+async def run_browser(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在浏览器线程池中运行 selenium 调用"""
+    return await run_in("browser", func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    在 CPU 进程池中运行函数
+
+    func 及参数必须可以被 pickle。进程池异常损坏时会重建进程池，
+    本次调用回退到 IO 线程池执行，保证工具调用仍然有结果。
+    """
+    executor = get_executor("cpu")
+    try:
+        return await run_in("cpu", func, *args, **kwargs)
+    except BrokenProcessPool as e:
+        logger.error(f"CPU 进程池已损坏，重建进程池: {e}")
+        _reset_executor("cpu", executor)
+        return await run_io(func, *args, **kwargs)
+
+
+def install_default_executor(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """将 IO 线程池设为事件循环的默认执行器，使 asyncio.to_thread 同样受池大小限制"""
+    loop = loop or asyncio.get_running_loop()
+    loop.set_default_executor(get_executor("io"))
+
+
+def shutdown(wait: bool = False) -> None:
+    """关闭所有执行器"""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown)
@@ -3,20 +3,23 @@ Deepin MCP Server implementation.
 """
 
 # Standard library imports
+import inspect
 import json
 import logging
 import os
 import subprocess
+from contextlib import asynccontextmanager
 from typing import Any
 from pathlib import Path
 from urllib.parse import urlparse
 
 # 第三方库
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 # Local imports
+from dispatch import run_io, run_cpu, run_browser, install_default_executor, shutdown as shutdown_executors
 from dbus_service.services import dbus_send, dbus_get_property, dbus_set_property, show_confirmation_dialog, show_notification
-from web_service.services import _web_search, _fetch_web_content
+from web_service.services import _web_search, _web_search_batch, _expand_search_result, _search_fetched_pages, _crawl_site, _fetch_web_content, _http_pool_stats, _search_engine_health
 from web_service.utils import _download_file
 from system_tools.system_control import (
     _switch_wallpaper, 
@@ -92,8 +95,17 @@ console_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    # 让 asyncio.to_thread 等默认执行器调用也落在受限的 IO 线程池中
+    install_default_executor()
+    try:
+        yield {}
+    finally:
+        shutdown_executors()
+
 # 初始化服务器
-mcp = FastMCP("deepin-mcp-servers")
+mcp = FastMCP("deepin-mcp-servers", lifespan=server_lifespan)
 
 @mcp.tool()
 async def launch_app(app_name: str) -> str:
@@ -111,7 +123,7 @@ async def launch_app(app_name: str) -> str:
     try:
         try:
         # 使用dde-am启动应用
-            subprocess.run(["dde-am", app_name], check=True)
+            await run_io(subprocess.run, ["dde-am", app_name], check=True)
             return f"成功启动应用 {app_name}"
         except Exception as e:
             logger.error(f"dde-am启动应用失败: {e}")
@@ -140,7 +152,7 @@ async def send_mail(email_data: dict) -> str:
                 "bcc": "密送1,密送2"
             }
     """
-    return _send_mail(email_data)
+    return await run_io(_send_mail, email_data)
 
 @mcp.tool()
 async def create_schedule(schedule_data: dict) -> str:
@@ -159,7 +171,7 @@ async def create_schedule(schedule_data: dict) -> str:
                 "end_time": "结束时间 (格式: yyyy-MM-ddThh:mm:ss)"
             }
     """
-    return _create_schedule(schedule_data)
+    return await run_io(_create_schedule, schedule_data)
 
 @mcp.tool()
 async def switch_wallpaper(file_url: str = None) -> str:
@@ -173,7 +185,7 @@ async def switch_wallpaper(file_url: str = None) -> str:
     Args:
         file_url: (optional) The wallpaper file path to use directly. If provided, this file will be used as wallpaper directly.
     """
-    return _switch_wallpaper(file_url)
+    return await run_io(_switch_wallpaper, file_url)
 
 @mcp.tool()
 async def dock_mode_switch(mode: int) -> str:
@@ -187,7 +199,7 @@ async def dock_mode_switch(mode: int) -> str:
     Args:
         mode: The dock display mode to switch to (0 for Fashion mode, 1 for Efficient mode)
     """
-    return _switch_dock_mode(mode)
+    return await run_io(_switch_dock_mode, mode)
 
 @mcp.tool()
 async def no_disturb(state: bool) -> str:
@@ -201,7 +213,7 @@ async def no_disturb(state: bool) -> str:
     Args:
         state: True to enable do not disturb mode, False to disable it
     """
-    return _set_do_not_disturb(state)
+    return await run_io(_set_do_not_disturb, state)
 
 @mcp.tool()
 async def system_theme_switch(theme: int) -> str:
@@ -215,7 +227,7 @@ async def system_theme_switch(theme: int) -> str:
     Args:
         theme: The theme to switch to (0 for deepin, 1 for deepin-dark, 2 for deepin-auto)
     """
-    return _switch_system_theme(theme)
+    return await run_io(_switch_system_theme, theme)
 
 @mcp.tool()
 async def get_system_memory() -> str:
@@ -229,7 +241,7 @@ async def get_system_memory() -> str:
     Args:
         None
     """
-    return _get_system_memory()
+    return await run_io(_get_system_memory)
 
 @mcp.tool()
 async def open_file(file_path: str) -> str:
@@ -239,7 +251,7 @@ async def open_file(file_path: str) -> str:
     Args:
         file_path: 文件路径
     """
-    return _open_file(file_path)
+    return await run_io(_open_file, file_path)
 
 @mcp.tool()
 async def copy_file(source_path: str, destination_path: str) -> str:
@@ -254,7 +266,7 @@ async def copy_file(source_path: str, destination_path: str) -> str:
         source_path: 源文件路径
         destination_path: 目标文件路径
     """
-    return _copy_file(source_path, destination_path)
+    return await run_io(_copy_file, source_path, destination_path)
 
 @mcp.tool()
 async def move_file(source_path: str, destination_path: str) -> str:
@@ -269,7 +281,7 @@ async def move_file(source_path: str, destination_path: str) -> str:
         source_path: 源文件路径
         destination_path: 目标文件路径
     """
-    return _move_file(source_path, destination_path)
+    return await run_io(_move_file, source_path, destination_path)
 
 @mcp.tool()
 async def rename_file(old_path: str, new_name: str) -> str:
@@ -284,7 +296,7 @@ async def rename_file(old_path: str, new_name: str) -> str:
         old_path: 原文件路径
         new_name: 新文件名
     """
-    return _rename_file(old_path, new_name)
+    return await run_io(_rename_file, old_path, new_name)
 
 @mcp.tool()
 async def delete_file(file_path: str) -> str:
@@ -298,7 +310,7 @@ async def delete_file(file_path: str) -> str:
     Args:
         file_path: 要删除的文件路径
     """
-    return _delete_file(file_path)
+    return await run_io(_delete_file, file_path)
 
 @mcp.tool()
 async def create_file(file_path: str, content: str = "") -> str:
@@ -313,7 +325,7 @@ async def create_file(file_path: str, content: str = "") -> str:
         file_path: 新文件路径
         content: 文件初始内容（可选）
     """
-    return _create_file(file_path, content)
+    return await run_io(_create_file, file_path, content)
 
 @mcp.tool()
 async def create_folder(folder_path: str) -> str:
@@ -327,7 +339,7 @@ async def create_folder(folder_path: str) -> str:
     Args:
         folder_path: 新文件夹路径
     """
-    return _create_folder(folder_path)
+    return await run_io(_create_folder, folder_path)
 
 @mcp.tool()
 async def batch_rename(folder_path: str, new_name: str) -> str:
@@ -342,7 +354,7 @@ async def batch_rename(folder_path: str, new_name: str) -> str:
         folder_path: 文件夹路径
         new_name: 新文件名
     """
-    return _batch_rename(folder_path, new_name)
+    return await run_io(_batch_rename, folder_path, new_name)
 
 @mcp.tool()
 async def list_dir(folder_path: str, recursive: bool = False) -> str:
@@ -357,7 +369,7 @@ async def list_dir(folder_path: str, recursive: bool = False) -> str:
         folder_path: 文件夹路径
         recursive: 递归查询子文件夹(default: False)
     """
-    return _list_dir(folder_path, recursive)
+    return await run_io(_list_dir, folder_path, recursive)
 
 @mcp.tool()
 async def read_document(document_path: str) -> str:
@@ -371,7 +383,7 @@ async def read_document(document_path: str) -> str:
     Args:
         document_path: 文档路径
     """
-    return _read_document(document_path)
+    return await run_cpu(_read_document, document_path)
 
 @mcp.tool()
 async def download_file(url: str, download_dir: str = None) -> str:
@@ -386,7 +398,7 @@ async def download_file(url: str, download_dir: str = None) -> str:
         url: 文件下载链接 (必须以http://或https://开头)
         download_dir: 下载目录 (可选，默认为用户下载目录)
     """
-    return _download_file(url, download_dir)
+    return await run_io(_download_file, url, download_dir)
 
 @mcp.tool()
 async def user_directory() -> str:
@@ -411,21 +423,102 @@ async def get_files_size(file_paths: list[str]) -> str:
     Args:
         file_paths: 文件路径列表
     """
-    return _get_files_size(file_paths)
+    return await run_io(_get_files_size, file_paths)
 
 @mcp.tool()
-async def web_search(query: str) -> str:
+async def web_search(query: str, ctx: Context, merge: bool = False, snippets_only: bool = False) -> str:
     """
     Name:
     Web search
 
     Description:
-        Search content on web.
+        Search content on web. Every result has an id that can be passed to expand_search_result.
+        Near-identical pages (e.g. the same article reposted on several sites) are returned once,
+        with the other copies listed under "duplicates".
     
     Args:
         query: Search keywords
+        merge: Combine and deduplicate results from all search engines (slower, broader coverage)
+        snippets_only: Return only titles and snippets from the result page without fetching
+            each web page (much faster); use expand_search_result to read a result in full
+
+    Progress:
+        When the request carries a progress token, a progress notification is sent as each result
+        is fetched; its message holds that result as JSON (the same fields as in the final list,
+        plus "rank"), so the first pages can be read before the slowest one arrives.
+    """
+    on_progress = _search_progress(ctx)
+    if merge:
+        return await _web_search(query, mode="merge", fetch_content=not snippets_only, on_progress=on_progress)
+    return await _web_search(query, fetch_content=not snippets_only, on_progress=on_progress)
+
+# 旧版 mcp 的进度通知不带 message 字段，此时只报告进度
+_PROGRESS_MESSAGES = "message" in inspect.signature(Context.report_progress).parameters
+
+def _search_progress(ctx: Context):
+    """Progress callback forwarding each fetched result to the client, or None if it did not ask for progress."""
+    meta = ctx.request_context.meta
+    if meta is None or meta.progressToken is None:
+        return None
+
+    async def report(completed: int, total: int, item: dict | None) -> None:
+        if item is not None and _PROGRESS_MESSAGES:
+            await ctx.report_progress(completed, total, message=json.dumps(item, ensure_ascii=False))
+        else:
+            await ctx.report_progress(completed, total)
+    return report
+
+@mcp.tool()
+async def web_search_batch(queries: list[str], merge: bool = False, snippets_only: bool = False) -> str:
+    """
+    Name:
+        Batch web search
+
+    Description:
+        Run several related searches at once and return the results grouped per query.
+        A page returned by more than one query is fetched once; its content appears under the
+        first query and later occurrences carry "seen_in" with that query instead.
+
+    Args:
+        queries: List of search keywords (at most 20)
+        merge: Combine and deduplicate results from all search engines for each query
+        snippets_only: Return only titles and snippets without fetching the web pages
+    """
+    if merge:
+        return await _web_search_batch(queries, mode="merge", fetch_content=not snippets_only)
+    return await _web_search_batch(queries, fetch_content=not snippets_only)
+
+@mcp.tool()
+async def expand_search_result(result_id: str) -> str:
+    """
+    Name:
+        Expand search result
+
+    Description:
+        Fetch the full content of one result returned by web_search, identified by its id.
+
+    Args:
+        result_id: The id of a web_search result
+    """
+    return await _expand_search_result(result_id)
+
+@mcp.tool()
+async def search_fetched_pages(query: str, max_results: int = 5, full_content: bool = False) -> str:
+    """
+    Name:
+        Search fetched pages
+
+    Description:
+        Full-text search over web pages that were already fetched by web_search, expand_search_result
+        or fetch_web_content. Answers come from the local index with no network requests, so try this
+        first for questions that earlier research may already cover.
+
+    Args:
+        query: Search keywords
+        max_results: Maximum number of pages to return (at most 20)
+        full_content: Return the page content instead of a short snippet around the match
     """
-    return _web_search(query)
+    return await run_io(_search_fetched_pages, query, max_results, full_content)
 
 @mcp.tool()
 async def fetch_web_content(url):
@@ -442,7 +535,63 @@ async def fetch_web_content(url):
     Returns:
         str: Extracted main content of the page
     """
-    return _fetch_web_content(url)
+    return await run_io(_fetch_web_content, url)
+
+@mcp.tool()
+async def crawl_site(url: str, max_depth: int = 1, max_pages: int = 20, output_dir: str = "",
+                     path_prefix: str = "") -> str:
+    """
+    Name:
+        Crawl site
+
+    Description:
+        Fetch a page and the same-site pages it links to (e.g. a documentation site), extracting
+        each page as markdown. Pages are fetched concurrently with per-host rate limiting.
+
+    Args:
+        url: Start URL
+        max_depth: How many links away from the start page to follow (0 fetches only the start page)
+        max_pages: Maximum number of pages to fetch
+        output_dir: If set, write each page as a markdown file into this directory (plus index.json)
+            and return only the list of files; otherwise return the page contents
+        path_prefix: Only follow links whose path starts with this prefix, e.g. /docs/
+
+    Returns:
+        str: JSON with the crawled pages (or written files) and the URLs that failed
+    """
+    return await _crawl_site(url, max_depth, max_pages, output_dir or None, path_prefix or None)
+
+@mcp.tool()
+async def http_pool_stats() -> str:
+    """
+    Name:
+        HTTP connection pool statistics
+
+    Description:
+        Show the state of the shared HTTP connection pools used by web search,
+        page fetching and file downloads (connections per host, idle connections, request counts),
+        and the per-host rate limiting state (waits, Retry-After backoffs).
+
+    Returns:
+        str: Pool statistics as JSON
+    """
+    return _http_pool_stats()
+
+@mcp.tool()
+async def search_engine_health() -> str:
+    """
+    Name:
+        Search engine health
+
+    Description:
+        Show the health of each web search engine: success rate, average latency,
+        captcha and empty-result counts, circuit breaker state and the current order
+        in which engines are tried. Use it to see why an engine is being skipped.
+
+    Returns:
+        str: Engine health report as JSON
+    """
+    return _search_engine_health()
 
 @mcp.tool()
 async def execute_terminal_command(command: str, working_directory: str = None, timeout: int = 30, confirm_dialog: bool = True) -> str:
@@ -467,7 +616,7 @@ async def execute_terminal_command(command: str, working_directory: str = None,
     if timeout > 120:
         timeout = 120
     
-    return _execute_terminal_command(command, working_directory, timeout, confirm_dialog)
+    return await run_io(_execute_terminal_command, command, working_directory, timeout, confirm_dialog)
 
 @mcp.tool()
 async def git_status(repository_path: str = None) -> str:
@@ -484,7 +633,7 @@ async def git_status(repository_path: str = None) -> str:
     Returns:
         str: Git仓库状态信息
     """
-    return _git_status(repository_path)
+    return await run_io(_git_status, repository_path)
 
 @mcp.tool()
 async def git_log(repository_path: str = None, max_commits: int = 10) -> str:
@@ -506,7 +655,7 @@ async def git_log(repository_path: str = None, max_commits: int = 10) -> str:
     if max_commits > 50:
         max_commits = 50
     
-    return _git_log(repository_path, max_commits)
+    return await run_io(_git_log, repository_path, max_commits)
 
 @mcp.tool()
 async def git_branch_info(repository_path: str = None) -> str:
@@ -523,7 +672,7 @@ async def git_branch_info(repository_path: str = None) -> str:
     Returns:
         str: Git分支信息
     """
-    return _git_branch_info(repository_path)
+    return await run_io(_git_branch_info, repository_path)
 
 @mcp.tool()
 async def git_add_files(repository_path: str = None, files: list[str] = None) -> str:
@@ -541,7 +690,7 @@ async def git_add_files(repository_path: str = None, files: list[str] = None) ->
     Returns:
         str: 操作结果
     """
-    return _git_add_files(repository_path, files)
+    return await run_io(_git_add_files, repository_path, files)
 
 @mcp.tool()
 async def git_commit(repository_path: str = None, message: str = None) -> str:
@@ -559,7 +708,7 @@ async def git_commit(repository_path: str = None, message: str = None) -> str:
     Returns:
         str: 操作结果
     """
-    return _git_commit(repository_path, message)
+    return await run_io(_git_commit, repository_path, message)
 
 @mcp.tool()
 async def git_pull(repository_path: str = None) -> str:
@@ -576,7 +725,7 @@ async def git_pull(repository_path: str = None) -> str:
     Returns:
         str: 操作结果
     """
-    return _git_pull(repository_path)
+    return await run_io(_git_pull, repository_path)
 
 @mcp.tool()
 async def git_push(repository_path: str = None) -> str:
@@ -593,7 +742,7 @@ async def git_push(repository_path: str = None) -> str:
     Returns:
         str: 操作结果
     """
-    return _git_push(repository_path)
+    return await run_io(_git_push, repository_path)
 
 @mcp.tool()
 async def git_clone(repository_url: str, target_directory: str = None) -> str:
@@ -611,7 +760,7 @@ async def git_clone(repository_url: str, target_directory: str = None) -> str:
     Returns:
         str: 操作结果
     """
-    return _git_clone(repository_url, target_directory)
+    return await run_io(_git_clone, repository_url, target_directory)
 
 @mcp.tool()
 async def git_diff(repository_path: str = None, file_path: str = None, staged: bool = False) -> str:
@@ -630,7 +779,7 @@ async def git_diff(repository_path: str = None, file_path: str = None, staged: b
     Returns:
         str: Git差异内容，包含具体的代码修改
     """
-    return _git_diff(repository_path, file_path, staged)
+    return await run_io(_git_diff, repository_path, file_path, staged)
 
 @mcp.tool()
 async def git_show_commit(repository_path: str = None, commit_hash: str = None) -> str:
@@ -648,7 +797,7 @@ async def git_show_commit(repository_path: str = None, commit_hash: str = None)
     Returns:
         str: 提交的详细信息和代码修改内容
     """
-    return _git_show_commit(repository_path, commit_hash)
+    return await run_io(_git_show_commit, repository_path, commit_hash)
 
 @mcp.tool()
 async def git_file_history(repository_path: str = None, file_path: str = None, max_commits: int = 10) -> str:
@@ -671,7 +820,7 @@ async def git_file_history(repository_path: str = None, file_path: str = None, m
     if max_commits > 30:
         max_commits = 30
     
-    return _git_file_history(repository_path, file_path, max_commits)
+    return await run_io(_git_file_history, repository_path, file_path, max_commits)
 
 @mcp.tool()
 async def show_dialog(title: str, message: str, timeout: int = 30) -> str:
@@ -695,7 +844,7 @@ async def show_dialog(title: str, message: str, timeout: int = 30) -> str:
         timeout = 15
     
     try:
-        result = show_confirmation_dialog(title, message, timeout)
+        result = await run_io(show_confirmation_dialog, title, message, timeout)
         if result:
             return "用户选择了：是"
         else:
@@ -725,7 +874,7 @@ async def send_notification(title: str, message: str, icon: str = "dialog-inform
     if timeout > 30000:
         timeout = 30000
     
-    return show_notification(title, message, icon, timeout)
+    return await run_io(show_notification, title, message, icon, timeout)
 
 @mcp.tool()
 async def start_browser_session(browser_type: str = "chrome", headless: bool = False) -> str:
@@ -743,7 +892,7 @@ async def start_browser_session(browser_type: str = "chrome", headless: bool = F
     Returns:
         str: 操作结果
     """
-    return _start_browser_session(browser_type, headless)
+    return await run_browser(_start_browser_session, browser_type, headless)
 
 @mcp.tool()
 async def close_browser_session() -> str:
@@ -757,7 +906,7 @@ async def close_browser_session() -> str:
     Returns:
         str: 操作结果
     """
-    return _close_browser_session()
+    return await run_browser(_close_browser_session)
 
 @mcp.tool()
 async def browser_navigate(url: str) -> str:
@@ -774,7 +923,7 @@ async def browser_navigate(url: str) -> str:
     Returns:
         str: 操作结果，包含页面标题
     """
-    return _browser_navigate(url)
+    return await run_browser(_browser_navigate, url)
 
 @mcp.tool()
 async def browser_click(selector: str, by_type: str = "css") -> str:
@@ -792,7 +941,7 @@ async def browser_click(selector: str, by_type: str = "css") -> str:
     Returns:
         str: 操作结果
     """
-    return _browser_click(selector, by_type)
+    return await run_browser(_browser_click, selector, by_type)
 
 @mcp.tool()
 async def browser_input(selector: str, text: str, by_type: str = "css") -> str:
@@ -811,7 +960,7 @@ async def browser_input(selector: str, text: str, by_type: str = "css") -> str:
     Returns:
         str: 操作结果
     """
-    return _browser_input(selector, text, by_type)
+    return await run_browser(_browser_input, selector, text, by_type)
 
 @mcp.tool()
 async def browser_get_text(selector: str, by_type: str = "css") -> str:
@@ -829,7 +978,7 @@ async def browser_get_text(selector: str, by_type: str = "css") -> str:
     Returns:
         str: 元素文本内容
     """
-    return _browser_get_text(selector, by_type)
+    return await run_browser(_browser_get_text, selector, by_type)
 
 @mcp.tool()
 async def browser_wait_element(selector: str, by_type: str = "css", timeout: int = 10) -> str:
@@ -848,7 +997,7 @@ async def browser_wait_element(selector: str, by_type: str = "css", timeout: int
     Returns:
         str: 操作结果
     """
-    return _browser_wait_element(selector, by_type, timeout)
+    return await run_browser(_browser_wait_element, selector, by_type, timeout)
 
 @mcp.tool()
 async def browser_screenshot(filename: str = None) -> str:
@@ -865,7 +1014,7 @@ async def browser_screenshot(filename: str = None) -> str:
     Returns:
         str: 截图文件路径
     """
-    return _browser_screenshot(filename)
+    return await run_browser(_browser_screenshot, filename)
 
 @mcp.tool()
 async def browser_execute_script(script: str) -> str:
@@ -882,7 +1031,7 @@ async def browser_execute_script(script: str) -> str:
     Returns:
         str: 脚本执行结果
     """
-    return _browser_execute_script(script)
+    return await run_browser(_browser_execute_script, script)
 
 @mcp.tool()
 async def browser_get_page_info() -> str:
@@ -896,7 +1045,7 @@ async def browser_get_page_info() -> str:
     Returns:
         str: 页面信息
     """
-    return _browser_get_page_info()
+    return await run_browser(_browser_get_page_info)
 
 @mcp.tool()
 async def browser_smart_input(selector: str, text: str, by_type: str = "css") -> str:
@@ -915,7 +1064,7 @@ async def browser_smart_input(selector: str, text: str, by_type: str = "css") ->
     Returns:
         str: 操作结果
     """
-    return _browser_smart_input(selector, text, by_type)
+    return await run_browser(_browser_smart_input, selector, text, by_type)
 
 
 if __name__ == "__main__":
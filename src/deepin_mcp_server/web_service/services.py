@@ -1,44 +1,562 @@
+import asyncio
 import logging
 import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+from dispatch import run_io
 from .web_search.search import WebSearch
-from .web_search.search_types import SearchConfig, SearchResponse
-from .web_search.util import get_web_content
+from .web_search.search_types import SearchConfig, SearchResponse, SearchResult
+from .web_search.util import get_web_content, get_web_content_async, truncate_content
+from .web_search.settings import env_float, env_int
+from .web_search.http_pool import pool_stats
+from .web_search.redirects import is_redirect_link
+from .web_search.merge import dedupe_results, merge_responses, make_result_id
+from .web_search.cache import get_result_store
+from .web_search.health import CIRCUIT_COOLDOWN, CIRCUIT_FAILURES, get_health_registry
+from .web_search.deadline import SEARCH_BUDGET, Deadline
+from .web_search.politeness import get_host_scheduler
+from .web_search.index import get_page_index, make_snippet
+from .web_search.dedup import NearDuplicates, content_sketch, snippet_duplicates
+from .web_search.crawl import CrawledPage, SiteCrawler
+from .web_search.registry import get_engine_registry
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def _web_search(query: str) -> str:
+# 备用搜索引擎，按优先级排列；实际尝试顺序还会根据各引擎的健康状况动态调整。
+# 可选 baidu、sogou、bing、google、duckduckgo 以及通过入口点注册的第三方引擎（见 registry.py）
+SEARCH_PROVIDERS = [
+    name.strip() for name in os.getenv("DEEPIN_MCP_SEARCH_PROVIDERS", "baidu,sogou,bing").split(",") if name.strip()
+]
+# 搜索模式：hedge 使用最先返回结果的引擎；merge 同时调用所有引擎，去重后按倒数排名融合排序
+SEARCH_MODE = os.getenv("DEEPIN_MCP_SEARCH_MODE", "hedge")
+# merge 模式等待各引擎返回的时限（秒）及融合后保留的结果数
+MERGE_TIMEOUT = 12
+MERGE_MAX_RESULTS = 10
+# 对冲延迟（秒）：主引擎在该时间内未返回结果时启动下一个引擎；
+# 0 表示同时启动所有引擎，传入 None 表示依次回退（前一个失败后才尝试下一个）
+HEDGE_DELAY = env_float("DEEPIN_MCP_HEDGE_DELAY", 2.0)
+# 单次搜索同时抓取的网页数量上限
+FETCH_CONCURRENCY = env_int("DEEPIN_MCP_FETCH_CONCURRENCY", 5)
+# 单次搜索抓取网页的总时限（秒），超时后返回已完成的部分结果
+FETCH_DEADLINE = env_float("DEEPIN_MCP_FETCH_DEADLINE", 15)
+# 搜索结果中每个网页正文的最大字符数，超出部分截断，避免单个长页面占满上下文
+RESULT_MAX_CHARS = env_int("DEEPIN_MCP_RESULT_MAX_CHARS", 8000)
+# 批量搜索：单批最多的查询数、同时进行的搜索数、同时抓取的网页数及整批的时间预算（秒）
+BATCH_MAX_QUERIES = 20
+BATCH_SEARCH_CONCURRENCY = env_int("DEEPIN_MCP_BATCH_CONCURRENCY", 4)
+BATCH_FETCH_CONCURRENCY = 10
+BATCH_BUDGET = env_float("DEEPIN_MCP_BATCH_BUDGET", 60)
+
+# 最近一次搜索各阶段的耗时，供 search_engine_health 工具查看
+_last_search_report: dict | None = None
+
+# 进度回调: (已完成的结果数, 结果总数, 刚抓取完成的结果或 None)
+ProgressCallback = Callable[[int, int, dict | None], Awaitable[None]]
+# 抓取任务的结果：(正文, URL, 正文的近似重复草图)，正文为 None 表示疑似转载而未抓取
+FetchResult = tuple[str | None, str, list[int] | None]
+
+async def _web_search(query: str, max_concurrency: int = FETCH_CONCURRENCY, fetch_deadline: float = FETCH_DEADLINE,
+                      hedge_delay: float | None = HEDGE_DELAY, mode: str = SEARCH_MODE,
+                      fetch_content: bool = True, budget: float | None = SEARCH_BUDGET,
+                      on_progress: ProgressCallback | None = None) -> str:
+    """
+    搜索并返回 JSON 结果列表，每条结果带有稳定的 id
+
+    fetch_content 为 False 时只返回搜索结果页中的标题和摘要，不抓取网页，
+    之后可用 _expand_search_result 按 id 抓取单个结果的正文。
+    整个调用（搜索、跳转解析、网页抓取及重试）共享 budget 秒的时间预算，
+    预算用完时返回已完成的部分结果。
+    指定 on_progress 时，搜索完成后以及每个结果抓取完成时都会调用它，
+    成功抓取的结果（正文不与先前结果重复）随调用一起传出，调用方无需等待最慢的网页。
+    """
     if not query:
         return ""
 
+    deadline = Deadline(budget)
     try:
-        # 备用搜索引擎
-        providers = ["baidu", "sogou", "bing"] # sogou google ...
-        for provider in providers:
-            logger.info(f"使用搜索引擎: {provider}")
-            config = SearchConfig(
-                provider=provider,
-                max_results=10,
-                timeout=10,
-                proxy=None
-            )
-            searcher = WebSearch(config)
-            response = searcher.search(query)
-            if (len(response.results) > 0):
-                break
-        
-        result_json = []
-        for result in response.results:
-            content, _ = get_web_content(result.url)
-            result_json.append({
-                "title": result.title,
-                "url": result.url,
-                "content": content
-            })
-        return json.dumps(result_json, ensure_ascii=False)
+        with deadline.stage("search"):
+            response = await _search(query, mode, hedge_delay, deadline)
+
+        if not fetch_content:
+            return json.dumps(await run_io(_snippet_results, query, response.results), ensure_ascii=False)
+
+        with deadline.stage("fetch"):
+            contents = await _fetch_results_content(response.results, max_concurrency, fetch_deadline, deadline,
+                                                    on_progress)
+        return json.dumps(await run_io(_content_results, query, response.results, contents), ensure_ascii=False)
     except Exception as e:
         logger.error(f"搜索过程中发生异常: {e}", exc_info=True)
         return f"搜索失败: {str(e)}"
+    finally:
+        _report_search(query, deadline)
+
+async def _web_search_batch(queries: list[str], mode: str = SEARCH_MODE, fetch_content: bool = True,
+                            budget: float | None = BATCH_BUDGET) -> str:
+    """
+    并发执行多个查询，返回按查询分组的 JSON 结果
+
+    同时进行的搜索不超过 BATCH_SEARCH_CONCURRENCY 个，避免短时间内向搜索引擎发出过多请求；
+    每个查询的搜索完成后立即开始抓取其结果，多个查询返回的同一网页只抓取一次，
+    正文只出现在第一个返回它的查询中，之后的查询中该结果以 seen_in 指向第一个查询。
+    每个查询内的近似重复结果与单次搜索一样合并到 duplicates 中。
+    整个批次共享 budget 秒的时间预算。
+    """
+    queries = list(dict.fromkeys(query.strip() for query in queries if query and query.strip()))
+    if not queries:
+        return "[]"
+    if len(queries) > BATCH_MAX_QUERIES:
+        logger.warning(f"批量搜索最多 {BATCH_MAX_QUERIES} 个查询，忽略其余 {len(queries) - BATCH_MAX_QUERIES} 个")
+        queries = queries[:BATCH_MAX_QUERIES]
+
+    deadline = Deadline(budget)
+    search_semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+    fetch_semaphore = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+    # 按结果 id 共享的抓取任务，保证整个批次中每个网页只抓取一次
+    fetches: dict[str, asyncio.Task] = {}
+    # 所有抓取任务，包括各查询中推迟抓取的疑似转载
+    fetch_tasks: list[asyncio.Task] = []
+
+    async def fetch(result: SearchResult) -> FetchResult:
+        return await _fetch_result(result, fetch_semaphore, deadline)
+
+    async def run(query: str) -> tuple[SearchResponse, list[asyncio.Task], dict[int, int]]:
+        async with search_semaphore:
+            with deadline.stage("search"):
+                response = await _search(query, mode, HEDGE_DELAY, deadline)
+        tasks, deferred = [], {}
+        if fetch_content:
+            ids = await run_io(_result_ids, response.results)
+            tasks, deferred = _schedule_fetches(response.results, fetch, fetches, ids)
+            fetch_tasks.extend(task for task in tasks if task not in fetch_tasks)
+        return response, tasks, deferred
+
+    searches = [asyncio.create_task(run(query)) for query in queries]
+    try:
+        _, pending = await asyncio.wait(searches, timeout=deadline.cap(None))
+        for task in pending:
+            task.cancel()
+        if fetch_tasks:
+            with deadline.stage("fetch"):
+                _, pending_fetches = await asyncio.wait(fetch_tasks, timeout=deadline.cap(None))
+            for task in pending_fetches:
+                task.cancel()
+            if pending_fetches:
+                logger.warning(f"批量搜索超过时间预算，{len(pending_fetches)}/{len(fetch_tasks)} 个网页使用摘要代替")
+
+        groups = []
+        seen: dict[str, str] = {}
+        for query, search in zip(queries, searches):
+            if search in pending:
+                groups.append({"query": query, "error": "搜索超时"})
+                continue
+            if search.exception() is not None:
+                logger.error(f"批量搜索 {query!r} 失败: {search.exception()}")
+                groups.append({"query": query, "error": str(search.exception())})
+                continue
+            response, tasks, deferred = search.result()
+            results = response.results
+            if not results and response.error:
+                groups.append({"query": query, "error": response.error})
+                continue
+            if not fetch_content:
+                groups.append({"query": query, "results": await run_io(_snippet_results, query, results)})
+                continue
+            items = await run_io(_content_results, query, results, _collect_contents(results, tasks, deferred))
+            for item in items:
+                if item["id"] in seen:
+                    item.pop("content")
+                    item["seen_in"] = seen[item["id"]]
+                else:
+                    seen[item["id"]] = query
+            groups.append({"query": query, "results": items})
+        return json.dumps(groups, ensure_ascii=False)
+    except Exception as e:
+        logger.error(f"批量搜索过程中发生异常: {e}", exc_info=True)
+        return f"搜索失败: {str(e)}"
+    finally:
+        for task in [*searches, *fetch_tasks]:
+            task.cancel()
+        _report_search(queries, deadline)
+
+async def _search(query: str, mode: str, hedge_delay: float | None, deadline: Deadline) -> SearchResponse:
+    providers = get_health_registry().order(SEARCH_PROVIDERS)
+    if mode == "merge":
+        return await _search_merged(query, providers, MERGE_TIMEOUT, deadline)
+    response = await _search_providers(query, providers, hedge_delay, deadline)
+    # 同一引擎可能多次列出同一页面，只保留第一次出现的结果
+    response.results = await run_io(dedupe_results, response.results)
+    return response
+
+# 结果 id 的计算（解开跳转链接时查询跳转缓存）和结果存储的读写都是阻塞的 SQLite 操作，
+# 在异步流程中通过 run_io 调用下面这些函数
+
+def _result_ids(results: list[SearchResult]) -> list[str]:
+    return [make_result_id(result.url) for result in results]
+
+def _snippet_results(query: str, results: list[SearchResult]) -> list[dict]:
+    returned = {make_result_id(result.url): result for result in results}
+    _remember_results(query, returned)
+    return [
+        {"id": rid, "title": result.title, "url": result.url, "snippet": result.content}
+        for rid, result in returned.items()
+    ]
+
+def _content_results(query: str, results: list[SearchResult],
+                     contents: list[tuple[str | None, str, int | None]]) -> list[dict]:
+    """
+    由抓取结果生成返回的结果列表
+
+    contents 中每项为 (正文, URL, 重复的结果序号)，正文为空的结果使用摘要；近似重复的结果不单独返回，
+    而是以 id、标题和 URL 列在排名最靠前的那一份的 duplicates 中，仍可按 id 展开。
+    """
+    items = []
+    returned = {}
+    by_id: dict[str, dict] = {}
+    # 结果序号 -> 承载它的返回项
+    item_at: dict[int, dict] = {}
+    for index, (result, (content, url, duplicate_of)) in enumerate(zip(results, contents)):
+        # 推迟解析的跳转链接在抓取后才知道真实地址，此时再去重一次
+        rid = make_result_id(url)
+        if rid in returned:
+            item_at[index] = by_id[rid]
+            continue
+        returned[rid] = SearchResult(title=result.title, url=url, content=result.content)
+        primary = item_at.get(duplicate_of) if duplicate_of is not None else None
+        if primary is not None:
+            primary.setdefault("duplicates", []).append({"id": rid, "title": result.title, "url": url})
+            # 之后出现的同一 id 也归入该项
+            by_id[rid] = item_at[index] = primary
+            continue
+        item = {
+            "id": rid,
+            "title": result.title,
+            "url": url,
+            # 抓取失败（出错、超时或不是网页）时以搜索引擎返回的摘要代替
+            "content": truncate_content(content or result.content, RESULT_MAX_CHARS)
+        }
+        items.append(item)
+        by_id[rid] = item_at[index] = item
+    _remember_results(query, returned)
+    return items
+
+def _report_search(query: str | list[str], deadline: Deadline) -> None:
+    global _last_search_report
+    _last_search_report = {"query": query, **deadline.report()}
+    stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in _last_search_report["stages"].items())
+    if deadline.exhausted_by:
+        logger.warning(f"搜索 {query!r} 用完 {deadline.budget} 秒时间预算，耗尽于阶段: {deadline.exhausted_by} ({stages})")
+    else:
+        logger.info(f"搜索 {query!r} 耗时 {_last_search_report['elapsed']:.2f} 秒 ({stages})")
+
+def _remember_results(query: str, results: dict[str, SearchResult]) -> None:
+    # 保存已返回的结果，供之后按 id 展开
+    store = get_result_store()
+    if store is not None:
+        store.put(query, results)
+
+def _stored_result(result_id: str) -> SearchResult | None:
+    store = get_result_store()
+    return store.get(result_id) if store is not None else None
+
+async def _expand_search_result(result_id: str) -> str:
+    """按 id 抓取之前返回的搜索结果的网页正文，抓取失败时返回搜索摘要"""
+    result = await run_io(_stored_result, result_id.strip())
+    if result is None:
+        return f"未找到搜索结果 {result_id}，结果可能已过期，请重新搜索"
+
+    try:
+        content, final_url = await get_web_content_async(result.url, deadline=Deadline(SEARCH_BUDGET))
+    except Exception as e:
+        logger.error(f"获取网页内容失败: {e}", exc_info=True)
+        content, final_url = "", ""
+    return json.dumps({
+        "id": result.metadata["id"],
+        "title": result.title,
+        "url": final_url or result.url,
+        "content": content or result.content,
+        "expanded": bool(content),
+    }, ensure_ascii=False)
+
+async def _fetch_results_content(results: list[SearchResult], max_concurrency: int, fetch_deadline: float,
+                                 deadline: Deadline | None = None, on_progress: ProgressCallback | None = None
+                                 ) -> list[tuple[str | None, str, int | None]]:
+    """
+    并发抓取搜索结果的网页内容，返回 (内容, URL, 重复的结果序号) 列表
+
+    同时进行的抓取数量不超过 max_concurrency，所有抓取在 fetch_deadline 秒内且不超过
+    调用剩余的时间预算完成；超时未完成的结果会被取消，并以搜索引擎返回的摘要作为内容。
+    推迟解析的跳转链接在抓取时解析，返回的 URL 为真实地址。
+    摘要疑似转载的结果在第一份抓取成功后不再抓取（仅凭摘要判断，见 _schedule_fetches），
+    正文近似重复的结果标记为重复（见 dedup.py）。
+    各网页处理阶段的累计耗时记录在 deadline 中（如 fetch/extract）。
+    on_progress 在每个抓取任务完成时调用（见 _wait_with_progress）。
+    """
+    deadline = deadline or Deadline()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch(result: SearchResult) -> FetchResult:
+        return await _fetch_result(result, semaphore, deadline)
+
+    tasks, deferred = _schedule_fetches(results, fetch)
+    if not tasks:
+        return []
+    timeout = deadline.cap(fetch_deadline)
+    if on_progress is None:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    else:
+        pending = await _wait_with_progress(results, tasks, timeout, on_progress)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"网页抓取超过时限 {timeout:.1f} 秒，{len(pending)}/{len(tasks)} 个结果使用摘要代替")
+    return _collect_contents(results, tasks, deferred)
+
+async def _wait_with_progress(results: list[SearchResult], tasks: list[asyncio.Task], timeout: float | None,
+                              on_progress: ProgressCallback) -> set[asyncio.Task]:
+    """
+    与 asyncio.wait(tasks, timeout) 相同，但每个任务完成时调用 on_progress，返回未完成的任务
+
+    抓取成功、且正文与已传出的结果不近似重复时，结果以最终返回的格式随调用传出；
+    失败或重复时只报告进度。回调出错不影响搜索。
+    """
+    loop = asyncio.get_running_loop()
+    end = None if timeout is None else loop.time() + timeout
+    index_of = {task: index for index, task in enumerate(tasks)}
+    fingerprints = NearDuplicates()
+    pending = set(tasks)
+    completed = 0
+    await _notify(on_progress, 0, len(tasks), None)
+    while pending:
+        remaining = None if end is None else end - loop.time()
+        if remaining is not None and remaining <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for task in sorted(done, key=index_of.get):
+            completed += 1
+            item = None
+            if not task.cancelled() and task.exception() is None:
+                index = index_of[task]
+                content, url, fingerprint = task.result()
+                if content and fingerprints.add_sketch(index, fingerprint) is None:
+                    item = {
+                        "id": await run_io(make_result_id, url),
+                        "rank": index + 1,
+                        "title": results[index].title,
+                        "url": url,
+                        "content": truncate_content(content, RESULT_MAX_CHARS),
+                    }
+            await _notify(on_progress, completed, len(tasks), item)
+    return pending
+
+async def _notify(on_progress: ProgressCallback, completed: int, total: int, item: dict | None) -> None:
+    try:
+        await on_progress(completed, total, item)
+    except Exception as e:
+        logger.warning(f"发送搜索进度失败: {e}")
+
+def _schedule_fetches(results: list[SearchResult], fetch: Callable[[SearchResult], Awaitable[FetchResult]],
+                      shared: dict[str, asyncio.Task] | None = None, ids: list[str] | None = None
+                      ) -> tuple[list[asyncio.Task], dict[int, int]]:
+    """
+    为每个结果创建抓取任务，返回任务列表和 {推迟的结果序号: 它疑似转载的结果序号}
+
+    标题和摘要与前面某个结果近似重复的结果先不抓取，等那个结果抓取完成后，
+    成功则放弃抓取，失败才抓取。shared 为按结果 id 共享的任务表，已有任务的结果直接复用，
+    此时 ids 为各结果的 id（见 _result_ids）。
+
+    放弃抓取只依据标题和摘要的相似度（阈值 SNIPPET_THRESHOLD，比正文更保守），转载的正文
+    从不下载，也就无法与第一份比较：摘要相同而正文不同的结果会被误合并。这是有意的取舍，
+    正文比较需要先下载转载页，省不下抓取时间；已经下载的正文仍在 _collect_contents 中按正文比较。
+    """
+    snippets = snippet_duplicates()
+    tasks: list[asyncio.Task] = []
+    deferred: dict[int, int] = {}
+    for index, result in enumerate(results):
+        rid = ids[index] if shared is not None else None
+        if shared is not None and rid in shared:
+            tasks.append(shared[rid])
+            continue
+        primary = snippets.add(index, f"{result.title} {result.content}")
+        if primary is None:
+            task = asyncio.create_task(fetch(result))
+            if shared is not None:
+                shared[rid] = task
+        else:
+            # 推迟的任务只对本次查询有意义，不共享给其他查询
+            deferred[index] = primary
+            task = asyncio.create_task(_fetch_unless_duplicate(tasks[primary], result, fetch))
+        tasks.append(task)
+    return tasks, deferred
+
+async def _fetch_unless_duplicate(primary: asyncio.Task, result: SearchResult,
+                                  fetch: Callable[[SearchResult], Awaitable[FetchResult]]) -> FetchResult:
+    # 用 wait 而不是直接 await，本任务被取消时不会连带取消 primary
+    await asyncio.wait([primary])
+    if not primary.cancelled() and primary.exception() is None and primary.result()[0]:
+        return None, result.url, None
+    return await fetch(result)
+
+def _collect_contents(results: list[SearchResult], tasks: list[asyncio.Task],
+                      deferred: dict[int, int]) -> list[tuple[str | None, str, int | None]]:
+    """
+    Contents of finished fetch tasks in result order, marking near-duplicate pages by the index they repeat.
+
+    Only compares the sketches computed by the fetch tasks, so it is cheap enough for the event loop.
+    """
+    fingerprints = NearDuplicates()
+    contents = []
+    for index, (result, task) in enumerate(zip(results, tasks)):
+        if not task.done() or task.cancelled() or task.exception() is not None:
+            contents.append((result.content, result.url, None))
+            continue
+        content, url, fingerprint = task.result()
+        if content is None:
+            contents.append((None, url, deferred.get(index)))
+        else:
+            contents.append((content, url, fingerprints.add_sketch(index, fingerprint)))
+    duplicates = sum(1 for _, _, duplicate_of in contents if duplicate_of is not None)
+    if duplicates:
+        skipped = sum(1 for content, _, _ in contents if content is None)
+        logger.info(f"合并 {duplicates} 个近似重复的结果，其中 {skipped} 个未抓取")
+    return contents
+
+async def _fetch_result(result: SearchResult, semaphore: asyncio.Semaphore,
+                        deadline: Deadline) -> FetchResult:
+    async with semaphore:
+        timings = {}
+        try:
+            content, final_url = await get_web_content_async(result.url, timings=timings, deadline=deadline)
+        finally:
+            for stage, seconds in timings.items():
+                deadline.record(f"fetch/{stage}", seconds)
+    # 近似重复草图只计算一次，且只针对返回的部分；计算量与正文长度成正比，放到线程中执行
+    fingerprint = await run_io(content_sketch, content, RESULT_MAX_CHARS) if content else None
+    if final_url and is_redirect_link(result.url):
+        return content, final_url, fingerprint
+    return content, result.url, fingerprint
+
+# 每个搜索引擎复用同一个 WebSearch 实例（底层共享连接池）
+_searchers: dict[str, WebSearch] = {}
+
+def _search_provider(provider: str, query: str, deadline: Deadline | None = None) -> SearchResponse:
+    searcher = _searchers.get(provider)
+    if searcher is None:
+        config = SearchConfig(
+            provider=provider,
+            max_results=10,
+            timeout=10,
+            proxy=None
+        )
+        searcher = _searchers.setdefault(provider, WebSearch(config))
+    start = time.monotonic()
+    try:
+        return searcher.search(query, deadline)
+    finally:
+        if deadline is not None:
+            deadline.record(f"search/{provider}", time.monotonic() - start)
+
+async def _search_providers(query: str, providers: list[str], hedge_delay: float | None,
+                            deadline: Deadline | None = None) -> SearchResponse:
+    """
+    对冲式地调用多个搜索引擎，返回第一个非空的搜索结果
+
+    先启动首选引擎，若它在 hedge_delay 秒内没有返回、返回空结果或失败，则启动下一个引擎，
+    取最先返回非空结果的引擎，其余仍在进行的请求会被取消。
+    获胜引擎记录在返回结果的 metadata["engine"] 中。时间预算用完时停止等待。
+    """
+    deadline = deadline or Deadline()
+    pending_providers = list(providers)
+    running: dict[asyncio.Task, str] = {}
+    tried = []
+    fallback = None
+
+    def launch() -> None:
+        # 等待超时可能早于时间预算用完，此时已没有可启动的引擎
+        if not pending_providers:
+            return
+        provider = pending_providers.pop(0)
+        logger.info(f"使用搜索引擎: {provider}")
+        tried.append(provider)
+        running[asyncio.create_task(asyncio.to_thread(_search_provider, provider, query, deadline))] = provider
+
+    launch()
+    if hedge_delay is not None and hedge_delay <= 0:
+        while pending_providers:
+            launch()
+
+    try:
+        while running:
+            timeout = deadline.cap(hedge_delay if pending_providers else None)
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done and deadline.expired:
+                logger.warning(f"搜索引擎在时间预算内未返回结果: {', '.join(running.values())}")
+                break
+            if not done:
+                # 首选引擎响应过慢，启动下一个引擎进行对冲
+                launch()
+                continue
+
+            for task in done:
+                provider = running.pop(task)
+                if task.exception() is not None:
+                    logger.warning(f"搜索引擎 {provider} 请求失败: {task.exception()}")
+                    continue
+                response = task.result()
+                if len(response.results) > 0:
+                    response.metadata = {**(response.metadata or {}), "engine": provider, "engines_tried": tried}
+                    logger.info(f"搜索引擎 {provider} 返回 {len(response.results)} 条结果")
+                    return response
+                logger.warning(f"搜索引擎 {provider} 未返回结果")
+                fallback = response
+
+            # 已完成的引擎均失败，立即启动下一个引擎
+            if pending_providers and not deadline.expired:
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+
+    if fallback is None:
+        fallback = SearchResponse(results=[], error="All search providers failed")
+    fallback.metadata = {**(fallback.metadata or {}), "engine": None, "engines_tried": tried}
+    return fallback
+
+async def _search_merged(query: str, providers: list[str], timeout: float,
+                         deadline: Deadline | None = None) -> SearchResponse:
+    """
+    同时调用所有搜索引擎，按规范化 URL 去重并用倒数排名融合合并结果
+
+    在 timeout 秒（且不超过剩余时间预算）内未返回的引擎会被取消，不参与合并。
+    """
+    deadline = deadline or Deadline()
+    tasks = {
+        asyncio.create_task(asyncio.to_thread(_search_provider, provider, query, deadline)): provider
+        for provider in providers
+    }
+    timeout = deadline.cap(timeout)
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    responses = []
+    for task, provider in tasks.items():
+        if task in pending:
+            logger.warning(f"搜索引擎 {provider} 超过 {timeout:.1f} 秒未返回，不参与合并")
+        elif task.exception() is not None:
+            logger.warning(f"搜索引擎 {provider} 请求失败: {task.exception()}")
+        else:
+            responses.append((provider, task.result()))
+
+    response = await run_io(merge_responses, responses, max_results=MERGE_MAX_RESULTS)
+    response.metadata["engines_tried"] = list(providers)
+    if not response.results:
+        response.error = "All search providers failed"
+    logger.info(f"合并 {len(response.metadata['engines'])} 个搜索引擎的结果，共 {len(response.results)} 条")
+    return response
 
 def _fetch_web_content(url: str) -> str:
     if not url:
@@ -49,4 +567,97 @@ def _fetch_web_content(url: str) -> str:
         return content
     except Exception as e:
         logger.error(f"获取网页内容失败: {e}", exc_info=True)
-        return f"获取网页内容失败: {str(e)}"
\ No newline at end of file
+        return f"获取网页内容失败: {str(e)}"
+
+def _search_fetched_pages(query: str, max_results: int = 5, full_content: bool = False) -> str:
+    """在本地全文索引中检索已抓取过的网页，不发出网络请求"""
+    if not query or not query.strip():
+        return ""
+    index = get_page_index()
+    if index is None:
+        return "本地网页索引未启用"
+
+    pages = index.search(query, limit=max(1, min(max_results, 20)))
+    if not pages:
+        return f"本地索引中没有与 {query} 匹配的网页（已索引 {index.count()} 个网页），请使用 web_search 搜索"
+    return json.dumps([
+        {
+            "title": page["title"],
+            "url": page["url"],
+            "fetched_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(page["fetched_at"])),
+            "score": page["score"],
+            ("content" if full_content else "snippet"): (
+                truncate_content(page["content"], RESULT_MAX_CHARS) if full_content
+                else make_snippet(page["content"], query)
+            ),
+        }
+        for page in pages
+    ], ensure_ascii=False)
+
+async def _crawl_site(url: str, max_depth: int = 1, max_pages: int = 20, output_dir: str | None = None,
+                      path_prefix: str | None = None) -> str:
+    """
+    从 url 开始抓取同源网页
+
+    指定 output_dir 时每抓取完一个页面就写入该目录（Markdown 文件及 index.json 清单），
+    只返回清单；否则以 JSON 返回各页面的正文（按 RESULT_MAX_CHARS 截断）。
+    """
+    if not url or not url.startswith(("http://", "https://")):
+        return "只支持 HTTP/HTTPS 网址"
+
+    crawler = SiteCrawler(url, max_depth=max_depth, max_pages=max_pages, path_prefix=path_prefix or None)
+    manifest = []
+    on_page = None
+    if output_dir:
+        directory = Path(output_dir).expanduser()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            return f"无法创建目录 {directory}: {e}"
+
+        def on_page(page: CrawledPage) -> None:
+            path = directory / _corpus_file_name(len(manifest) + 1, page.url)
+            path.write_text(f"<!-- {page.url} -->\n{page.content}\n", encoding="utf-8")
+            manifest.append({"url": page.url, "title": page.title, "depth": page.depth, "file": path.name})
+
+    try:
+        pages = await crawler.run(on_page)
+    except Exception as e:
+        logger.error(f"抓取网站失败: {e}", exc_info=True)
+        return f"抓取网站失败: {str(e)}"
+    logger.info(f"抓取 {url} 完成: {len(pages)} 个页面，{len(crawler.failed)} 个失败")
+
+    if output_dir:
+        (directory / "index.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        return json.dumps({
+            "seed": url, "output_dir": str(directory), "pages": manifest, "failed": crawler.failed
+        }, ensure_ascii=False)
+    return json.dumps({
+        "seed": url,
+        "pages": [
+            {"url": page.url, "title": page.title, "depth": page.depth,
+             "content": truncate_content(page.content, RESULT_MAX_CHARS)}
+            for page in pages
+        ],
+        "failed": crawler.failed,
+    }, ensure_ascii=False)
+
+def _corpus_file_name(number: int, url: str) -> str:
+    slug = re.sub(r"[^\w.-]+", "-", url.split("://", 1)[-1].split("/", 1)[-1]).strip("-.")[:80]
+    return f"{number:03d}-{slug or 'index'}.md"
+
+def _search_engine_health() -> str:
+    registry = get_health_registry()
+    report = {
+        "order": registry.order(SEARCH_PROVIDERS),
+        "circuit_breaker": {"failures": CIRCUIT_FAILURES, "cooldown": CIRCUIT_COOLDOWN},
+        "engines": registry.snapshot(),
+        "available": get_engine_registry().names(),
+        "loaded": get_engine_registry().loaded(),
+        "last_search": _last_search_report,
+    }
+    return json.dumps(report, ensure_ascii=False, indent=2)
+
+def _http_pool_stats() -> str:
+    stats = {**pool_stats(), "politeness": get_host_scheduler().stats()}
+    return json.dumps(stats, ensure_ascii=False, indent=2)
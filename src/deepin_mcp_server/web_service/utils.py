@@ -2,6 +2,8 @@ import requests
 import os
 from pathlib import Path
 from urllib.parse import urlparse
+from .web_search.deadline import REQUEST_TIMEOUT
+from .web_search.http_pool import get_session
 
 def _download_file(url: str, download_dir: str = None) -> str:
     try:
@@ -24,14 +26,15 @@ def _download_file(url: str, download_dir: str = None) -> str:
             
         file_path = os.path.join(download_dir, filename)
         
-        # 下载文件
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        # 下载文件；超时针对连接和每次读取，不限制大文件的总下载时间。
+        # 响应必须关闭，否则连接不会归还给 pool_block=True 的共享连接池
+        with get_session().get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
                     
         return f"文件已成功下载到: {file_path}"
         
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
+import re
 import requests
-from bs4 import BeautifulSoup
 from .search_types import SearchResult, SearchEngineConfig, SearchResponse
+from .http_pool import get_session
+from .parsers import get_parser_backend
+from .redirects import DEFER_REDIRECTS, resolve_redirects
+from .deadline import REQUEST_TIMEOUT, RETRY_STATUSES, Deadline, RetryableStatus, retry_call
+from .politeness import get_host_scheduler
 import markdownify
 from readabilipy import simple_json
 from readability import Document
@@ -10,42 +15,97 @@ import json
 
 class BaseSearchEngine(ABC):
     """Base class for all search engines."""
+
+    # 引擎使用的 CSS 选择器，名称 -> 选择器，由解析后端预编译
+    SELECTORS: Dict[str, str] = {}
+    # 验证码/反爬页面的特征，匹配最终 URL 或页面标题
+    CAPTCHA_MARKERS: Tuple[str, ...] = ()
     
     def __init__(self, config: SearchEngineConfig):
         self.config = config
-        self.session = requests.Session()
-        if config.headers:
-            self.session.headers.update(config.headers)
+        # 所有引擎共享进程级连接池，请求头在每次请求时单独传入
+        self.session = get_session()
+        self.set_parser(config.parser)
+
+    def set_parser(self, name: Optional[str] = None) -> None:
+        """Switch the HTML parser backend and precompile this engine's selectors for it."""
+        self.parser = get_parser_backend(name)
+        self.selectors = self.parser.compile(self.SELECTORS)
     
     @abstractmethod
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
-        """Perform a search query."""
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
+        """Perform a search query within the optional deadline."""
     
         pass
     
-    def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
-        """Make an HTTP request with error handling."""
+    def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None,
+                      deadline: Optional[Deadline] = None) -> Union[str, SearchResponse]:
+        """
+        Make an HTTP request with error handling; returns an error SearchResponse for captcha pages.
+
+        Transient failures are retried while the deadline allows.
+        """
+        deadline = deadline or Deadline()
+
+        scheduler = get_host_scheduler()
+
+        def attempt():
+            with scheduler.slot(url, deadline):
+                response = self.session.get(
+                    url=url,
+                    headers=self.config.headers,
+                    params=params,
+                    timeout=deadline.timeout(self.config.timeout or REQUEST_TIMEOUT),
+                    proxies=self.config.proxy
+                )
+            scheduler.observe(url, response.status_code, response.headers)
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableStatus(response.status_code, url)
+            response.raise_for_status()
+            return response
+
         try:
-            response = self.session.get(
-                url=url, 
-                headers=self.config.headers,
-                params=params,
-                timeout=self.config.timeout,
-                proxies=self.config.proxy
-            )
+            response = retry_call(attempt, deadline)
             response.encoding = "utf-8"
-            response.raise_for_status()
+            if self._is_captcha(response.url, response.text):
+                return SearchResponse(
+                    results=[],
+                    metadata={"total_results": 0, "captcha": True},
+                    error="Captcha page returned"
+                )
             return response.text
-        except requests.RequestException as e:
+        except (requests.RequestException, RetryableStatus) as e:
             raise Exception(f"Request failed: {str(e)}")
+
+    _TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+    def _is_captcha(self, url: str, html: str) -> bool:
+        """Whether the response is a captcha/anti-bot page rather than a result page."""
+        if not self.CAPTCHA_MARKERS:
+            return False
+        match = self._TITLE.search(html, 0, 4096)
+        title = match.group(1) if match else ""
+        return any(marker in url or marker in title for marker in self.CAPTCHA_MARKERS)
     
-    def _parse_html(self, html: str) -> BeautifulSoup:
-        """Parse HTML content."""
-        return BeautifulSoup(html, 'html.parser')
+    def _parse_html(self, html: str) -> Any:
+        """Parse HTML content with the configured parser backend."""
+        return self.parser.parse(html)
+
+    def _select(self, node: Any, name: str) -> List[Any]:
+        """Select descendants of node with the precompiled selector name."""
+        return self.parser.select(node, self.selectors[name])
+
+    def _select_one(self, node: Any, name: str) -> Optional[Any]:
+        """Select the first descendant of node with the precompiled selector name."""
+        return self.parser.select_one(node, self.selectors[name])
     
-    def _extract_text(self, element: Any) -> str:
-        """Extract text from a BeautifulSoup element."""
-        return element.get_text(strip=True) if element else ""
+    def _extract_text(self, element: Any, strip: bool = True) -> str:
+        """Extract text from a parsed element."""
+        return self.parser.text(element, strip) if element is not None else ""
+
+    def _get_attr(self, element: Any, name: str) -> str:
+        """Get an attribute of a parsed element."""
+        return self.parser.attr(element, name) if element is not None else ""
     
     def _clean_url(self, url: str) -> str:
         """Clean and normalize URLs."""
@@ -59,6 +119,29 @@ class BaseSearchEngine(ABC):
             content=content.strip()
         )
     
+    def _resolve_redirects(self, results: List[SearchResult],
+                           deadline: Optional[Deadline] = None) -> List[SearchResult]:
+        """
+        Replace redirect links in results with their targets, unless resolution is deferred.
+
+        Results that turn out to point at the same page are collapsed into the first one.
+        """
+        defer = self.config.defer_redirects
+        if defer is None:
+            defer = DEFER_REDIRECTS
+        if defer or not results:
+            return results
+        targets = resolve_redirects((result.url for result in results), deadline)
+        unique = []
+        seen = set()
+        for result in results:
+            result.url = targets.get(result.url, result.url)
+            if result.url in seen:
+                continue
+            seen.add(result.url)
+            unique.append(result)
+        return unique
+    
     def get_web_content(self, url: str) -> str:
         """Get the web content of a given URL."""
         from .util import get_web_content
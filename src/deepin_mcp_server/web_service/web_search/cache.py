@@ -0,0 +1,482 @@
+"""
+Persistent caches for the web search pipeline.
+
+缓存保存在 SQLite 数据库中（默认 ~/.local/share/deepin-mcp-server/web_cache.db），
+服务重启后依然有效。数据库不可用时缓存自动失效，不影响搜索本身。
+
+搜索结果缓存可通过环境变量配置：
+    DEEPIN_MCP_SEARCH_CACHE              设为 0 时禁用搜索结果缓存 (默认 1)
+    DEEPIN_MCP_SEARCH_CACHE_TTL          结果新鲜期，单位秒 (默认 3600)
+    DEEPIN_MCP_SEARCH_CACHE_STALE        过期后仍可返回旧结果并后台刷新的时间，单位秒 (默认 86400)
+    DEEPIN_MCP_SEARCH_CACHE_MAX_ENTRIES  最多保存的查询数，超出后按最近最少使用淘汰 (默认 2000)
+
+网页内容缓存可通过环境变量配置：
+    DEEPIN_MCP_CONTENT_CACHE             设为 0 时禁用网页内容缓存 (默认 1)
+    DEEPIN_MCP_CONTENT_CACHE_TTL         在此时间内直接使用缓存，不做条件请求，单位秒 (默认 600)
+    DEEPIN_MCP_CONTENT_CACHE_MAX_AGE     条目最长保存时间，单位秒 (默认 604800)
+    DEEPIN_MCP_CONTENT_CACHE_MAX_BYTES   缓存总大小上限，单位字节 (默认 209715200)
+
+搜索引擎跳转链接缓存可通过环境变量配置：
+    DEEPIN_MCP_REDIRECT_CACHE_TTL          跳转目标的有效期，单位秒 (默认 604800)
+    DEEPIN_MCP_REDIRECT_CACHE_MAX_ENTRIES  最多保存的跳转链接数 (默认 20000)
+
+已返回的搜索结果（供按结果 ID 展开）可通过环境变量配置：
+    DEEPIN_MCP_RESULT_STORE_TTL          结果 ID 的有效期，单位秒 (默认 604800)
+    DEEPIN_MCP_RESULT_STORE_MAX_ENTRIES  最多保存的结果数 (默认 5000)
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .search_types import SearchResponse, SearchResult
+from .settings import DATA_DIR, env_bool, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = DATA_DIR / "web_cache.db"
+
+SEARCH_CACHE_ENABLED = env_bool("DEEPIN_MCP_SEARCH_CACHE", True)
+SEARCH_CACHE_TTL = env_float("DEEPIN_MCP_SEARCH_CACHE_TTL", 3600)
+SEARCH_CACHE_STALE = env_float("DEEPIN_MCP_SEARCH_CACHE_STALE", 86400)
+SEARCH_CACHE_MAX_ENTRIES = env_int("DEEPIN_MCP_SEARCH_CACHE_MAX_ENTRIES", 2000)
+
+CONTENT_CACHE_ENABLED = env_bool("DEEPIN_MCP_CONTENT_CACHE", True)
+CONTENT_CACHE_TTL = env_float("DEEPIN_MCP_CONTENT_CACHE_TTL", 600)
+CONTENT_CACHE_MAX_AGE = env_float("DEEPIN_MCP_CONTENT_CACHE_MAX_AGE", 7 * 86400)
+CONTENT_CACHE_MAX_BYTES = env_int("DEEPIN_MCP_CONTENT_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+
+REDIRECT_CACHE_TTL = env_float("DEEPIN_MCP_REDIRECT_CACHE_TTL", 7 * 86400)
+REDIRECT_CACHE_MAX_ENTRIES = env_int("DEEPIN_MCP_REDIRECT_CACHE_MAX_ENTRIES", 20000)
+
+RESULT_STORE_TTL = env_float("DEEPIN_MCP_RESULT_STORE_TTL", 7 * 86400)
+RESULT_STORE_MAX_ENTRIES = env_int("DEEPIN_MCP_RESULT_STORE_MAX_ENTRIES", 5000)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SqliteStore:
+    """Thread-safe wrapper around a shared SQLite connection."""
+
+    def __init__(self, db_path: Path, schema: str):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(schema)
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning(f"缓存数据库不可用，禁用缓存: {self.db_path}: {e}")
+
+    @property
+    def available(self) -> bool:
+        return self._conn is not None
+
+    def execute(self, sql: str, params: tuple = ()) -> list:
+        """Run a statement and return all rows; errors are logged and yield []."""
+        if self._conn is None:
+            return []
+        try:
+            with self._lock:
+                return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"缓存数据库操作失败: {e}")
+            return []
+
+    def execute_batch(self, statements: list) -> bool:
+        """Run (sql, params) statements in one transaction; on error it is rolled back, logged and False returned."""
+        if self._conn is None:
+            return False
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+                return True
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.warning(f"缓存数据库操作失败: {e}")
+                return False
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry."""
+    query = unicodedata.normalize("NFKC", query)
+    return _WHITESPACE.sub(" ", query).strip().lower()
+
+
+def _dump_response(response: SearchResponse) -> str:
+    return json.dumps(asdict(response), ensure_ascii=False)
+
+
+def _load_response(payload: str) -> SearchResponse:
+    data = json.loads(payload)
+    data["results"] = [SearchResult(**result) for result in data.get("results", [])]
+    return SearchResponse(**data)
+
+
+class SearchCache:
+    """
+    TTL + LRU cache of search engine responses.
+
+    Entries younger than ttl are fresh. Entries older than ttl but younger than
+    ttl + stale are returned as stale so the caller can serve them immediately
+    and revalidate in the background.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_cache (
+            cache_key TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at);
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 stale: float = SEARCH_CACHE_STALE, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.store = SqliteStore(db_path, self.SCHEMA)
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, provider: str, max_results: int) -> str:
+        return f"{provider.lower()}\x1f{max_results}\x1f{normalize_query(query)}"
+
+    def get(self, key: str) -> Optional[Tuple[SearchResponse, bool]]:
+        """Return (response, is_fresh), or None on a miss or an expired entry."""
+        rows = self.store.execute(
+            "SELECT payload, created_at FROM search_cache WHERE cache_key = ?", (key,)
+        )
+        if not rows:
+            return None
+        payload, created_at = rows[0]
+        now = time.time()
+        age = now - created_at
+        if age > self.ttl + self.stale:
+            self.store.execute("DELETE FROM search_cache WHERE cache_key = ?", (key,))
+            return None
+        self.store.execute("UPDATE search_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+        try:
+            return _load_response(payload), age <= self.ttl
+        except (ValueError, TypeError) as e:
+            logger.warning(f"搜索缓存条目损坏，已丢弃: {e}")
+            self.store.execute("DELETE FROM search_cache WHERE cache_key = ?", (key,))
+            return None
+
+    def put(self, key: str, response: SearchResponse) -> None:
+        now = time.time()
+        self.store.execute(
+            "INSERT OR REPLACE INTO search_cache (cache_key, payload, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, _dump_response(response), now, now)
+        )
+        self.store.execute(
+            "DELETE FROM search_cache WHERE cache_key IN ("
+            "SELECT cache_key FROM search_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim a background refresh for key; False if one is already running."""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: str) -> None:
+        with self._refresh_lock:
+            self._refreshing.discard(key)
+
+
+@dataclass
+class CachedPage:
+    """A fetched page with its extracted content, the extractor that produced it and HTTP validators."""
+    final_url: str
+    body: bytes
+    content: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    fresh: bool
+    extractor: Optional[str] = None
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ContentCache:
+    """
+    Cache of fetched pages keyed by final URL.
+
+    Requested URLs are mapped to the final URL after redirects, so a lookup by
+    either hits the same entry. Entries younger than ttl are served without any
+    request; older entries are revalidated with ETag / Last-Modified. The raw
+    body is kept, so content for another extractor can be re-extracted from it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS page_cache (
+            final_url TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            content TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            extractor TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache(accessed_at);
+        CREATE TABLE IF NOT EXISTS page_alias (
+            url TEXT PRIMARY KEY,
+            final_url TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, ttl: float = CONTENT_CACHE_TTL,
+                 max_age: float = CONTENT_CACHE_MAX_AGE, max_bytes: int = CONTENT_CACHE_MAX_BYTES):
+        self.store = SqliteStore(db_path, self.SCHEMA)
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        alias = self.store.execute("SELECT final_url FROM page_alias WHERE url = ?", (url,))
+        final_url = alias[0][0] if alias else url
+        rows = self.store.execute(
+            "SELECT final_url, body, content, etag, last_modified, fetched_at, extractor "
+            "FROM page_cache WHERE final_url = ?",
+            (final_url,)
+        )
+        if not rows:
+            return None
+        final_url, body, content, etag, last_modified, fetched_at, extractor = rows[0]
+        age = time.time() - fetched_at
+        if age > self.max_age:
+            self._delete(final_url)
+            return None
+        self.store.execute("UPDATE page_cache SET accessed_at = ? WHERE final_url = ?", (time.time(), final_url))
+        return CachedPage(final_url, body, content, etag, last_modified, fetched_at, age <= self.ttl, extractor)
+
+    def put(self, url: str, final_url: str, body: bytes, content: Optional[str],
+            etag: Optional[str], last_modified: Optional[str], extractor: Optional[str] = None) -> None:
+        now = time.time()
+        size = len(body) + len((content or "").encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self.store.execute(
+            "INSERT OR REPLACE INTO page_cache "
+            "(final_url, body, content, etag, last_modified, size, fetched_at, accessed_at, extractor) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (final_url, body, content, etag, last_modified, size, now, now, extractor)
+        )
+        if url != final_url:
+            self.store.execute(
+                "INSERT OR REPLACE INTO page_alias (url, final_url) VALUES (?, ?)", (url, final_url)
+            )
+        self._evict()
+
+    def touch(self, page: CachedPage) -> None:
+        """Mark a page as revalidated (e.g. after a 304 Not Modified)."""
+        now = time.time()
+        self.store.execute(
+            "UPDATE page_cache SET fetched_at = ?, accessed_at = ? WHERE final_url = ?",
+            (now, now, page.final_url)
+        )
+
+    def replace_content(self, page: CachedPage, content: Optional[str], extractor: str) -> None:
+        """Store content re-extracted from a cached page's body with another extractor."""
+        size = len(page.body) + len((content or "").encode("utf-8"))
+        self.store.execute(
+            "UPDATE page_cache SET content = ?, extractor = ?, size = ? WHERE final_url = ?",
+            (content, extractor, size, page.final_url)
+        )
+
+    def _delete(self, final_url: str) -> None:
+        self.store.execute("DELETE FROM page_cache WHERE final_url = ?", (final_url,))
+        self.store.execute("DELETE FROM page_alias WHERE final_url = ?", (final_url,))
+
+    def _evict(self) -> None:
+        self.store.execute("DELETE FROM page_cache WHERE fetched_at < ?", (time.time() - self.max_age,))
+        rows = self.store.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache")
+        total = rows[0][0] if rows else 0
+        if total > self.max_bytes:
+            # 按最近最少使用淘汰，直到总大小回到上限以内
+            for final_url, size in self.store.execute(
+                "SELECT final_url, size FROM page_cache ORDER BY accessed_at ASC"
+            ):
+                self.store.execute("DELETE FROM page_cache WHERE final_url = ?", (final_url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self.store.execute(
+            "DELETE FROM page_alias WHERE final_url NOT IN (SELECT final_url FROM page_cache)"
+        )
+
+
+class RedirectCache:
+    """Persistent mapping of search engine redirect links to their targets."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS redirect_cache (
+            url TEXT PRIMARY KEY,
+            target TEXT NOT NULL,
+            resolved_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_redirect_cache_resolved ON redirect_cache(resolved_at);
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, ttl: float = REDIRECT_CACHE_TTL,
+                 max_entries: int = REDIRECT_CACHE_MAX_ENTRIES):
+        self.store = SqliteStore(db_path, self.SCHEMA)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, url: str) -> Optional[str]:
+        rows = self.store.execute(
+            "SELECT target FROM redirect_cache WHERE url = ? AND resolved_at >= ?",
+            (url, time.time() - self.ttl)
+        )
+        return rows[0][0] if rows else None
+
+    def put(self, url: str, target: str) -> None:
+        self.store.execute(
+            "INSERT OR REPLACE INTO redirect_cache (url, target, resolved_at) VALUES (?, ?, ?)",
+            (url, target, time.time())
+        )
+        self.store.execute(
+            "DELETE FROM redirect_cache WHERE url IN ("
+            "SELECT url FROM redirect_cache ORDER BY resolved_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+
+class ResultStore:
+    """Search results handed out by ID, so a single result can be expanded later."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_results (
+            result_id TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT NOT NULL,
+            snippet TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_results_created ON search_results(created_at);
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, ttl: float = RESULT_STORE_TTL,
+                 max_entries: int = RESULT_STORE_MAX_ENTRIES):
+        self.store = SqliteStore(db_path, self.SCHEMA)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, result_id: str) -> Optional[SearchResult]:
+        rows = self.store.execute(
+            "SELECT query, title, url, snippet FROM search_results WHERE result_id = ? AND created_at >= ?",
+            (result_id, time.time() - self.ttl)
+        )
+        if not rows:
+            return None
+        query, title, url, snippet = rows[0]
+        return SearchResult(title=title, url=url, content=snippet, metadata={"id": result_id, "query": query})
+
+    def put(self, query: str, results: Dict[str, SearchResult]) -> None:
+        """Save results keyed by their result IDs."""
+        now = time.time()
+        for result_id, result in results.items():
+            self.store.execute(
+                "INSERT OR REPLACE INTO search_results (result_id, query, title, url, snippet, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (result_id, query, result.title, result.url, result.content, now)
+            )
+        self.store.execute(
+            "DELETE FROM search_results WHERE result_id IN ("
+            "SELECT result_id FROM search_results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Get the process-wide search cache, or None when it is disabled or unavailable."""
+    global _search_cache
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache()
+    return _search_cache if _search_cache.store.available else None
+
+
+_content_cache: Optional[ContentCache] = None
+_content_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> Optional[ContentCache]:
+    """Get the process-wide page content cache, or None when it is disabled or unavailable."""
+    global _content_cache
+    if not CONTENT_CACHE_ENABLED:
+        return None
+    if _content_cache is None:
+        with _content_cache_lock:
+            if _content_cache is None:
+                _content_cache = ContentCache()
+    return _content_cache if _content_cache.store.available else None
+
+
+_redirect_cache: Optional[RedirectCache] = None
+_redirect_cache_lock = threading.Lock()
+
+
+def get_redirect_cache() -> Optional[RedirectCache]:
+    """Get the process-wide redirect cache, or None when it is unavailable."""
+    global _redirect_cache
+    if _redirect_cache is None:
+        with _redirect_cache_lock:
+            if _redirect_cache is None:
+                _redirect_cache = RedirectCache()
+    return _redirect_cache if _redirect_cache.store.available else None
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """Get the process-wide store of returned search results, or None when it is unavailable."""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                _result_store = ResultStore()
+    return _result_store if _result_store.store.available else None
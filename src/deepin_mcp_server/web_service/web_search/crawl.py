@@ -0,0 +1,144 @@
+"""
+Bounded concurrent crawler over the page fetching pipeline.
+
+从种子 URL 出发按广度优先抓取同源（协议、主机、端口相同）的链接，直到达到深度或页面数上限。
+每个页面都经过 get_web_content_async（共享连接池、按主机限速、内容缓存、正文提取和本地索引），
+同时抓取的页面数有上限，整个抓取共享一个时间预算。每抓取完一个页面就交给回调，
+调用方可以边抓取边处理（如写入语料目录）。
+
+可通过环境变量配置：
+    DEEPIN_MCP_CRAWL_CONCURRENCY  同时抓取的页面数 (默认 4)
+    DEEPIN_MCP_CRAWL_MAX_PAGES    单次抓取的页面数上限 (默认 200)
+    DEEPIN_MCP_CRAWL_BUDGET       单次抓取的总时间预算，单位秒 (默认 120)
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from urllib.parse import urldefrag, urlparse
+
+from .deadline import Deadline
+from .settings import env_float, env_int
+from .util import get_web_content_async
+
+logger = logging.getLogger(__name__)
+
+CRAWL_CONCURRENCY = env_int("DEEPIN_MCP_CRAWL_CONCURRENCY", 4)
+CRAWL_MAX_PAGES = env_int("DEEPIN_MCP_CRAWL_MAX_PAGES", 200)
+CRAWL_BUDGET = env_float("DEEPIN_MCP_CRAWL_BUDGET", 120)
+
+# 明显不是网页的链接，不必请求
+_SKIP_EXTENSIONS = re.compile(
+    r"\.(png|jpe?g|gif|svg|webp|ico|bmp|pdf|zip|gz|tgz|bz2|xz|7z|rar|tar|exe|msi|deb|rpm|dmg|iso|apk"
+    r"|mp3|mp4|avi|mov|mkv|webm|woff2?|ttf|otf|eot|css|js|wasm)$",
+    re.IGNORECASE
+)
+_HEADING = re.compile(r"^#+\s*(.+)$", re.MULTILINE)
+
+
+@dataclass
+class CrawledPage:
+    """One page of a crawl."""
+    url: str
+    depth: int
+    content: str
+    title: str = ""
+
+
+def _origin(url: str) -> tuple:
+    parsed = urlparse(url)
+    port = parsed.port or {"http": 80, "https": 443}.get(parsed.scheme)
+    return parsed.scheme, (parsed.hostname or "").lower(), port
+
+
+def _title_of(content: str, url: str) -> str:
+    match = _HEADING.search(content or "")
+    return match.group(1).strip() if match else url
+
+
+class SiteCrawler:
+    """Breadth-first crawl of same-origin links from a seed URL."""
+
+    def __init__(self, seed: str, max_depth: int = 2, max_pages: int = 20,
+                 concurrency: int = CRAWL_CONCURRENCY, path_prefix: Optional[str] = None,
+                 deadline: Optional[Deadline] = None):
+        self.seed = urldefrag(seed.strip())[0]
+        self.max_depth = max(0, max_depth)
+        self.max_pages = max(1, min(max_pages, CRAWL_MAX_PAGES))
+        self.concurrency = max(1, concurrency)
+        self.origins = {_origin(self.seed)}
+        self.path_prefix = path_prefix
+        self.deadline = deadline or Deadline(CRAWL_BUDGET)
+        self.pages: List[CrawledPage] = []
+        self.failed: List[str] = []
+        # 已加入队列的链接和已返回页面的最终 URL
+        self._seen = {self.seed}
+        self._fetched = set()
+        self._scheduled = 0
+
+    def _in_scope(self, url: str) -> bool:
+        if _origin(url) not in self.origins or _SKIP_EXTENSIONS.search(urlparse(url).path):
+            return False
+        return self.path_prefix is None or urlparse(url).path.startswith(self.path_prefix)
+
+    def _enqueue(self, queue: asyncio.Queue, url: str, depth: int) -> None:
+        if self._scheduled >= self.max_pages:
+            return
+        self._scheduled += 1
+        queue.put_nowait((url, depth))
+
+    async def run(self, on_page: Optional[Callable[[CrawledPage], None]] = None) -> List[CrawledPage]:
+        """Crawl until the depth, page or time limit is reached; on_page is called as each page arrives."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._enqueue(queue, self.seed, 0)
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    await self._visit(queue, url, depth, on_page)
+                except Exception as e:
+                    logger.warning(f"抓取 {url} 失败: {e}")
+                    self.failed.append(url)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.wait_for(queue.join(), timeout=self.deadline.cap(None))
+        except asyncio.TimeoutError:
+            logger.warning(f"抓取 {self.seed} 超过时间预算，已抓取 {len(self.pages)} 个页面")
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.pages
+
+    async def _visit(self, queue: asyncio.Queue, url: str, depth: int,
+                     on_page: Optional[Callable[[CrawledPage], None]]) -> None:
+        links: List[str] = []
+        content, final_url = await get_web_content_async(url, deadline=self.deadline, links=links)
+        if not content:
+            self.failed.append(url)
+            return
+        final_url = urldefrag(final_url or url)[0]
+        # 多个链接跳转到同一页面时只返回一次
+        if final_url in self._fetched:
+            return
+        self._fetched.add(final_url)
+        self._seen.add(final_url)
+        if depth == 0:
+            # 种子跳转到其他源（如 http -> https、加 www）时，以跳转后的源为准
+            self.origins.add(_origin(final_url))
+
+        page = CrawledPage(final_url, depth, content, _title_of(content, final_url))
+        if depth < self.max_depth:
+            for link in links:
+                if link not in self._seen and self._in_scope(link):
+                    self._seen.add(link)
+                    self._enqueue(queue, link, depth + 1)
+        self.pages.append(page)
+        if on_page is not None:
+            on_page(page)
@@ -0,0 +1,167 @@
+"""
+Per-call deadlines and retries for the search pipeline.
+
+一次 web_search 调用创建一个 Deadline，并传递给搜索引擎请求、跳转链接解析和网页抓取：
+    - 每个网络请求的超时取默认超时与剩余时间中的较小值，时间用完后不再发起新请求
+    - 可重试的失败（连接错误、超时、429/5xx）在剩余时间允许时按带抖动的指数退避重试
+    - 记录各阶段耗时，以及耗尽时间的阶段，便于排查慢查询
+
+可通过环境变量配置：
+    DEEPIN_MCP_SEARCH_BUDGET    单次 web_search 的总时间预算，单位秒 (默认 30)
+    DEEPIN_MCP_RETRY_ATTEMPTS   每个请求最多尝试的次数，1 表示不重试 (默认 2)
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+import requests
+
+from .settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BUDGET = env_float("DEEPIN_MCP_SEARCH_BUDGET", 30)
+RETRY_ATTEMPTS = env_int("DEEPIN_MCP_RETRY_ATTEMPTS", 2)
+# 单个请求的默认超时（秒）
+REQUEST_TIMEOUT = 10
+RETRY_BASE_DELAY = 0.3
+RETRY_MAX_DELAY = 3.0
+# 剩余时间不足该值（秒）时不再重试
+MIN_ATTEMPT_TIME = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget of the call is used up."""
+
+
+class RetryableStatus(Exception):
+    """A response status worth retrying (429 or 5xx)."""
+
+    def __init__(self, status_code: int, url: str = ""):
+        super().__init__(f"HTTP {status_code} {url}".strip())
+        self.status_code = status_code
+
+
+class Deadline:
+    """Time budget of one call, shared by every stage and request it makes; budget=None means unlimited."""
+
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires_at = None if budget is None else self.started + budget
+        self.stages: Dict[str, float] = {}
+        self.exhausted_by: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when the budget is unlimited."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, default: float) -> float:
+        """Timeout for the next request: default capped by the remaining budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise DeadlineExceeded("search time budget exhausted")
+        return min(default, remaining)
+
+    def cap(self, seconds: Optional[float]) -> Optional[float]:
+        """seconds capped by the remaining budget, for asyncio/futures waits (None means no limit)."""
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        return remaining if seconds is None else min(seconds, remaining)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of the call; the first stage to end after the budget ran out is blamed for it."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start)
+            if self.expired and self.exhausted_by is None:
+                self.exhausted_by = name
+
+    def report(self) -> Dict[str, Any]:
+        remaining = self.remaining()
+        with self._lock:
+            stages = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+        return {
+            "budget": self.budget,
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "remaining": None if remaining is None else round(remaining, 3),
+            "stages": stages,
+            "exhausted_by": self.exhausted_by,
+        }
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transient network failures and 429/5xx responses are retried; everything else is not."""
+    if isinstance(error, RetryableStatus):
+        return True
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError))
+
+
+def _retry_delay(error: Exception, attempt: int, attempts: int, deadline: Optional[Deadline]) -> Optional[float]:
+    """Backoff before the next attempt, or None when the error should be raised instead."""
+    if attempt + 1 >= attempts or not is_retryable(error):
+        return None
+    # 全抖动：在 [0, base * 2^n] 中随机等待，避免并发请求同时重试
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is not None and remaining < delay + MIN_ATTEMPT_TIME:
+        return None
+    logger.info(f"请求失败，{delay:.2f} 秒后重试 ({attempt + 1}/{attempts - 1}): {error}")
+    return delay
+
+
+def retry_call(func: Callable[[], T], deadline: Optional[Deadline] = None,
+               attempts: int = RETRY_ATTEMPTS) -> T:
+    """Call func, retrying transient failures with jittered backoff while the deadline allows."""
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception as e:
+            delay = _retry_delay(e, attempt, attempts, deadline)
+            if delay is None:
+                raise
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def retry_async(func: Callable[[], Awaitable[T]], deadline: Optional[Deadline] = None,
+                      attempts: int = RETRY_ATTEMPTS) -> T:
+    """Async variant of retry_call."""
+    for attempt in range(attempts):
+        try:
+            return await func()
+        except Exception as e:
+            delay = _retry_delay(e, attempt, attempts, deadline)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
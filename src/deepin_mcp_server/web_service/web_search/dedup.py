@@ -0,0 +1,103 @@
+"""
+Near-duplicate detection for search results.
+
+中文搜索结果常常是同一篇文章被多个网站转载，抓取每一份既浪费时间也浪费返回的字节数。
+这里用 MinHash（bottom-k 草图）估计两段文本字符 n-gram 集合的 Jaccard 相似度：
+    - 抓取前比较结果页的标题和摘要，疑似转载的结果等第一份抓取完成后再决定：
+      第一份成功时不再抓取，失败时才抓取转载。这一步只凭摘要判断，转载的正文不会下载比较，
+      摘要相同而正文不同的结果也会被合并；要比较正文就必须先下载，无法节省抓取
+    - 抓取后比较提取出的正文，近似重复的结果合并到排名最靠前的那一份；
+      每个网页的草图在抓取它的任务中计算一次（只计算返回的前 RESULT_MAX_CHARS 个字符），
+      之后的比较只用草图
+
+草图使用进程内的字符串哈希，只在同一次调用内比较，不做持久化。
+
+可通过环境变量配置：
+    DEEPIN_MCP_NEAR_DUPLICATES         设为 0 时关闭近似重复检测 (默认 1)
+    DEEPIN_MCP_DUPLICATE_THRESHOLD     正文相似度达到该值视为重复，0-1 (默认 0.7)
+"""
+
+import heapq
+import re
+from typing import Dict, Hashable, List, Optional
+
+from .settings import env_bool, env_float
+
+NEAR_DUPLICATES_ENABLED = env_bool("DEEPIN_MCP_NEAR_DUPLICATES", True)
+DUPLICATE_THRESHOLD = min(1.0, env_float("DEEPIN_MCP_DUPLICATE_THRESHOLD", 0.7))
+# 只凭摘要判断时更保守
+SNIPPET_THRESHOLD = 0.8
+# 草图大小：保留的最小哈希值个数
+SKETCH_SIZE = 128
+# 正文和摘要的 n-gram 长度（字符数，去除空白和标点之后）
+CONTENT_SHINGLE = 5
+SNIPPET_SHINGLE = 3
+# 短于该字符数的文本信息太少，不参与比较
+MIN_CONTENT_CHARS = 200
+MIN_SNIPPET_CHARS = 30
+
+_NON_WORD = re.compile(r"\W+")
+
+
+def sketch(text: str, shingle: int, size: int = SKETCH_SIZE) -> List[int]:
+    """Bottom-k MinHash sketch of the character shingles of text, ignoring case, spaces and punctuation."""
+    text = _NON_WORD.sub("", text.lower())
+    shingles = {text[i:i + shingle] for i in range(max(1, len(text) - shingle + 1))}
+    return sorted(heapq.nsmallest(size, map(hash, shingles)))
+
+
+def similarity(a: List[int], b: List[int], size: int = SKETCH_SIZE) -> float:
+    """Estimated Jaccard similarity of the sets behind two sketches."""
+    if not a or not b:
+        return 0.0
+    sa, sb = set(a), set(b)
+    union = heapq.nsmallest(size, sa | sb)
+    return sum(1 for h in union if h in sa and h in sb) / len(union)
+
+
+class NearDuplicates:
+    """Sketches of the texts seen so far in one call; reports which earlier text a new one duplicates."""
+
+    def __init__(self, shingle: int = CONTENT_SHINGLE, threshold: float = DUPLICATE_THRESHOLD,
+                 min_chars: int = MIN_CONTENT_CHARS):
+        self.shingle = shingle
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self._sketches: Dict[Hashable, List[int]] = {}
+
+    def sketch(self, text: Optional[str]) -> Optional[List[int]]:
+        """Sketch of text for add_sketch, or None when text is shorter than min_chars or detection is off."""
+        if not NEAR_DUPLICATES_ENABLED or not text or len(text) < self.min_chars:
+            return None
+        return sketch(text, self.shingle)
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """
+        Return the key of an earlier near-duplicate of text, or register text under key and return None.
+
+        Texts shorter than min_chars are never reported or registered.
+        """
+        return self.add_sketch(key, self.sketch(text))
+
+    def add_sketch(self, key: Hashable, new: Optional[List[int]]) -> Optional[Hashable]:
+        """Like add, for a sketch computed beforehand with sketch (e.g. in a worker thread); None is ignored."""
+        if new is None:
+            return None
+        best, best_score = None, self.threshold
+        for other, existing in self._sketches.items():
+            score = similarity(new, existing)
+            if score >= best_score:
+                best, best_score = other, score
+        if best is None:
+            self._sketches[key] = new
+        return best
+
+
+def content_sketch(text: Optional[str], max_chars: Optional[int] = None) -> Optional[List[int]]:
+    """Sketch of a page's content (or of its first max_chars characters) for NearDuplicates.add_sketch."""
+    return NearDuplicates().sketch(text[:max_chars] if text and max_chars else text)
+
+
+def snippet_duplicates() -> NearDuplicates:
+    """A NearDuplicates tuned for result-page titles and snippets."""
+    return NearDuplicates(SNIPPET_SHINGLE, SNIPPET_THRESHOLD, MIN_SNIPPET_CHARS)
@@ -1,11 +1,22 @@
 from typing import List, Dict, Any, Optional
 from ..base import BaseSearchEngine
 from ..search_types import SearchResult, SearchResponse, SearchEngineConfig
+from ..deadline import Deadline
 import re
 from urllib.parse import quote
 
 class BaiduSearchEngine(BaseSearchEngine):
     """Baidu Search Engine implementation."""
+
+    SELECTORS = {
+        "container": "div#content_left",
+        "result": "div#content_left > .c-container",
+        "title": "h3",
+        "link": "a",
+        "abstract": "div.c-abstract",
+        "first_div": "div",
+    }
+    CAPTCHA_MARKERS = ("wappass.baidu.com", "百度安全验证")
     
     def __init__(self, config: Optional[SearchEngineConfig] = None):
         super().__init__(config or SearchEngineConfig(
@@ -21,7 +32,7 @@ class BaiduSearchEngine(BaseSearchEngine):
         ))
         self.host_url = "https://www.baidu.com"
     
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
         """Perform a Baidu search."""
         params = {
             "wd": query,
@@ -30,7 +41,7 @@ class BaiduSearchEngine(BaseSearchEngine):
             "rn": str(max_results)
         }
         
-        html = self._make_request(self.config.base_url, params)
+        html = self._make_request(self.config.base_url, params, deadline)
 
         if isinstance(html, SearchResponse):
             return html
@@ -39,47 +50,44 @@ class BaiduSearchEngine(BaseSearchEngine):
         results = []
         
         # Find search results in div content_left
-        div_contents = soup.find("div", id="content_left")
-        if not div_contents:
+        div_contents = self._select_one(soup, "container")
+        if div_contents is None:
             return SearchResponse(
                 results=[],
                 error="No search results found"
             )
             
-        for div in div_contents.children:
-            if not hasattr(div, 'get'):
-                continue
-                
-            class_list = div.get("class", [])
-            if not class_list or "c-container" not in class_list:
-                continue
-                
+        for div in self._select(soup, "result"):
             title = ""
             url = ""
             content = ""
             
             # 提取标题和URL
-            if div.h3 and div.h3.a:
-                title = self._extract_text(div.h3)
-                url = div.h3.a.get("href", "")
+            title_elem = self._select_one(div, "title")
+            link_elem = self._select_one(title_elem, "link") if title_elem is not None else None
+            if link_elem is not None:
+                title = self._extract_text(title_elem)
+                url = self._get_attr(link_elem, "href")
             else:
                 continue
                 
             # 提取内容摘要
-            abstract_div = div.find("div", class_="c-abstract")
-            if abstract_div:
+            abstract_div = self._select_one(div, "abstract")
+            first_div = self._select_one(div, "first_div")
+            if abstract_div is not None:
                 content = self._extract_text(abstract_div)
-            elif div.div:
-                content = self._extract_text(div.div)
+            elif first_div is not None:
+                content = self._extract_text(first_div)
             else:
                 # 尝试从div的文本中提取摘要
-                all_text = div.text.strip()
+                all_text = self._extract_text(div, strip=False).strip()
                 if title in all_text:
                     content = all_text.replace(title, "", 1).strip()
             
-            # 如果URL是百度重定向链接，需要清洗
+            # 如果URL是百度重定向链接，需要清洗；/link?url= 跳转链接在收集完所有结果后统一解析
             if url.startswith("/"):
                 url = self.host_url + url
+            url = self._extract_real_url(url)
             
             # 为有效结果创建SearchResult对象
             if title and url:
@@ -96,6 +104,7 @@ class BaiduSearchEngine(BaseSearchEngine):
                 metadata={"total_results": 0}
             )
         
+        results = self._resolve_redirects(results, deadline)
         return SearchResponse(
             results=results,
             metadata={"total_results": len(results)}
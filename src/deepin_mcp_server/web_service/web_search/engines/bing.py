@@ -1,9 +1,18 @@
 from typing import List, Dict, Any, Optional
 from ..base import BaseSearchEngine
 from ..search_types import SearchResult, SearchResponse, SearchEngineConfig
+from ..deadline import Deadline
 
 class BingSearchEngine(BaseSearchEngine):
     """Bing Search Engine implementation."""
+
+    SELECTORS = {
+        "result": "li.b_algo",
+        "title": "h2",
+        "link": "h2 a",
+        "content": "div.b_caption p",
+    }
+    CAPTCHA_MARKERS = ("/challenge/",)
     
     def __init__(self, config: Optional[SearchEngineConfig] = None):
         super().__init__(config or SearchEngineConfig(
@@ -14,28 +23,28 @@ class BingSearchEngine(BaseSearchEngine):
             }
         ))
     
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
         """Perform a Bing search."""
         params = {
             "q": query,
             "count": max_results
         }
         
-        html = self._make_request(self.config.base_url, params)
+        html = self._make_request(self.config.base_url, params, deadline)
         if isinstance(html, SearchResponse):
             return html
             
         soup = self._parse_html(html)
         results = []
         # Find search results
-        for result in soup.select("li.b_algo"):
-            title_elem = result.select_one("h2")
-            link_elem = result.select_one("h2 a")
-            content_elem = result.select_one("div.b_caption p")
+        for result in self._select(soup, "result"):
+            title_elem = self._select_one(result, "title")
+            link_elem = self._select_one(result, "link")
+            content_elem = self._select_one(result, "content")
             
-            if title_elem and link_elem:
+            if title_elem is not None and link_elem is not None:
                 title = self._extract_text(title_elem)
-                url = link_elem.get("href", "")
+                url = self._get_attr(link_elem, "href")
                 content = self._extract_text(content_elem)
                 
                 if not url.startswith("http"):
@@ -1,9 +1,17 @@
 from typing import List, Dict, Any, Optional
 from ..base import BaseSearchEngine
 from ..search_types import SearchResult, SearchResponse, SearchEngineConfig
+from ..deadline import Deadline
 
 class DuckDuckGoSearchEngine(BaseSearchEngine):
     """DuckDuckGo Search Engine implementation."""
+
+    SELECTORS = {
+        "result": "div.result",
+        "title": "h2",
+        "link": "a.result__a",
+        "content": "a.result__snippet",
+    }
     
     def __init__(self, config: Optional[SearchEngineConfig] = None):
         super().__init__(config or SearchEngineConfig(
@@ -15,13 +23,13 @@ class DuckDuckGoSearchEngine(BaseSearchEngine):
             }
         ))
     
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
         """Perform a DuckDuckGo search."""
         params = {
             "q": query,
         }
         
-        html = self._make_request(self.config.base_url, params)
+        html = self._make_request(self.config.base_url, params, deadline)
         if isinstance(html, SearchResponse):
             return html
             
@@ -29,14 +37,14 @@ class DuckDuckGoSearchEngine(BaseSearchEngine):
         results = []
         
         # Find search results
-        for result in soup.select("div.result"):
-            title_elem = result.select_one("h2")
-            link_elem = result.select_one("a.result__a")
-            content_elem = result.select_one("a.result__snippet")
+        for result in self._select(soup, "result"):
+            title_elem = self._select_one(result, "title")
+            link_elem = self._select_one(result, "link")
+            content_elem = self._select_one(result, "content")
             
-            if title_elem and link_elem:
+            if title_elem is not None and link_elem is not None:
                 title = self._extract_text(title_elem)
-                url = link_elem.get("href", "")
+                url = self._get_attr(link_elem, "href")
                 content = self._extract_text(content_elem)
                 
                 if url.startswith("/l/?uddg="):
@@ -1,9 +1,18 @@
 from typing import List, Dict, Any, Optional
 from ..base import BaseSearchEngine
 from ..search_types import SearchResult, SearchResponse, SearchEngineConfig
+from ..deadline import Deadline
 
 class GoogleSearchEngine(BaseSearchEngine):
     """Google Search Engine implementation."""
+
+    SELECTORS = {
+        "result": "div.g",
+        "title": "h3",
+        "link": "a",
+        "content": "div.VwiC3b",
+    }
+    CAPTCHA_MARKERS = ("/sorry/", "unusual traffic")
     
     def __init__(self, config: Optional[SearchEngineConfig] = None):
         super().__init__(config or SearchEngineConfig(
@@ -15,13 +24,13 @@ class GoogleSearchEngine(BaseSearchEngine):
             }
         ))
     
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
         """Perform a Google search."""
         params = {
             "q": query,
         }
         
-        html = self._make_request(self.config.base_url, params)
+        html = self._make_request(self.config.base_url, params, deadline)
         
         if isinstance(html, SearchResponse):
             return html
@@ -30,14 +39,14 @@ class GoogleSearchEngine(BaseSearchEngine):
         results = []
         
         # Find search results
-        for result in soup.select("div.g"):
-            title_elem = result.select_one("h3")
-            link_elem = result.select_one("a")
-            content_elem = result.select_one("div.VwiC3b")
+        for result in self._select(soup, "result"):
+            title_elem = self._select_one(result, "title")
+            link_elem = self._select_one(result, "link")
+            content_elem = self._select_one(result, "content")
             
-            if title_elem and link_elem:
+            if title_elem is not None and link_elem is not None:
                 title = self._extract_text(title_elem)
-                url = link_elem.get("href", "")
+                url = self._get_attr(link_elem, "href")
                 content = self._extract_text(content_elem)
                 
                 if url.startswith("/url?q="):
@@ -1,14 +1,20 @@
 from typing import List, Dict, Any, Optional
 from ..base import BaseSearchEngine
 from ..search_types import SearchResult, SearchResponse, SearchEngineConfig
+from ..deadline import Deadline
 import re
 from urllib.parse import quote
-from ..util import get_web_content
-from bs4 import BeautifulSoup
-import requests
 
 class SogouSearchEngine(BaseSearchEngine):
     """Sogou Search Engine implementation."""
+
+    SELECTORS = {
+        "result": ".vrwrap, .rb",
+        "title": "h3, .pt",
+        "link": "a[href]",
+        "content": ".str-pd, .ft, .str-text-info, .sp-text, .text-layout",
+    }
+    CAPTCHA_MARKERS = ("/antispider",)
     
     def __init__(self, config: Optional[SearchEngineConfig] = None):
         super().__init__(config or SearchEngineConfig(
@@ -19,13 +25,13 @@ class SogouSearchEngine(BaseSearchEngine):
         ))
         self.host_url = "https://www.sogou.com"
     
-    def search(self, query: str, max_results: int = 10) -> SearchResponse:
-        """Perform a Baidu search."""
+    def search(self, query: str, max_results: int = 10, deadline: Optional[Deadline] = None) -> SearchResponse:
+        """Perform a Sogou search."""
         params = {
             "query": query
         }
         
-        html = self._make_request(self.config.base_url, params)
+        html = self._make_request(self.config.base_url, params, deadline)
 
         if isinstance(html, SearchResponse):
             return html
@@ -33,49 +39,19 @@ class SogouSearchEngine(BaseSearchEngine):
         soup = self._parse_html(html)
         results = []
         
-        for result in soup.select('.vrwrap, .rb'):
-            title_elem = result.select_one("h3, .pt")
-            link_elem = result.select_one("a[href]")
-
-            content_elem = None
-            for selector in [".str-pd, .ft, .str-text-info, .sp-text, .text-layout"]:
-                content_elem = result.select_one(selector)
-                if content_elem:
-                    break
+        for result in self._select(soup, "result"):
+            title_elem = self._select_one(result, "title")
+            link_elem = self._select_one(result, "link")
+            content_elem = self._select_one(result, "content")
             
-            if title_elem and link_elem and content_elem:
-                title = title_elem.get_text(strip=True)
-                url = link_elem['href']
-                content = content_elem.get_text(strip=True)
-
-                # 处理Sogou重定向
-                if url.startswith('/link?url='):
-                    response = requests.get(
-                        self.host_url + url, 
-                        headers=self.config.headers,
-                        timeout=10,
-                        proxies=None
-                    )
-                    refer_html = response.text
+            if title_elem is not None and link_elem is not None and content_elem is not None:
+                title = self._extract_text(title_elem)
+                url = self._get_attr(link_elem, "href")
+                content = self._extract_text(content_elem)
 
-                    soup = BeautifulSoup(refer_html, 'html.parser')
-                    refer_url = None
-                    # 1. 检查 JavaScript 跳转 (window.location.replace)
-                    script = soup.find('script')
-                    if script and 'window.location.replace' in script.text:
-                        start = script.text.find('("') + 2
-                        end = script.text.find('")')
-                        refer_url = script.text[start:end]
-                    # 2. 如果 JavaScript 未生效，检查 <meta> 跳转
-                    if not refer_url:
-                        meta = soup.find('meta', attrs={'http-equiv': 'refresh'})
-                        if meta:
-                            content = meta.get('content', '')
-                            if 'url=' in content.lower():
-                                refer_url = content.split('url=')[1].strip("'\"")
-                    
-                    if refer_url:
-                        url = refer_url
+                # Sogou跳转链接在收集完所有结果后统一并发解析
+                if url.startswith('/'):
+                    url = self.host_url + url
             
                 # 为有效结果创建SearchResult对象
                 if title and url and content:
@@ -92,6 +68,7 @@ class SogouSearchEngine(BaseSearchEngine):
                 metadata={"total_results": 0}
             )
         
+        results = self._resolve_redirects(results, deadline)
         return SearchResponse(
             results=results,
             metadata={"total_results": len(results)}
@@ -0,0 +1,54 @@
+"""
+Main-content extraction engines.
+
+每个引擎接收完整的 HTML，返回正文部分的 HTML（提取失败时返回 None），
+再由 util.extract_main_content 统一转换为 Markdown。
+
+    lxml:        readability-lxml，在进程内运行，速度快（默认）
+    readabilipy: readabilipy + Mozilla Readability.js，每个页面启动一个 Node.js 进程
+    simple:      readabilipy 的纯 Python 简化模式，不依赖 Node.js
+
+默认引擎可通过环境变量 DEEPIN_MCP_EXTRACTOR 配置，也可以在每次调用时指定。
+"""
+
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+from readability import Document
+from readabilipy import simple_json
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_lxml(html: str) -> Optional[str]:
+    return Document(html).summary(html_partial=True)
+
+
+def _extract_readabilipy(html: str) -> Optional[str]:
+    return simple_json.simple_json_from_html_string(html, use_readability=True)["content"]
+
+
+def _extract_simple(html: str) -> Optional[str]:
+    return simple_json.simple_json_from_html_string(html, use_readability=False)["content"]
+
+
+EXTRACTORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "lxml": _extract_lxml,
+    "readabilipy": _extract_readabilipy,
+    "simple": _extract_simple,
+}
+
+DEFAULT_EXTRACTOR = os.getenv("DEEPIN_MCP_EXTRACTOR", "lxml")
+if DEFAULT_EXTRACTOR not in EXTRACTORS:
+    logger.warning(f"未知的正文提取引擎 {DEFAULT_EXTRACTOR}，使用 lxml")
+    DEFAULT_EXTRACTOR = "lxml"
+
+
+def extract_html(html: str, extractor: Optional[str] = None) -> Optional[str]:
+    """Extract the main-content HTML of a page with the selected engine."""
+    name = extractor or DEFAULT_EXTRACTOR
+    engine = EXTRACTORS.get(name)
+    if engine is None:
+        raise ValueError(f"Unsupported extractor: {name}")
+    return engine(html)
@@ -0,0 +1,195 @@
+"""
+Search engine health tracking and circuit breakers.
+
+记录每个搜索引擎最近的表现（成功率、EWMA 延迟、验证码页和空结果次数），用于：
+    - 熔断：连续失败达到阈值或遇到验证码页时暂时停用该引擎，冷却后放行一次探测请求，
+      探测成功则恢复，失败则以加倍的冷却时间再次熔断
+    - 排序：按预期耗时（延迟 + 失败惩罚）动态调整引擎的尝试顺序，配置的优先级作为偏置；
+      超过冷却时间没有请求的引擎统计视为过时，恢复默认排序
+
+可通过环境变量配置：
+    DEEPIN_MCP_CIRCUIT_FAILURES  连续失败多少次后熔断 (默认 3)
+    DEEPIN_MCP_CIRCUIT_COOLDOWN  熔断后的冷却时间，单位秒，重复熔断时加倍，最多 8 倍 (默认 300)
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from .settings import env_float, env_int
+
+CIRCUIT_FAILURES = env_int("DEEPIN_MCP_CIRCUIT_FAILURES", 3)
+CIRCUIT_COOLDOWN = env_float("DEEPIN_MCP_CIRCUIT_COOLDOWN", 300)
+MAX_COOLDOWN_FACTOR = 8
+EWMA_ALPHA = 0.3
+# 排序用的预期耗时（秒）：没有样本的引擎的默认延迟、失败的惩罚、每个优先级的偏置
+DEFAULT_LATENCY = 1.0
+FAILURE_PENALTY = 10.0
+PRIORITY_BIAS = 0.5
+
+OK = "ok"
+EMPTY = "empty"
+CAPTCHA = "captcha"
+ERROR = "error"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class EngineHealth:
+    """Rolling health statistics of one search engine."""
+    provider: str
+    requests: int = 0
+    successes: int = 0
+    empties: int = 0
+    captchas: int = 0
+    errors: int = 0
+    ewma_latency: Optional[float] = None
+    ewma_success: float = 1.0
+    consecutive_failures: int = 0
+    state: str = CLOSED
+    trips: int = 0
+    open_until: float = 0.0
+    probe_started: float = 0.0
+    last_outcome: Optional[str] = None
+    last_error: Optional[str] = None
+    last_seen: Optional[float] = None
+
+    def expected_cost(self, now: float) -> float:
+        # 长时间没有请求的引擎统计已过时，按没有样本处理，让它有机会重新排到前面
+        if self.last_seen is None or now - self.last_seen > CIRCUIT_COOLDOWN:
+            return DEFAULT_LATENCY
+        latency = DEFAULT_LATENCY if self.ewma_latency is None else self.ewma_latency
+        return latency + (1.0 - self.ewma_success) * FAILURE_PENALTY
+
+    def available(self, now: float) -> bool:
+        if self.state == OPEN:
+            return now >= self.open_until
+        if self.state == HALF_OPEN:
+            # 探测请求被取消或挂起时，冷却期过后允许再次探测
+            return now - self.probe_started >= CIRCUIT_COOLDOWN
+        return True
+
+
+class HealthRegistry:
+    """Thread-safe per-engine health registry driving circuit breakers and provider ordering."""
+
+    def __init__(self):
+        self._engines: Dict[str, EngineHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, provider: str) -> EngineHealth:
+        health = self._engines.get(provider)
+        if health is None:
+            health = self._engines[provider] = EngineHealth(provider)
+        return health
+
+    def allow(self, provider: str) -> bool:
+        """Whether a request to provider may be sent now; moves an expired open circuit to half-open."""
+        now = time.time()
+        with self._lock:
+            health = self._get(provider)
+            if not health.available(now):
+                return False
+            if health.state != CLOSED:
+                health.state = HALF_OPEN
+                health.probe_started = now
+            return True
+
+    def record(self, provider: str, outcome: str, latency: float, error: Optional[str] = None) -> None:
+        """Record the outcome (ok/empty/captcha/error) and latency of one engine request."""
+        now = time.time()
+        with self._lock:
+            health = self._get(provider)
+            health.requests += 1
+            health.last_outcome = outcome
+            health.last_seen = now
+            if health.ewma_latency is None:
+                health.ewma_latency = latency
+            else:
+                health.ewma_latency += EWMA_ALPHA * (latency - health.ewma_latency)
+            success = outcome == OK
+            health.ewma_success += EWMA_ALPHA * (float(success) - health.ewma_success)
+
+            if success:
+                health.successes += 1
+                health.consecutive_failures = 0
+                health.state = CLOSED
+                health.trips = 0
+                return
+
+            health.last_error = error or outcome
+            if outcome == EMPTY:
+                health.empties += 1
+            elif outcome == CAPTCHA:
+                health.captchas += 1
+            else:
+                health.errors += 1
+            health.consecutive_failures += 1
+            # 验证码页说明已被限制访问，立即熔断；探测失败时重新熔断
+            if (outcome == CAPTCHA or health.state == HALF_OPEN
+                    or health.consecutive_failures >= CIRCUIT_FAILURES):
+                self._trip(health, now)
+
+    def _trip(self, health: EngineHealth, now: float) -> None:
+        health.trips += 1
+        factor = min(2 ** (health.trips - 1), MAX_COOLDOWN_FACTOR)
+        health.state = OPEN
+        health.open_until = now + CIRCUIT_COOLDOWN * factor
+
+    def order(self, providers: Sequence[str]) -> List[str]:
+        """
+        Order providers by expected cost, biased towards the configured priority.
+
+        Providers whose circuit is open are moved to the end instead of being dropped,
+        so a search still has something to try when every engine is failing.
+        """
+        now = time.time()
+        with self._lock:
+            def key(item):
+                index, provider = item
+                health = self._get(provider)
+                return not health.available(now), health.expected_cost(now) + index * PRIORITY_BIAS
+            return [provider for _, provider in sorted(enumerate(providers), key=key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Health statistics of every known engine, for diagnostics."""
+        now = time.time()
+        with self._lock:
+            report = {}
+            for provider, health in self._engines.items():
+                report[provider] = {
+                    "state": health.state,
+                    "available": health.available(now),
+                    "retry_in": round(max(0.0, health.open_until - now), 1) if health.state == OPEN else 0,
+                    "requests": health.requests,
+                    "success_rate": round(health.successes / health.requests, 3) if health.requests else None,
+                    "recent_success": round(health.ewma_success, 3),
+                    "ewma_latency": round(health.ewma_latency, 3) if health.ewma_latency is not None else None,
+                    "consecutive_failures": health.consecutive_failures,
+                    "empties": health.empties,
+                    "captchas": health.captchas,
+                    "errors": health.errors,
+                    "trips": health.trips,
+                    "last_outcome": health.last_outcome,
+                    "last_error": health.last_error,
+                    "last_seen": health.last_seen,
+                }
+            return report
+
+
+_registry: Optional[HealthRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_health_registry() -> HealthRegistry:
+    """Get the process-wide engine health registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = HealthRegistry()
+    return _registry
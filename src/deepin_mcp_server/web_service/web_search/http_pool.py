@@ -0,0 +1,174 @@
+"""
+Process-wide HTTP connection pools.
+
+搜索引擎、网页抓取和文件下载共享同一组连接池，保持长连接，避免每次请求
+重复进行 DNS 解析、TCP 和 TLS 握手。
+
+连接池参数可通过环境变量配置：
+    DEEPIN_MCP_HTTP_POOL_HOSTS  缓存连接池的主机数 (默认 32)
+    DEEPIN_MCP_HTTP_PER_HOST    每个主机的最大连接数 (默认 8)
+    DEEPIN_MCP_HTTP_MAX_CONNECTIONS  异步客户端的最大连接总数 (默认 64)
+    DEEPIN_MCP_HTTP2            设为 1 时异步客户端启用 HTTP/2 (需要安装 h2)
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .settings import env_bool, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+}
+KEEPALIVE_EXPIRY = 30
+
+POOL_HOSTS = env_int("DEEPIN_MCP_HTTP_POOL_HOSTS", 32)
+PER_HOST_CONNECTIONS = env_int("DEEPIN_MCP_HTTP_PER_HOST", 8)
+MAX_CONNECTIONS = env_int("DEEPIN_MCP_HTTP_MAX_CONNECTIONS", 64)
+HTTP2_ENABLED = env_bool("DEEPIN_MCP_HTTP2", False)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_async_transport: Optional[httpx.AsyncHTTPTransport] = None
+_async_client_loop = None
+_async_client_guard: Optional[asyncio.Task] = None
+_async_http2 = False
+_request_counts: Counter = Counter()
+_async_request_counts: Counter = Counter()
+
+
+def _host_of(url: str) -> str:
+    return urlparse(str(url)).netloc.lower()
+
+
+def _count_response(response: requests.Response, *args, **kwargs) -> None:
+    _request_counts[_host_of(response.url)] += 1
+
+
+async def _count_async_response(response: httpx.Response) -> None:
+    _async_request_counts[_host_of(response.request.url)] += 1
+
+
+def get_session() -> requests.Session:
+    """Get the shared, thread-safe pooled requests session."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                # pool_block=True 时每个主机的连接数不超过 PER_HOST_CONNECTIONS
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=PER_HOST_CONNECTIONS,
+                    pool_block=True
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                session.hooks["response"].append(_count_response)
+                _session = session
+    return _session
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("DEEPIN_MCP_HTTP2=1 但未安装 h2，异步客户端回退到 HTTP/1.1")
+        return False
+    return True
+
+
+async def _close_with_loop(client: httpx.AsyncClient) -> None:
+    """Keep the client open until this task is cancelled, then close it on its own loop."""
+    try:
+        await asyncio.Event().wait()
+    finally:
+        # asyncio.run 退出前会取消并等待所有任务，连接在事件循环关闭前释放
+        await client.aclose()
+
+
+def _retire_async_client() -> None:
+    """Close the client of a previous event loop before it is replaced."""
+    if _async_client_guard is None or _async_client_guard.done():
+        return
+    if _async_client_loop.is_closed():
+        # 关闭事件循环前没有取消任务（未使用 asyncio.run），连接已无法在原循环上关闭
+        logger.debug("异步客户端所属的事件循环已关闭，无法关闭其连接")
+        return
+    _async_client_loop.call_soon_threadsafe(_async_client_guard.cancel)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the pooled async client for the running event loop."""
+    global _async_client, _async_transport, _async_client_loop, _async_client_guard, _async_http2
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _retire_async_client()
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+        _async_http2 = _http2_available()
+        _async_transport = httpx.AsyncHTTPTransport(limits=limits, http2=_async_http2)
+        _async_client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=10,
+            follow_redirects=True,
+            transport=_async_transport,
+            event_hooks={"response": [_count_async_response]}
+        )
+        _async_client_loop = loop
+        _async_client_guard = loop.create_task(_close_with_loop(_async_client))
+    return _async_client
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot of connection pool state and per-host request counts."""
+    sync_pools = {}
+    if _session is not None:
+        adapter = _session.get_adapter("https://")
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            sync_pools[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections_created": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": sum(1 for conn in pool.pool.queue if conn is not None) if pool.pool else 0,
+            }
+
+    async_connections = []
+    pool = getattr(_async_transport, "_pool", None)
+    if pool is not None and _async_client is not None and not _async_client.is_closed:
+        async_connections = pool.connections
+
+    return {
+        "config": {
+            "pool_hosts": POOL_HOSTS,
+            "per_host_connections": PER_HOST_CONNECTIONS,
+            "max_connections": MAX_CONNECTIONS,
+            "http2": _async_http2,
+        },
+        "sync": {
+            "pools": sync_pools,
+            "requests_by_host": dict(_request_counts),
+        },
+        "async": {
+            "connections": len(async_connections),
+            "idle_connections": sum(1 for conn in async_connections if conn.is_idle()),
+            "requests_by_host": dict(_async_request_counts),
+        },
+    }
@@ -0,0 +1,152 @@
+"""
+Local full-text index of fetched web pages.
+
+每个抓取并提取成功的网页（Markdown 正文、URL、标题、抓取时间）都写入 SQLite FTS5 索引，
+之后可以用 search_fetched_pages 工具在本地检索已经读过的网页，无需任何网络请求。
+
+FTS5 的 unicode61 分词器把连续的中日韩文字当作一个词，无法按词检索，因此建索引时
+在每个中日韩字符两侧加空格，查询时把中日韩文字转换为相邻字符组成的短语，
+相当于按单字索引、按短语匹配。原文单独保存，用于返回摘要和正文。
+
+可通过环境变量配置：
+    DEEPIN_MCP_PAGE_INDEX              设为 0 时不建立网页索引 (默认 1)
+    DEEPIN_MCP_PAGE_INDEX_MAX_AGE      索引条目最长保存时间，单位秒 (默认 2592000)
+    DEEPIN_MCP_PAGE_INDEX_MAX_ENTRIES  最多索引的网页数，超出后删除最早抓取的网页 (默认 5000)
+"""
+
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .cache import CACHE_DB_PATH, SqliteStore
+from .settings import env_bool, env_float, env_int
+
+PAGE_INDEX_ENABLED = env_bool("DEEPIN_MCP_PAGE_INDEX", True)
+PAGE_INDEX_MAX_AGE = env_float("DEEPIN_MCP_PAGE_INDEX_MAX_AGE", 30 * 86400)
+PAGE_INDEX_MAX_ENTRIES = env_int("DEEPIN_MCP_PAGE_INDEX_MAX_ENTRIES", 5000)
+# 摘要在第一个命中位置前后截取的字符数
+SNIPPET_CHARS = 120
+# 排序时标题命中相对于正文命中的权重
+TITLE_WEIGHT = 5.0
+
+_CJK = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def segment(text: str) -> str:
+    """Separate CJK characters with spaces so the unicode61 tokenizer indexes each one."""
+    return _CJK.sub(r" \1 ", text)
+
+
+def build_match_query(query: str, any_term: bool = False) -> str:
+    """Turn free text into an FTS5 MATCH expression: every term is a phrase, terms are ANDed (or ORed)."""
+    phrases = []
+    for term in query.split():
+        tokens = segment(term).split()
+        if tokens:
+            phrases.append('"' + " ".join(tokens).replace('"', '""') + '"')
+    return (" OR " if any_term else " ").join(phrases)
+
+
+def make_snippet(content: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """Text around the first occurrence of any query term, or the start of the content."""
+    lowered = content.lower()
+    positions = [lowered.find(term) for term in query.lower().split()]
+    positions = [position for position in positions if position >= 0]
+    start = max(0, min(positions) - width) if positions else 0
+    snippet = _WHITESPACE.sub(" ", content[start:start + width * 2 + 40]).strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if start + width * 2 + 40 < len(content):
+        snippet += "…"
+    return snippet
+
+
+class PageIndex:
+    """Full-text index of extracted page content, queried with BM25 ranking."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS page_index (
+            url TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_page_index_fetched ON page_index(fetched_at);
+        CREATE VIRTUAL TABLE IF NOT EXISTS page_index_fts USING fts5(
+            title, content, tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """
+
+    def __init__(self, db_path: Path = CACHE_DB_PATH, max_age: float = PAGE_INDEX_MAX_AGE,
+                 max_entries: int = PAGE_INDEX_MAX_ENTRIES):
+        self.store = SqliteStore(db_path, self.SCHEMA)
+        self.max_age = max_age
+        self.max_entries = max_entries
+
+    def put(self, url: str, title: str, content: str) -> None:
+        """Index (or re-index) the content of a page."""
+        if not content:
+            return
+        self.store.execute_batch([
+            ("DELETE FROM page_index_fts WHERE rowid IN (SELECT rowid FROM page_index WHERE url = ?)", (url,)),
+            ("DELETE FROM page_index WHERE url = ?", (url,)),
+            ("INSERT INTO page_index (url, title, content, fetched_at) VALUES (?, ?, ?, ?)",
+             (url, title, content, time.time())),
+            ("INSERT INTO page_index_fts (rowid, title, content) SELECT rowid, ?, ? FROM page_index WHERE url = ?",
+             (segment(title), segment(content), url)),
+        ])
+        self._evict()
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Pages matching every term of query, best first; falls back to any term when none match all."""
+        rows = []
+        for any_term in (False, True):
+            match = build_match_query(query, any_term)
+            if not match:
+                return []
+            rows = self.store.execute(
+                "SELECT p.url, p.title, p.content, p.fetched_at, bm25(page_index_fts, ?, 1.0) AS score "
+                "FROM page_index_fts JOIN page_index p ON p.rowid = page_index_fts.rowid "
+                "WHERE page_index_fts MATCH ? AND p.fetched_at >= ? ORDER BY score LIMIT ?",
+                (TITLE_WEIGHT, match, time.time() - self.max_age, limit)
+            )
+            if rows or len(query.split()) < 2:
+                break
+        return [
+            {"url": url, "title": title, "content": content, "fetched_at": fetched_at, "score": round(-score, 3)}
+            for url, title, content, fetched_at, score in rows
+        ]
+
+    def count(self) -> int:
+        rows = self.store.execute("SELECT COUNT(*) FROM page_index")
+        return rows[0][0] if rows else 0
+
+    def _evict(self) -> None:
+        stale = "SELECT rowid FROM page_index WHERE fetched_at < ?"
+        surplus = "SELECT rowid FROM page_index ORDER BY fetched_at DESC LIMIT -1 OFFSET ?"
+        cutoff = time.time() - self.max_age
+        self.store.execute_batch([
+            (f"DELETE FROM page_index_fts WHERE rowid IN ({stale})", (cutoff,)),
+            (f"DELETE FROM page_index WHERE rowid IN ({stale})", (cutoff,)),
+            (f"DELETE FROM page_index_fts WHERE rowid IN ({surplus})", (self.max_entries,)),
+            (f"DELETE FROM page_index WHERE rowid IN ({surplus})", (self.max_entries,)),
+        ])
+
+
+_page_index: Optional[PageIndex] = None
+_page_index_lock = threading.Lock()
+
+
+def get_page_index() -> Optional[PageIndex]:
+    """Get the process-wide page index, or None when it is disabled or unavailable (e.g. no FTS5)."""
+    global _page_index
+    if not PAGE_INDEX_ENABLED:
+        return None
+    if _page_index is None:
+        with _page_index_lock:
+            if _page_index is None:
+                _page_index = PageIndex()
+    return _page_index if _page_index.store.available else None
@@ -0,0 +1,176 @@
+"""
+Cross-provider result merging.
+
+多个搜索引擎的结果按规范化后的 URL 去重，再用倒数排名融合（Reciprocal Rank Fusion）排序：
+    score(url) = Σ 1 / (k + rank)，rank 为该 URL 在各引擎结果中的名次（从 1 开始）
+
+URL 规范化：
+    - 忽略协议差异（http/https）、主机名大小写、www. 前缀、默认端口和片段
+    - 去掉常见的跟踪参数（utm_*、gclid、fbclid 等），其余参数排序
+    - 解开可在本地解码的跳转包装（Google /url?q=、DuckDuckGo /l/?uddg=、Bing /ck/a?u=、
+      百度 /s?word=...&url=），百度、搜狗的 /link?url= 使用已解析的跳转缓存
+
+RRF 常数可通过环境变量 DEEPIN_MCP_RRF_K 配置。
+"""
+
+import base64
+import binascii
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from .cache import get_redirect_cache
+from .redirects import is_redirect_link
+from .search_types import SearchResponse, SearchResult
+from .settings import env_int
+
+RRF_K = env_int("DEEPIN_MCP_RRF_K", 60)
+
+_TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "ref_src", "spm", "scm",
+}
+_TRACKING_PREFIXES = ("utm_",)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# (主机匹配规则, 路径, 保存目标地址的参数)
+_WRAPPERS: List[Tuple[re.Pattern, str, str]] = [
+    (re.compile(r"^(www\.)?google\.[a-z.]+$"), "/url", "q"),
+    (re.compile(r"^(html\.)?duckduckgo\.com$"), "/l/", "uddg"),
+    (re.compile(r"^(www\.)?baidu\.com$"), "/s", "url"),
+]
+_BING_HOST = re.compile(r"^(www\.)?bing\.com$")
+
+
+def _decode_bing(value: str) -> Optional[str]:
+    # Bing 的 /ck/a?u=a1<base64url> 跳转链接
+    if not value.startswith("a1"):
+        return None
+    encoded = value[2:]
+    try:
+        decoded = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return decoded if decoded.startswith("http") else None
+
+
+def unwrap_redirect(url: str) -> str:
+    """Return the target of a search engine redirect wrapper without any network request."""
+    for _ in range(3):
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        params = dict(parse_qsl(parts.query))
+        target = None
+        for host_pattern, path, param in _WRAPPERS:
+            if host_pattern.match(host) and parts.path == path and params.get(param, "").startswith("http"):
+                target = params[param]
+                break
+        if target is None and _BING_HOST.match(host) and parts.path == "/ck/a":
+            target = _decode_bing(params.get("u", ""))
+        if target is None and is_redirect_link(url):
+            cache = get_redirect_cache()
+            target = cache.get(url) if cache is not None else None
+        if not target or target == url:
+            return url
+        url = target
+    return url
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of url used as the deduplication key; not meant to be fetched."""
+    url = unwrap_redirect(url.strip())
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        return url
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if port and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    path = unquote(parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def make_result_id(url: str) -> str:
+    """Stable short ID of a result, derived from its canonical URL."""
+    return "r" + hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()[:10]
+
+
+def dedupe_results(results: Iterable[SearchResult]) -> List[SearchResult]:
+    """Drop results whose canonical URL already appeared earlier in the list."""
+    unique = []
+    seen = set()
+    for result in results:
+        key = canonicalize_url(result.url)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(result)
+    return unique
+
+
+def merge_responses(responses: Sequence[Tuple[str, SearchResponse]], k: int = RRF_K,
+                    max_results: Optional[int] = None) -> SearchResponse:
+    """
+    Merge (provider, response) pairs into one deduplicated response ranked by reciprocal-rank fusion.
+
+    responses are given in provider priority order. Each merged result keeps the title from the
+    highest-priority provider, a URL that needs no redirect resolution when one is available and
+    the longest snippet; result.metadata records the fused score and the providers that returned it.
+    """
+    merged: Dict[str, SearchResult] = {}
+    scores: Dict[str, float] = {}
+    best_rank: Dict[str, Tuple[int, int]] = {}
+    providers = []
+
+    for order, (provider, response) in enumerate(responses):
+        if not response.results:
+            continue
+        providers.append(provider)
+        keys = [canonicalize_url(result.url) for result in response.results]
+        # 同一引擎中重复出现的页面只按最好的名次计分
+        for rank, key in enumerate(dict.fromkeys(keys), 1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            best_rank[key] = min(best_rank.get(key, (rank, order)), (rank, order))
+        for key, result in zip(keys, response.results):
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = SearchResult(
+                    title=result.title,
+                    url=result.url,
+                    content=result.content,
+                    metadata={**(result.metadata or {}), "engines": [provider]},
+                )
+                continue
+            if provider not in existing.metadata["engines"]:
+                existing.metadata["engines"].append(provider)
+            if is_redirect_link(existing.url) and not is_redirect_link(result.url):
+                existing.url = result.url
+            if len(result.content) > len(existing.content):
+                existing.content = result.content
+
+    # 得分相同时按最好名次、引擎优先级排序，保证结果稳定
+    ranked = sorted(merged, key=lambda key: (-scores[key], best_rank[key]))
+    if max_results is not None:
+        ranked = ranked[:max_results]
+    results = []
+    for key in ranked:
+        result = merged[key]
+        result.metadata["rrf_score"] = round(scores[key], 6)
+        results.append(result)
+    return SearchResponse(
+        results=results,
+        metadata={"engine": "merge", "engines": providers, "total_results": len(results)},
+    )
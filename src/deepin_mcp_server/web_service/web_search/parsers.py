@@ -0,0 +1,165 @@
+"""
+HTML parser backends for search engine result pages.
+
+搜索引擎在类属性 SELECTORS 中声明所用的 CSS 选择器，由后端一次性预编译，
+之后每次解析只执行编译好的选择器。
+
+    lxml: lxml.html + cssselect 预编译为 XPath，速度快（默认）
+    bs4:  BeautifulSoup(html.parser) + soupsieve 预编译选择器
+
+默认后端可通过环境变量 DEEPIN_MCP_SERP_PARSER 配置，单个引擎也可以通过
+SearchEngineConfig.parser 指定。lxml 后端依赖 cssselect（readability-lxml 的依赖），
+不可用时自动回退到 bs4。
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ParserBackend(ABC):
+    """Common interface of SERP parser backends."""
+
+    name = ""
+
+    def __init__(self):
+        self._compiled: Dict[str, Any] = {}
+
+    def compile(self, selectors: Dict[str, str]) -> Dict[str, Any]:
+        """Precompile a name -> CSS selector mapping, memoized per selector."""
+        compiled = {}
+        for key, css in selectors.items():
+            if css not in self._compiled:
+                self._compiled[css] = self._compile(css)
+            compiled[key] = self._compiled[css]
+        return compiled
+
+    @abstractmethod
+    def _compile(self, css: str) -> Any:
+        """Compile one CSS selector for this backend."""
+
+    @abstractmethod
+    def parse(self, html: str) -> Any:
+        """Parse an HTML document into the backend's tree."""
+
+    @abstractmethod
+    def select(self, node: Any, selector: Any) -> List[Any]:
+        """All nodes under node matching a compiled selector."""
+
+    @abstractmethod
+    def select_one(self, node: Any, selector: Any) -> Optional[Any]:
+        """First node under node matching a compiled selector, or None."""
+
+    @abstractmethod
+    def text(self, node: Any, strip: bool = True) -> str:
+        """Text of node; with strip=True each text fragment is stripped, like get_text(strip=True)."""
+
+    @abstractmethod
+    def attr(self, node: Any, name: str) -> str:
+        """Attribute value of node, or an empty string."""
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup backend using the stdlib html.parser."""
+
+    name = "bs4"
+
+    def _compile(self, css):
+        return soupsieve.compile(css)
+
+    def parse(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def select(self, node, selector):
+        return selector.select(node)
+
+    def select_one(self, node, selector):
+        return selector.select_one(node)
+
+    def text(self, node, strip=True):
+        return node.get_text(strip=strip)
+
+    def attr(self, node, name):
+        value = node.get(name, "")
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend(ParserBackend):
+    """lxml backend with cssselect selectors compiled to XPath."""
+
+    name = "lxml"
+
+    # 与 BeautifulSoup 的 get_text 一致：不包含脚本、样式和注释中的文本
+    _TEXT = etree.XPath(
+        "descendant-or-self::text()[not(parent::script or parent::style)]", smart_strings=False
+    ) if LXML_AVAILABLE else None
+
+    def _compile(self, css):
+        return CSSSelector(css, translator="html")
+
+    def parse(self, html):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # 带有 XML 编码声明的字符串需要以字节形式解析
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+        except etree.ParserError:
+            return lxml.html.document_fromstring("<html></html>")
+
+    def select(self, node, selector):
+        # CSSSelector 会匹配节点自身，与 BeautifulSoup 只匹配后代的行为保持一致
+        return [element for element in selector(node) if element is not node]
+
+    def select_one(self, node, selector):
+        for element in selector(node):
+            if element is not node:
+                return element
+        return None
+
+    def text(self, node, strip=True):
+        fragments = self._TEXT(node)
+        if strip:
+            return "".join(fragment.strip() for fragment in fragments)
+        return "".join(fragments)
+
+    def attr(self, node, name):
+        return node.get(name, "")
+
+
+BACKENDS = {
+    "lxml": LxmlBackend,
+    "bs4": SoupBackend,
+}
+
+DEFAULT_BACKEND = os.getenv("DEEPIN_MCP_SERP_PARSER", "lxml")
+
+_instances: Dict[str, ParserBackend] = {}
+
+
+def get_parser_backend(name: Optional[str] = None) -> ParserBackend:
+    """Get the shared parser backend instance by name (default from DEEPIN_MCP_SERP_PARSER)."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        logger.warning(f"未知的 SERP 解析后端 {name}，使用 bs4")
+        name = "bs4"
+    if name == "lxml" and not LXML_AVAILABLE:
+        logger.warning("lxml/cssselect 不可用，SERP 解析回退到 bs4")
+        name = "bs4"
+    backend = _instances.get(name)
+    if backend is None:
+        backend = _instances.setdefault(name, BACKENDS[name]())
+    return backend
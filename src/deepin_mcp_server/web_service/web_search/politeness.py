@@ -0,0 +1,296 @@
+"""
+Per-host politeness scheduling for outbound requests.
+
+并发抓取时大量请求会落到同一主机（如 zhihu.com、csdn.net），容易被限流或封禁。
+搜索引擎请求、跳转链接解析和网页抓取在发出前都经过这里：
+    - 每个主机同时进行的请求数（线程中的同步请求和事件循环上的异步请求合计）不超过 DEEPIN_MCP_HOST_CONCURRENCY
+    - 每个主机一个令牌桶，平均速率 DEEPIN_MCP_HOST_RATE 次/秒，允许突发 DEEPIN_MCP_HOST_BURST 次
+    - 响应为 429/503 且带有 Retry-After 时，该主机在指定时间内暂停请求（最长 DEEPIN_MCP_MAX_RETRY_AFTER 秒）
+等待时间超过调用剩余的时间预算时直接放弃，而不是占用预算空等。
+
+可通过环境变量配置：
+    DEEPIN_MCP_HOST_CONCURRENCY  每个主机的最大并发请求数 (默认 6)
+    DEEPIN_MCP_HOST_RATE         每个主机每秒的平均请求数，0 表示不限速 (默认 4)
+    DEEPIN_MCP_HOST_BURST        每个主机允许的突发请求数 (默认 8)
+    DEEPIN_MCP_MAX_RETRY_AFTER   遵守的 Retry-After 上限，单位秒 (默认 60)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from .deadline import Deadline, DeadlineExceeded
+from .settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+HOST_CONCURRENCY = env_int("DEEPIN_MCP_HOST_CONCURRENCY", 6)
+HOST_RATE = env_float("DEEPIN_MCP_HOST_RATE", 4)
+HOST_BURST = env_int("DEEPIN_MCP_HOST_BURST", 8)
+MAX_RETRY_AFTER = env_float("DEEPIN_MCP_MAX_RETRY_AFTER", 60)
+# 服务器要求暂停的状态码
+BACKOFF_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second up to burst; rate 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, limit: Optional[float] = None) -> Optional[float]:
+        """
+        Take one token and return the seconds to wait before using it.
+
+        Returns None without taking a token when the wait would exceed limit.
+        Not thread-safe; callers hold the scheduler lock.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if limit is not None and wait > limit:
+            return None
+        # 令牌可以预支为负数，后来的请求依次排在后面
+        self.tokens -= 1
+        return wait
+
+
+class _Waiter:
+    """A request waiting for a host slot: a thread (event) or a coroutine (future on its loop)."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _HostState:
+    def __init__(self):
+        self.bucket = TokenBucket(HOST_RATE, HOST_BURST)
+        # 持有并发名额的请求数（同步和异步请求共用），以及按先后顺序等待名额的请求
+        self.active = 0
+        self.waiters: deque = deque()
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.waited = 0.0
+        self.backoffs = 0
+        self.rejected = 0
+
+
+class HostScheduler:
+    """Enforce per-host concurrency, request rate and Retry-After for sync and async requests."""
+
+    def __init__(self):
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def _reserve(self, host: str, deadline: Deadline) -> float:
+        """Seconds to wait before sending to host; raises DeadlineExceeded when it exceeds the budget."""
+        limit = deadline.remaining()
+        with self._lock:
+            state = self._state(host)
+            blocked = max(0.0, state.blocked_until - time.monotonic())
+            bucket_wait = None
+            if limit is None or blocked <= limit:
+                bucket_wait = state.bucket.reserve(None if limit is None else limit - blocked)
+            if bucket_wait is None:
+                state.rejected += 1
+                raise DeadlineExceeded(f"{host} 限速等待超过剩余时间")
+            wait = blocked + bucket_wait
+            state.requests += 1
+            state.waited += wait
+            return wait
+
+    def _enter(self, host: str) -> None:
+        with self._lock:
+            self._state(host).in_flight += 1
+
+    def _exit(self, host: str) -> None:
+        with self._lock:
+            self._state(host).in_flight -= 1
+
+    @contextmanager
+    def slot(self, url: str, deadline: Optional[Deadline] = None):
+        """Block until a request to the host of url may be sent (for requests in threads)."""
+        deadline = deadline or Deadline()
+        host = _host_of(url)
+        waiter = self._acquire(host)
+        if waiter is not None and not waiter.event.wait(deadline.cap(None)) and not self._abandon(host, waiter):
+            raise DeadlineExceeded(f"等待 {host} 的并发名额超时")
+        try:
+            wait = self._reserve(host, deadline)
+            if wait > 0:
+                time.sleep(wait)
+            self._enter(host)
+            try:
+                yield
+            finally:
+                self._exit(host)
+        finally:
+            self._release(host)
+
+    @asynccontextmanager
+    async def slot_async(self, url: str, deadline: Optional[Deadline] = None):
+        """Async variant of slot for requests on the event loop."""
+        deadline = deadline or Deadline()
+        host = _host_of(url)
+        waiter = self._acquire(host, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout=deadline.cap(None))
+            except asyncio.TimeoutError:
+                if not self._abandon(host, waiter):
+                    raise DeadlineExceeded(f"等待 {host} 的并发名额超时") from None
+            except BaseException:
+                # 被取消时放弃等待；名额已经分配给本请求时归还
+                if self._abandon(host, waiter):
+                    self._release(host)
+                raise
+        try:
+            wait = self._reserve(host, deadline)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._enter(host)
+            try:
+                yield
+            finally:
+                self._exit(host)
+        finally:
+            self._release(host)
+
+    def _acquire(self, host: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """Take a slot for host, or queue and return a waiter that is woken when one is handed over."""
+        with self._lock:
+            state = self._state(host)
+            if state.active < HOST_CONCURRENCY and not state.waiters:
+                state.active += 1
+                return None
+            waiter = _Waiter(loop)
+            state.waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, host: str, waiter: _Waiter) -> bool:
+        """Stop waiting; returns True when the slot was handed over in the meantime (the caller then holds it)."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._state(host).waiters.remove(waiter)
+            return False
+
+    def _release(self, host: str) -> None:
+        """Return a slot, handing it straight to the longest-waiting request if any."""
+        with self._lock:
+            state = self._state(host)
+            if state.waiters:
+                waiter = state.waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                state.active -= 1
+
+    def observe(self, url: str, status_code: int, headers: Any) -> None:
+        """Pause the host of url when a 429/503 response asks for it with Retry-After."""
+        if status_code not in BACKOFF_STATUSES:
+            return
+        delay = parse_retry_after(headers.get("Retry-After") if headers is not None else None)
+        if delay is None:
+            return
+        delay = min(delay, MAX_RETRY_AFTER)
+        host = _host_of(url)
+        with self._lock:
+            state = self._state(host)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            state.backoffs += 1
+        logger.warning(f"{host} 返回 {status_code}，按 Retry-After 暂停请求 {delay:.1f} 秒")
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host request counts, waits and backoff state, for diagnostics."""
+        now = time.monotonic()
+        with self._lock:
+            hosts = {
+                host: {
+                    "requests": state.requests,
+                    "in_flight": state.in_flight,
+                    "waiting": len(state.waiters),
+                    "waited": round(state.waited, 3),
+                    "tokens": round(min(state.bucket.burst,
+                                        state.bucket.tokens + (now - state.bucket.updated) * state.bucket.rate), 2),
+                    "blocked_for": round(max(0.0, state.blocked_until - now), 1),
+                    "backoffs": state.backoffs,
+                    "rejected": state.rejected,
+                }
+                for host, state in self._hosts.items()
+            }
+        return {
+            "config": {
+                "concurrency": HOST_CONCURRENCY,
+                "rate": HOST_RATE,
+                "burst": HOST_BURST,
+                "max_retry_after": MAX_RETRY_AFTER,
+            },
+            "hosts": hosts,
+        }
+
+
+def _host_of(url: str) -> str:
+    return urlparse(str(url)).netloc.lower()
+
+
+_scheduler: Optional[HostScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_host_scheduler() -> HostScheduler:
+    """Get the process-wide host scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = HostScheduler()
+    return _scheduler
@@ -0,0 +1,102 @@
+"""
+HTML pre-pruning before main-content extraction.
+
+正文提取（readability）和 Markdown 转换会遍历整个页面，而页面中大量节点与正文无关。
+在提取之前用 lxml 一次性删除 readability 本身也会丢弃的内容，因此提取结果与不预处理时相同：
+    - 脚本、样式、noscript 和 <link>，注释和处理指令
+    - 隐藏元素（hidden 属性或 display:none，与 readability 的判断一致）
+    - 事件处理属性、style 属性，以及超长的 data-* 属性值（如内联 JSON）
+    - 内联 SVG 图标的图形节点（保留 <svg> 元素本身，见 _collapse_svg）
+
+导航栏、iframe 等 readability 会参与打分的节点不删除，否则会改变正文的选取。
+
+readability 本身也要解析整个页面，预处理省下的清理工作抵不上多一次解析和序列化，
+在 benchmarks/fixtures/articles/ 的页面上（包括满是 SVG 图标的页面）反而略慢，因此默认关闭，
+可通过环境变量 DEEPIN_MCP_PRUNE_HTML=1 开启。
+"""
+
+import logging
+import re
+
+import lxml.html
+from lxml import etree
+
+from .settings import env_bool
+
+logger = logging.getLogger(__name__)
+
+PRUNE_ENABLED = env_bool("DEEPIN_MCP_PRUNE_HTML", False)
+
+PRUNE_TAGS = ("script", "style", "noscript", "link")
+# 超过该长度的 data-* 属性值会被删除
+MAX_ATTRIBUTE_LENGTH = 512
+
+_DISPLAY_NONE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+_HIDDEN = etree.XPath("//*[@hidden] | //*[@style]")
+# 只遍历带有需要删除的属性的元素
+_BULKY_ATTRIBUTES = etree.XPath(
+    f"//*[@style or @*[starts-with(name(), 'on')] "
+    f"or @*[starts-with(name(), 'data-') and string-length(.) > {MAX_ATTRIBUTE_LENGTH}]]"
+)
+_SVG = etree.XPath("//svg")
+# readability 判断 <div> 能否当作段落时，用不带词边界的正则匹配子节点的 HTML，
+# 因此 SVG 中的 <path>、<polygon> 等也会被当作块级元素
+_BLOCK_PREFIX = re.compile(r"(blockquote|dl|div|img|ol|p|pre|table|ul)")
+# readability 清理候选节点时按数量统计的标签
+_COUNTED_TAGS = {"p", "img", "li", "a", "embed", "input"}
+
+
+def _parse(html: str):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # 带有 XML 编码声明的字符串需要以字节形式解析
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+def _collapse_svg(svg) -> None:
+    """
+    Replace the shapes of an icon with at most one empty <path/>.
+
+    The placeholder keeps readability's block-element check on the enclosing
+    <div> as it was; SVGs with text or with tags readability counts are kept whole.
+    """
+    tags = [child.tag for child in svg.iterdescendants() if isinstance(child.tag, str)]
+    if not tags or any(tag in _COUNTED_TAGS for tag in tags) or svg.text_content().strip():
+        return
+    whitespace = svg.text_content()
+    block = any(_BLOCK_PREFIX.match(tag) for tag in tags)
+    for child in list(svg):
+        svg.remove(child)
+    svg.text = whitespace or None
+    if block:
+        etree.SubElement(svg, "path")
+
+
+def prune_html(html: str) -> str:
+    """Strip subtrees and attributes that readability discards anyway; returns the page unchanged on failure."""
+    try:
+        doc = _parse(html)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"HTML 预处理解析失败，跳过: {e}")
+        return html
+
+    for element in _HIDDEN(doc):
+        style = element.get("style")
+        hidden = element.get("hidden") is not None or (style and _DISPLAY_NONE.search(style))
+        if hidden and element.getparent() is not None:
+            element.drop_tree()
+
+    etree.strip_elements(doc, etree.Comment, etree.ProcessingInstruction, *PRUNE_TAGS, with_tail=False)
+
+    for svg in _SVG(doc):
+        _collapse_svg(svg)
+
+    for element in _BULKY_ATTRIBUTES(doc):
+        attrib = element.attrib
+        for name, value in attrib.items():
+            if (name == "style" or name.startswith("on")
+                    or (name.startswith("data-") and len(value) > MAX_ATTRIBUTE_LENGTH)):
+                del attrib[name]
+
+    return lxml.html.tostring(doc, encoding="unicode")
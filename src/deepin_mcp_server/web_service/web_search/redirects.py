@@ -0,0 +1,154 @@
+"""
+Resolution of search engine redirect links.
+
+搜索引擎返回的结果链接常常是跳转链接（如百度、搜狗的 /link?url=...），需要额外请求一次
+才能得到真实地址。这里把跳转解析从结果页解析中独立出来：
+    - 一次搜索中的所有跳转链接并发解析
+    - 解析结果保存在持久化缓存中，重复出现的链接不再请求
+    - 可以推迟到真正抓取该结果时再解析 (DEEPIN_MCP_DEFER_REDIRECTS=1)
+"""
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import get_redirect_cache
+from .deadline import Deadline, retry_call
+from .http_pool import DEFAULT_HEADERS, get_session
+from .politeness import get_host_scheduler
+from .settings import env_bool, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFER_REDIRECTS = env_bool("DEEPIN_MCP_DEFER_REDIRECTS", False)
+RESOLVE_CONCURRENCY = env_int("DEEPIN_MCP_REDIRECT_CONCURRENCY", 8)
+RESOLVE_TIMEOUT = 10
+
+_SOGOU_LINK = re.compile(r"^https?://(www\.)?sogou\.com/link\?url=")
+_BAIDU_LINK = re.compile(r"^https?://(www\.)?baidu\.com/link\?url=")
+_JS_REPLACE = re.compile(r"""window\.location\.replace\(\s*["']([^"']+)["']\s*\)""")
+_META_REFRESH = re.compile(
+    r"""<meta[^>]+http-equiv\s*=\s*["']?refresh["']?[^>]*content\s*=\s*["'][^"']*?url\s*=\s*'?([^"'>]+)""",
+    re.IGNORECASE
+)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=RESOLVE_CONCURRENCY, thread_name_prefix="redirect")
+    return _executor
+
+
+def _resolve_sogou(url: str, timeout: float) -> Optional[str]:
+    """Sogou answers /link?url= with a small page that redirects via JavaScript or <meta refresh>."""
+    response = get_session().get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+    page = response.text
+    # 1. 检查 JavaScript 跳转 (window.location.replace)
+    match = _JS_REPLACE.search(page)
+    # 2. 如果 JavaScript 未生效，检查 <meta> 跳转
+    if not match:
+        match = _META_REFRESH.search(page)
+    return match.group(1).strip() if match else None
+
+
+def _resolve_baidu(url: str, timeout: float) -> Optional[str]:
+    """Baidu answers /link?url= with a 302; read Location without following it or downloading a body."""
+    session = get_session()
+    response = session.head(url, headers=DEFAULT_HEADERS, timeout=timeout, allow_redirects=False)
+    location = response.headers.get("location")
+    if response.is_redirect and location:
+        return location
+    # 部分链接不支持 HEAD 或返回带有 <meta refresh> 的页面，此时只读取页面开头
+    with session.get(url, headers=DEFAULT_HEADERS, timeout=timeout,
+                     allow_redirects=False, stream=True) as response:
+        location = response.headers.get("location")
+        if response.is_redirect and location:
+            return location
+        head = response.raw.read(4096, decode_content=True).decode("utf-8", errors="ignore")
+    match = _JS_REPLACE.search(head) or _META_REFRESH.search(head)
+    return match.group(1).strip() if match else None
+
+
+# (匹配规则, 解析函数)，解析函数接收链接和本次请求的超时
+RESOLVERS: List[Tuple[re.Pattern, Callable[[str, float], Optional[str]]]] = [
+    (_SOGOU_LINK, _resolve_sogou),
+    (_BAIDU_LINK, _resolve_baidu),
+]
+
+
+def _find_resolver(url: str) -> Optional[Callable[[str, float], Optional[str]]]:
+    for pattern, resolver in RESOLVERS:
+        if pattern.match(url):
+            return resolver
+    return None
+
+
+def is_redirect_link(url: str) -> bool:
+    """Whether url is a known search engine redirect link."""
+    return _find_resolver(url) is not None
+
+
+def resolve_redirect(url: str, deadline: Optional[Deadline] = None) -> str:
+    """Resolve a redirect link to its target; other URLs, failures and an exhausted deadline return url unchanged."""
+    resolver = _find_resolver(url)
+    if resolver is None:
+        return url
+    cache = get_redirect_cache()
+    if cache is not None:
+        target = cache.get(url)
+        if target:
+            return target
+    deadline = deadline or Deadline()
+    scheduler = get_host_scheduler()
+
+    def attempt():
+        with scheduler.slot(url, deadline):
+            return resolver(url, deadline.timeout(RESOLVE_TIMEOUT))
+
+    try:
+        target = retry_call(attempt, deadline)
+    except Exception as e:
+        logger.warning(f"解析跳转链接失败: {url}: {e}")
+        return url
+    if not target:
+        return url
+    if cache is not None:
+        cache.put(url, target)
+    return target
+
+
+def resolve_redirects(urls: Iterable[str], deadline: Optional[Deadline] = None) -> Dict[str, str]:
+    """
+    Resolve many links concurrently; returns a mapping for every distinct input URL.
+
+    Links not resolved before the deadline map to themselves.
+    """
+    urls = list(dict.fromkeys(urls))
+    resolved = {url: url for url in urls if not is_redirect_link(url)}
+    pending = [url for url in urls if url not in resolved]
+
+    cache = get_redirect_cache()
+    if cache is not None:
+        for url in list(pending):
+            target = cache.get(url)
+            if target:
+                resolved[url] = target
+                pending.remove(url)
+
+    if len(pending) == 1:
+        resolved[pending[0]] = resolve_redirect(pending[0], deadline)
+    elif pending:
+        futures = {_get_executor().submit(resolve_redirect, url, deadline): url for url in pending}
+        wait(futures, timeout=deadline.cap(None) if deadline is not None else None)
+        for future, url in futures.items():
+            resolved[url] = future.result() if future.done() else url
+    return resolved
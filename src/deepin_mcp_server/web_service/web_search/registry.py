@@ -0,0 +1,123 @@
+"""
+Lazy registry of search engines.
+
+内置引擎以 "模块:类名" 登记，第一次使用时才导入，未用到的引擎不会拖慢启动。
+每个引擎只创建一个实例，所有 WebSearch 共用（引擎只保存配置和预编译的选择器，请求走进程级连接池）。
+
+第三方引擎（如本地或内网搜索）通过入口点组 deepin_mcp_server.search_engines 注册，
+例如在其 pyproject.toml 中：
+
+    [project.entry-points."deepin_mcp_server.search_engines"]
+    intranet = "my_package.engine:IntranetSearchEngine"
+
+引擎类需实现 BaseSearchEngine 的接口且可以无参数构造。入口点只在使用了未知的引擎名称时才扫描，
+同样在第一次使用时才导入；与内置引擎同名时以内置引擎为准。
+注册后把名称加入 DEEPIN_MCP_SEARCH_PROVIDERS 即可参与搜索。
+"""
+
+import importlib
+import logging
+import threading
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "deepin_mcp_server.search_engines"
+
+BUILTIN_ENGINES = {
+    "baidu": ".engines.baidu:BaiduSearchEngine",
+    "bing": ".engines.bing:BingSearchEngine",
+    "duckduckgo": ".engines.duckduckgo:DuckDuckGoSearchEngine",
+    "google": ".engines.google:GoogleSearchEngine",
+    "sogou": ".engines.sogou:SogouSearchEngine",
+}
+
+
+class EngineRegistry:
+    """Engine classes by name, imported on first use, each instantiated once."""
+
+    def __init__(self, builtin: Optional[Dict[str, str]] = None, group: str = ENTRY_POINT_GROUP):
+        # 名称 -> "模块:类名"、入口点或已导入的类
+        self._targets: Dict[str, Union[str, EntryPoint, type]] = dict(BUILTIN_ENGINES if builtin is None else builtin)
+        self._group = group
+        self._discovered = False
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: Union[str, type]) -> None:
+        """Register an engine class, or a "module:Class" path imported on first use, replacing any existing one."""
+        with self._lock:
+            self._targets[name.lower()] = target
+            self._instances.pop(name.lower(), None)
+
+    def names(self) -> List[str]:
+        """Names of all known engines, including entry points (which are listed, not imported)."""
+        with self._lock:
+            self._discover()
+            return sorted(self._targets)
+
+    def get(self, name: str):
+        """The shared instance of the named engine; raises ValueError for unknown engines."""
+        name = name.lower()
+        engine = self._instances.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._instances.get(name)
+            if engine is None:
+                engine = self._instances[name] = self._load(name)()
+            return engine
+
+    def loaded(self) -> List[str]:
+        """Names of the engines instantiated so far."""
+        return sorted(self._instances)
+
+    def _load(self, name: str) -> type:
+        if name not in self._targets:
+            self._discover()
+        target = self._targets.get(name)
+        if target is None:
+            raise ValueError(f"Unsupported search provider: {name}")
+        if isinstance(target, EntryPoint):
+            engine_class = target.load()
+        elif isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            engine_class = getattr(importlib.import_module(module_name, __package__), class_name)
+        else:
+            engine_class = target
+        if not callable(getattr(engine_class, "search", None)):
+            raise TypeError(f"搜索引擎 {name} ({engine_class!r}) 没有实现 search 方法")
+        self._targets[name] = engine_class
+        return engine_class
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        self._discovered = True
+        try:
+            found = entry_points(group=self._group)
+        except Exception as e:
+            logger.warning(f"读取搜索引擎入口点失败: {e}")
+            return
+        for entry_point in found:
+            name = entry_point.name.lower()
+            if name in self._targets:
+                logger.warning(f"忽略与已有引擎同名的入口点 {entry_point.name} ({entry_point.value})")
+                continue
+            self._targets[name] = entry_point
+            logger.info(f"发现第三方搜索引擎: {name} ({entry_point.value})")
+
+
+_registry: Optional[EngineRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_engine_registry() -> EngineRegistry:
+    """Get the process-wide engine registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EngineRegistry()
+    return _registry
@@ -1,37 +1,89 @@
+import logging
+import threading
+import time
 from typing import List, Optional, Dict, Any
 from .search_types import SearchResult, SearchConfig, SearchResponse
-from .engines.google import GoogleSearchEngine
-from .engines.duckduckgo import DuckDuckGoSearchEngine
-from .engines.bing import BingSearchEngine
-from .engines.baidu import BaiduSearchEngine
-from .engines.sogou import SogouSearchEngine
+from .registry import get_engine_registry
+from .cache import get_search_cache
+from .health import CAPTCHA, EMPTY, ERROR, OK, get_health_registry
+from .deadline import Deadline
+
+logger = logging.getLogger(__name__)
 
 class WebSearch:
     """Main search class that manages different search engines."""
     
-    def __init__(self, config: SearchConfig):
+    def __init__(self, config: SearchConfig, use_cache: bool = True):
         self.config = config
         self.engine = self._get_engine(config.provider)
+        self.cache = get_search_cache() if use_cache else None
+        self.health = get_health_registry()
     
     def _get_engine(self, provider: str):
-        """Get the appropriate search engine based on provider."""
-        engines = {
-            "google": GoogleSearchEngine,
-            "duckduckgo": DuckDuckGoSearchEngine,
-            "bing": BingSearchEngine,
-            "baidu": BaiduSearchEngine,
-            "sogou": SogouSearchEngine
-        }
-        
-        engine_class = engines.get(provider.lower())
-        if not engine_class:
-            raise ValueError(f"Unsupported search provider: {provider}")
-            
-        return engine_class()
+        """Get the shared engine for provider, importing it on first use (see registry.py)."""
+        engine = get_engine_registry().get(provider)
+        # 引擎实例是共享的，由第一个使用它的 WebSearch 补上未设置的超时
+        if engine.config.timeout is None:
+            engine.config.timeout = self.config.timeout
+        return engine
     
-    def search(self, query: str) -> SearchResponse:
-        """Perform a search using the configured engine."""
-        return self.engine.search(query, self.config.max_results)
+    def search(self, query: str, deadline: Optional[Deadline] = None) -> SearchResponse:
+        """Perform a search using the configured engine, served from cache when possible."""
+        if self.cache is None:
+            return self._search_engine(query, deadline)
+
+        key = self.cache.make_key(query, self.config.provider, self.config.max_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            response, fresh = cached
+            if not fresh and self.cache.begin_refresh(key):
+                # 返回旧结果，同时在后台刷新缓存
+                threading.Thread(
+                    target=self._revalidate, args=(query, key), daemon=True
+                ).start()
+            response.metadata = {**(response.metadata or {}), "cache": "hit" if fresh else "stale"}
+            return response
+
+        response = self._search_engine(query, deadline)
+        self._store(key, response)
+        return response
+
+    def _search_engine(self, query: str, deadline: Optional[Deadline] = None) -> SearchResponse:
+        """Query the engine unless its circuit breaker is open, recording the outcome in the health registry."""
+        provider = self.config.provider
+        if not self.health.allow(provider):
+            return SearchResponse(
+                results=[],
+                metadata={"total_results": 0, "circuit": "open"},
+                error=f"Search engine {provider} is temporarily disabled after repeated failures"
+            )
+        start = time.monotonic()
+        try:
+            response = self.engine.search(query, self.config.max_results, deadline)
+        except Exception as e:
+            self.health.record(provider, ERROR, time.monotonic() - start, str(e))
+            raise
+        if response.results:
+            outcome = OK
+        elif (response.metadata or {}).get("captcha"):
+            outcome = CAPTCHA
+        else:
+            outcome = EMPTY
+        self.health.record(provider, outcome, time.monotonic() - start, response.error)
+        return response
+
+    def _store(self, key: str, response: SearchResponse) -> None:
+        # 空结果和错误不缓存，避免把验证码页或临时故障固定下来
+        if response.results and not response.error:
+            self.cache.put(key, response)
+
+    def _revalidate(self, query: str, key: str) -> None:
+        try:
+            self._store(key, self._search_engine(query))
+        except Exception as e:
+            logger.warning(f"后台刷新搜索缓存失败: {e}")
+        finally:
+            self.cache.end_refresh(key)
     
     def set_provider(self, provider: str) -> None:
         """Change the search provider."""
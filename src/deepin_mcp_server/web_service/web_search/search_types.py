@@ -25,6 +25,9 @@ class SearchEngineConfig:
     params: Optional[Dict[str, str]] = None
     timeout: Optional[int] = None
     proxy: Optional[str] = None
+    parser: Optional[str] = None
+    # 是否推迟解析跳转链接，直到抓取结果页面时再解析；None 表示使用 DEEPIN_MCP_DEFER_REDIRECTS
+    defer_redirects: Optional[bool] = None
 
 @dataclass
 class SearchResponse:
@@ -0,0 +1,35 @@
+"""
+Environment-driven settings shared by the web search modules.
+"""
+
+import os
+from pathlib import Path
+
+# 与服务器日志相同的数据目录
+DATA_DIR = Path.home() / ".local/share/deepin-mcp-server"
+
+
+def env_int(name: str, default: int) -> int:
+    """Read a positive integer from the environment, falling back to default."""
+    try:
+        value = int(os.getenv(name, default))
+        return value if value > 0 else default
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a non-negative float from the environment, falling back to default."""
+    try:
+        value = float(os.getenv(name, default))
+        return value if value >= 0 else default
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag (1/0, true/false, yes/no) from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -1,54 +1,396 @@
-import requests
+import asyncio
+import codecs
+import html
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 from readability import Document
-from readabilipy import simple_json
 import markdownify
 import re
-headers = {
-    "User-Agent": 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
-}
+from urllib.parse import urldefrag, urljoin
+import lxml.html
+from lxml import etree
+from requests.compat import chardet
+from .http_pool import DEFAULT_HEADERS, get_session, get_async_client
+from .politeness import get_host_scheduler
+from .cache import get_content_cache
+from .index import get_page_index
+from .extract import DEFAULT_EXTRACTOR, extract_html
+from .prune import PRUNE_ENABLED, prune_html
+from .redirects import is_redirect_link, resolve_redirect
+from .settings import env_int
+from .deadline import REQUEST_TIMEOUT, RETRY_STATUSES, Deadline, RetryableStatus, retry_async, retry_call
+headers = DEFAULT_HEADERS
+logger = logging.getLogger(__name__)
 
-def get_web_content(url):
+# 单个网页最多读取的字节数，超出部分不再下载 (DEEPIN_MCP_MAX_PAGE_BYTES)
+MAX_PAGE_BYTES = env_int("DEEPIN_MCP_MAX_PAGE_BYTES", 5 * 1024 * 1024)
+# 允许抓取的内容类型，其他类型（PDF、图片、压缩包等）在读取正文之前放弃
+ALLOWED_CONTENT_TYPES = (
+    "text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml",
+)
+CHUNK_SIZE = 64 * 1024
+# 编码检测只看正文开头
+SNIFF_BYTES = 16 * 1024
+# 页面不存在，错误页的内容没有意义
+MISSING_STATUSES = {404, 410}
+# 常见的声明编码与实际编码不一致：gb2312/gbk 页面中常出现 gb18030 字符
+_CHARSET_ALIASES = {"gb2312": "gb18030", "gbk": "gb18030", "iso-8859-1": "cp1252", "ascii": "cp1252"}
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+_XML_ENCODING = re.compile(rb"""^<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""")
+# 正文转换为 Markdown 的转换器只创建一次
+_MARKDOWN_CONVERTER = markdownify.MarkdownConverter(heading_style=markdownify.ATX)
+_NEWLINES = re.compile(r"\n+")
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+_Fetched = namedtuple("_Fetched", "status_code url headers body content_type")
+
+
+class UnsupportedContent(Exception):
+    """The response is not a page we extract content from."""
+
+
+@contextmanager
+def timed_stage(timings, name):
+    """Add the time spent in the block to timings[name] (seconds); timings may be None."""
+    start = time.perf_counter()
     try:
-        response = requests.get(
-            url, 
-            headers=headers,
-            timeout=10,
-            proxies=None
-        )
-        try:
-            page_raw = bytes(response.text, response.encoding).decode("utf-8")
-        except Exception as e:
-            response.encoding = response.apparent_encoding  # 自动检测编码
-            page_raw = response.text
-        content_type = response.headers.get("content-type", "")
-        is_page_html = (
-                "<html" in page_raw[:100] or "text/html" in content_type or not content_type
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _log_timings(url, timings):
+    if timings:
+        stages = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+        logger.debug(f"网页处理耗时 {url}: {stages}")
+
+def get_web_content(url, extractor=None, timings=None, deadline=None):
+    """
+    Fetch a URL and extract its main content as markdown; returns (content, final_url).
+
+    Pass a dict as timings to receive the seconds spent in each stage
+    (redirect, fetch, decode, prune, extract, markdown, index). The request timeout is
+    capped by the optional Deadline, and transient failures are retried within it.
+    """
+    timings = {} if timings is None else timings
+    deadline = deadline or Deadline()
+    try:
+        # 推迟解析的搜索引擎跳转链接在抓取时解析
+        with timed_stage(timings, "redirect"):
+            url = resolve_redirect(url, deadline)
+        cache = get_content_cache()
+        cached, request_headers = _prepare_request(cache, url)
+        if cached is not None and cached.fresh:
+            return _cached_page(cache, cached, extractor, timings)[0], cached.final_url
+
+        def fetch():
+            with get_host_scheduler().slot(url, deadline), get_session().get(
+                url,
+                headers=request_headers,
+                timeout=deadline.timeout(REQUEST_TIMEOUT),
+                proxies=None,
+                stream=True
+            ) as response:
+                if response.status_code == 304:
+                    return _Fetched(response.status_code, response.url, response.headers, b"", "")
+                content_type = _check_response(url, response.status_code, response.headers)
+                buffer = _BodyBuffer(url)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if not buffer.add(chunk):
+                        break
+                return _Fetched(response.status_code, response.url, response.headers, buffer.getvalue(), content_type)
+
+        with timed_stage(timings, "fetch"):
+            fetched = retry_call(fetch, deadline)
+        if cached is not None and fetched.status_code == 304:
+            # 页面未修改，跳过下载和正文提取
+            cache.touch(cached)
+            return _cached_page(cache, cached, extractor, timings)[0], cached.final_url
+
+        with timed_stage(timings, "decode"):
+            page_raw = decode_body(fetched.body, fetched.content_type)
+        content = _extract_page(page_raw, fetched.content_type, extractor, timings)
+        _store_page(cache, url, fetched.url, fetched.status_code, fetched.body, content, fetched.headers, extractor)
+        with timed_stage(timings, "index"):
+            _index_page(fetched.url, page_raw, content)
+        _log_timings(url, timings)
+        return content, fetched.url
+    except UnsupportedContent as e:
+        logger.info(f"跳过网页 {url}: {e}")
+        return "", ""
+    except Exception as e:
+        logger.warning(f"获取网页内容失败 {url}: {e}")
+        return "", ""
+
+async def get_web_content_async(url, extractor=None, timings=None, deadline=None, links=None):
+    """
+    Fetch a URL with the shared async client and extract its main content; see get_web_content.
+
+    Pass a list as links to receive the absolute URLs of every link on the page
+    (including navigation that main-content extraction drops), e.g. for crawling.
+    """
+    timings = {} if timings is None else timings
+    deadline = deadline or Deadline()
+    try:
+        if is_redirect_link(url):
+            with timed_stage(timings, "redirect"):
+                url = await asyncio.to_thread(resolve_redirect, url, deadline)
+        cache = get_content_cache()
+        # 缓存读写是阻塞的 SQLite 操作（可能读取整个网页正文），放到线程中执行
+        cached, request_headers = await asyncio.to_thread(_prepare_request, cache, url)
+        if cached is not None and cached.fresh:
+            content, page_links = await asyncio.to_thread(_cached_page, cache, cached, extractor, timings,
+                                                          links is not None)
+            if links is not None:
+                links.extend(page_links)
+            return content, cached.final_url
+
+        async def fetch():
+            # 等待同一主机的并发名额和限速也计入 fetch
+            async with get_host_scheduler().slot_async(url, deadline), get_async_client().stream(
+                "GET", url, headers=request_headers, timeout=deadline.timeout(REQUEST_TIMEOUT)
+            ) as response:
+                if response.status_code == 304:
+                    return _Fetched(response.status_code, str(response.url), response.headers, b"", "")
+                content_type = _check_response(url, response.status_code, response.headers)
+                buffer = _BodyBuffer(url)
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    if not buffer.add(chunk):
+                        break
+                return _Fetched(response.status_code, str(response.url), response.headers, buffer.getvalue(), content_type)
+
+        with timed_stage(timings, "fetch"):
+            fetched = await retry_async(fetch, deadline)
+        if cached is not None and fetched.status_code == 304:
+            await asyncio.to_thread(cache.touch, cached)
+            content, page_links = await asyncio.to_thread(_cached_page, cache, cached, extractor, timings,
+                                                          links is not None)
+            if links is not None:
+                links.extend(page_links)
+            return content, cached.final_url
+
+        # 解码、链接解析和正文提取都是 CPU 密集型操作，放到线程中执行，避免阻塞事件循环
+        page_raw, content, page_links = await asyncio.to_thread(
+            _process_page, fetched, extractor, timings, links is not None
         )
-        try:
-            if is_page_html:
-                return extract_main_content(page_raw), response.url
-            raise Exception("not a html page.")
-        except Exception as e:
-            doc = Document(page_raw)
-            return doc.summary(), response.url
+        if links is not None:
+            links.extend(page_links)
+        await asyncio.to_thread(_store_page, cache, url, fetched.url, fetched.status_code, fetched.body, content,
+                                fetched.headers, extractor)
+        # 索引写入不影响返回结果，在后台线程中进行，不等待它完成
+        asyncio.get_running_loop().run_in_executor(None, _index_page, fetched.url, page_raw, content)
+        _log_timings(url, timings)
+        return content, fetched.url
+    except UnsupportedContent as e:
+        logger.info(f"跳过网页 {url}: {e}")
+        return "", ""
     except Exception as e:
+        logger.warning(f"获取网页内容失败 {url}: {e}")
         return "", ""
 
-def extract_main_content(html):
-    ret = simple_json.simple_json_from_html_string(
-        html, use_readability=True
-    )
-    if not ret["content"]:
+def _check_response(url, status_code, response_headers):
+    """
+    Check a response before any of its body is read; returns the content type.
+
+    429/5xx responses raise RetryableStatus (after pausing the host for any Retry-After),
+    missing pages (404/410) and non-text content types raise UnsupportedContent.
+    """
+    get_host_scheduler().observe(url, status_code, response_headers)
+    if status_code in RETRY_STATUSES:
+        raise RetryableStatus(status_code, url)
+    if status_code in MISSING_STATUSES:
+        raise UnsupportedContent(f"HTTP {status_code}")
+    content_type = response_headers.get("content-type", "")
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type and media_type not in ALLOWED_CONTENT_TYPES:
+        raise UnsupportedContent(f"unsupported content type {media_type}")
+    return content_type
+
+class _BodyBuffer:
+    """Collects body chunks up to MAX_PAGE_BYTES; the caller stops reading once add() returns False."""
+
+    def __init__(self, url):
+        self.url = url
+        self.chunks = []
+        self.size = 0
+
+    def add(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.size >= MAX_PAGE_BYTES:
+            logger.info(f"网页超过 {MAX_PAGE_BYTES} 字节，只读取开头部分: {self.url}")
+            return False
+        return True
+
+    def getvalue(self):
+        body = b"".join(self.chunks)
+        return body[:MAX_PAGE_BYTES] if self.size > MAX_PAGE_BYTES else body
+
+def detect_charset(body, content_type=""):
+    """
+    Guess the charset of a page from its Content-Type header, BOM, <meta>/XML declaration,
+    or as a last resort by running the detector over the first SNIFF_BYTES bytes.
+    """
+    match = _HEADER_CHARSET.search(content_type)
+    if match:
+        return match.group(1)
+    for bom, charset in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if body.startswith(bom):
+            return charset
+    prefix = body[:SNIFF_BYTES]
+    match = _META_CHARSET.search(prefix) or _XML_ENCODING.search(prefix)
+    if match:
+        return match.group(1).decode("ascii")
+    try:
+        # 截断的多字节字符不影响判断
+        prefix.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        if e.start >= len(prefix) - 3:
+            return "utf-8"
+    return chardet.detect(prefix).get("encoding") or "utf-8"
+
+def _lookup_codec(charset):
+    charset = _CHARSET_ALIASES.get(charset.lower(), charset)
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
         return None
-    content = markdownify.markdownify(
-        ret["content"],
-        heading_style=markdownify.ATX,
+
+def decode_body(body, content_type=""):
+    """Decode a page body once using the detected charset, falling back to UTF-8 for mislabeled pages."""
+    charset = _lookup_codec(detect_charset(body, content_type)) or "utf-8"
+    candidates = [charset, "utf-8"]
+    if charset == "cp1252":
+        # 声明为 Latin-1 的页面大多实际是 UTF-8，而 cp1252 几乎不会解码失败，先尝试 UTF-8
+        candidates.reverse()
+    for candidate in dict.fromkeys(candidates):
+        try:
+            return body.decode(candidate)
+        except UnicodeDecodeError:
+            pass
+    return body.decode(charset, errors="replace")
+
+def _prepare_request(cache, url):
+    """Look up url in the content cache and build (possibly conditional) request headers."""
+    cached = cache.get(url) if cache is not None else None
+    if cached is None:
+        return None, headers
+    return cached, {**headers, **cached.validators()}
+
+def _store_page(cache, url, final_url, status_code, body, content, response_headers, extractor=None):
+    if cache is None or status_code != 200:
+        return
+    cache.put(
+        url, final_url, body, content,
+        response_headers.get("etag"), response_headers.get("last-modified"), extractor or DEFAULT_EXTRACTOR
     )
 
-    # 过滤无效内容
-    content = re.sub(r"^[^\S\n]+", "", content)
-    content = re.sub(r"\n+", "\n", content)
-    content = re.sub(r"^\s*", "", content)
-    content = re.sub(r"\s*$", "", content)
+def _process_page(fetched, extractor, timings, want_links):
+    """Decode and extract a fetched page, and collect its links if asked; returns (page_raw, content, links)."""
+    with timed_stage(timings, "decode"):
+        page_raw = decode_body(fetched.body, fetched.content_type)
+    links = extract_links(page_raw, fetched.url) if want_links else []
+    return page_raw, _extract_page(page_raw, fetched.content_type, extractor, timings), links
+
+def _cached_page(cache, cached, extractor, timings, want_links=False):
+    """
+    Content of a cached page for extractor, and its links if asked; returns (content, links).
+
+    Content cached by another extractor is re-extracted from the saved body and
+    stored in its place.
+    """
+    extractor = extractor or DEFAULT_EXTRACTOR
+    page_raw = None
+    content = cached.content
+    if cached.extractor != extractor:
+        with timed_stage(timings, "decode"):
+            page_raw = decode_body(cached.body, "")
+        content = _extract_page(page_raw, "", extractor, timings)
+        cache.replace_content(cached, content, extractor)
+    if not want_links:
+        return content, []
+    if page_raw is None:
+        page_raw = decode_body(cached.body, "")
+    return content, extract_links(page_raw, cached.final_url)
+
+def extract_links(page_raw, base_url):
+    """Absolute http(s) URLs of the <a href> links of a page, without fragments, in document order."""
+    try:
+        try:
+            doc = lxml.html.document_fromstring(page_raw)
+        except ValueError:
+            # 带有 XML 编码声明的字符串需要以字节形式解析
+            doc = lxml.html.document_fromstring(page_raw.encode("utf-8"))
+    except etree.ParserError:
+        return []
+    base = doc.xpath("string(//base/@href)").strip()
+    base_url = urljoin(str(base_url), base) if base else str(base_url)
+    urls = []
+    for href in doc.xpath("//a/@href"):
+        url, _ = urldefrag(urljoin(base_url, href.strip()))
+        if url.startswith(("http://", "https://")):
+            urls.append(url)
+    return list(dict.fromkeys(urls))
+
+def page_title(page_raw):
+    """The unescaped <title> of an HTML page, or an empty string."""
+    match = _TITLE.search(page_raw[:SNIFF_BYTES])
+    return " ".join(html.unescape(match.group(1)).split()) if match else ""
+
+def _index_page(url, page_raw, content):
+    # 保存到本地全文索引，供 search_fetched_pages 检索
+    index = get_page_index()
+    if index is None or not content:
+        return
+    index.put(str(url), page_title(page_raw), content)
+
+def _extract_page(page_raw, content_type, extractor=None, timings=None):
+    is_page_html = (
+            "<html" in page_raw[:100] or "text/html" in content_type or not content_type
+    )
+    try:
+        if is_page_html:
+            return extract_main_content(page_raw, extractor, timings)
+        raise Exception("not a html page.")
+    except Exception as e:
+        with timed_stage(timings, "extract"):
+            doc = Document(page_raw)
+            return doc.summary()
+
+def extract_main_content(html, extractor=None, timings=None, prune=None):
+    """
+    Extract the main content of a page as markdown.
+
+    The page is pre-pruned (see prune.py) when prune is True, or when it is None and DEEPIN_MCP_PRUNE_HTML=1.
+    """
+    if prune is None:
+        prune = PRUNE_ENABLED
+    if prune:
+        with timed_stage(timings, "prune"):
+            html = prune_html(html)
+    with timed_stage(timings, "extract"):
+        main_html = extract_html(html, extractor)
+    if not main_html:
+        return None
+    with timed_stage(timings, "markdown"):
+        content = normalize_markdown(_MARKDOWN_CONVERTER.convert(main_html))
+    return content
+
+def normalize_markdown(content):
+    """Drop blank lines and surrounding whitespace in one pass over the text."""
+    return _NEWLINES.sub("\n", content).strip()
 
-    return content
\ No newline at end of file
+def truncate_content(content, max_chars):
+    """Cap content at max_chars, cutting at a line break when possible and noting the original length."""
+    if not content or len(content) <= max_chars:
+        return content
+    cut = content.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return f"{content[:cut].rstrip()}\n…（内容已截断，共 {len(content)} 字符）"
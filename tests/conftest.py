@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 缓存和索引写入临时目录，不影响用户数据；必须在导入服务模块之前设置
+os.environ["HOME"] = tempfile.mkdtemp(prefix="deepin-mcp-tests-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "deepin_mcp_server"))
@@ -0,0 +1,21 @@
+from web_service.web_search import util
+from web_service.web_search.cache import ContentCache
+
+PAGE = (b"<html><head><title>t</title></head><body><nav>menu</nav><article><h1>Title</h1>"
+        b"<p>First paragraph of the article body with enough words to be kept.</p>"
+        b"<p>Second paragraph of the article body with enough words to be kept.</p></article></body></html>")
+
+
+def test_cached_page_reextracts_for_another_extractor(tmp_path):
+    """A hit cached by one extractor is re-extracted from the body for another and stored in its place."""
+    cache = ContentCache(tmp_path / "cache.db")
+    cache.put("https://example.com/a", "https://example.com/a", PAGE, "from lxml", None, None, "lxml")
+
+    content, _ = util._cached_page(cache, cache.get("https://example.com/a"), "lxml", {})
+    assert content == "from lxml"
+
+    content, _ = util._cached_page(cache, cache.get("https://example.com/a"), "simple", {})
+    assert "First paragraph" in content
+    cached = cache.get("https://example.com/a")
+    assert (cached.content, cached.extractor) == (content, "simple")
+
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+import requests
+
+from web_service.web_search import deadline as deadline_module
+from web_service.web_search.deadline import Deadline, DeadlineExceeded, RetryableStatus, retry_async, retry_call
+
+
+class Jitter:
+    """Stands in for the random module: records the backoff ranges and waits the shortest time."""
+
+    def __init__(self):
+        self.ranges = []
+
+    def uniform(self, low, high):
+        self.ranges.append((low, high))
+        return low
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    jitter = Jitter()
+    monkeypatch.setattr(deadline_module, "random", jitter)
+    return jitter
+
+
+def flaky(*errors, result="ok"):
+    """A call failing with each of errors in turn, then returning result; calls are counted in .calls."""
+    def call():
+        call.calls += 1
+        if call.calls <= len(errors):
+            raise errors[call.calls - 1]
+        return result
+    call.calls = 0
+    return call
+
+
+def test_timeouts_are_capped_by_the_remaining_budget():
+    assert Deadline().timeout(10) == 10 and Deadline().cap(None) is None
+    budget = Deadline(2)
+    assert 1.5 < budget.timeout(10) <= 2
+    assert budget.timeout(1) == 1
+    assert 1.5 < budget.cap(None) <= 2 and budget.cap(0.5) == 0.5
+
+    spent = Deadline(0)
+    assert spent.expired and spent.cap(5) == 0
+    with pytest.raises(DeadlineExceeded):
+        spent.timeout(10)
+
+
+def test_transient_failures_are_retried_with_full_jitter(jitter):
+    """Each retry waits uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^n))."""
+    call = flaky(requests.ConnectionError(), RetryableStatus(503), requests.Timeout())
+    assert retry_call(call, attempts=4) == "ok" and call.calls == 4
+    base = deadline_module.RETRY_BASE_DELAY
+    assert jitter.ranges == [(0, base), (0, base * 2), (0, base * 4)]
+
+
+def test_backoff_is_capped(jitter, monkeypatch):
+    monkeypatch.setattr(deadline_module, "RETRY_BASE_DELAY", 0.3)
+    monkeypatch.setattr(deadline_module, "RETRY_MAX_DELAY", 0.5)
+    retry_call(flaky(*[RetryableStatus(429)] * 3), attempts=4)
+    assert [high for _, high in jitter.ranges] == [0.3, 0.5, 0.5]
+
+
+def test_permanent_failures_and_the_last_attempt_are_raised(jitter):
+    response = requests.Response()
+    response.status_code = 404
+    for error in (ValueError("bad input"), requests.HTTPError(response=response)):
+        call = flaky(error)
+        with pytest.raises(type(error)):
+            retry_call(call, attempts=3)
+        assert call.calls == 1
+
+    call = flaky(*[requests.ConnectionError()] * 3)
+    with pytest.raises(requests.ConnectionError):
+        retry_call(call, attempts=3)
+    assert call.calls == 3
+
+
+def test_no_retry_without_time_for_another_attempt(jitter):
+    """A retry needs the backoff plus MIN_ATTEMPT_TIME left in the budget."""
+    call = flaky(requests.ConnectionError())
+    with pytest.raises(requests.ConnectionError):
+        retry_call(call, Deadline(deadline_module.MIN_ATTEMPT_TIME / 2), attempts=3)
+    assert call.calls == 1
+    assert retry_call(flaky(requests.ConnectionError()), Deadline(30), attempts=3) == "ok"
+
+
+def test_async_retry_matches_the_sync_one(jitter):
+    def coroutine_of(call):
+        async def run():
+            return call()
+        return run
+
+    call = flaky(RetryableStatus(502))
+    assert asyncio.run(retry_async(coroutine_of(call), Deadline(30), attempts=2)) == "ok"
+    assert call.calls == 2 and jitter.ranges == [(0, deadline_module.RETRY_BASE_DELAY)]
+
+    call = flaky(ValueError("bad input"))
+    with pytest.raises(ValueError):
+        asyncio.run(retry_async(coroutine_of(call), attempts=2))
+    assert call.calls == 1
@@ -0,0 +1,38 @@
+import random
+
+from web_service.web_search.dedup import NearDuplicates, content_sketch, snippet_duplicates
+
+
+def article(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 8)))
+                    for _ in range(words))
+
+
+def test_reposts_with_small_edits_are_near_duplicates():
+    """A lightly edited copy matches the first text registered; a different article and short texts do not."""
+    text = article(1)
+    duplicates = NearDuplicates()
+    assert duplicates.add(0, text) is None
+    assert duplicates.add(1, article(2)) is None
+    assert duplicates.add(2, "转载自某网站。" + text.upper() + " 责任编辑：某某") == 0
+    assert duplicates.add(3, text[:150]) is None
+    assert duplicates.add(4, text[:150]) is None
+
+
+def test_sketches_computed_ahead_compare_like_texts():
+    """add_sketch with content_sketch (as fetch tasks compute it) matches add; only the prefix is sketched."""
+    text = article(1)
+    duplicates = NearDuplicates()
+    assert duplicates.add_sketch(0, content_sketch(text, 1000)) is None
+    assert duplicates.add_sketch(1, None) is None
+    assert duplicates.add_sketch(2, content_sketch(text[:1000] + article(3))) is None
+    assert duplicates.add_sketch(3, content_sketch(text[:1000] + article(3), 1000)) == 0
+
+
+def test_snippet_duplicates_need_a_closer_match():
+    title = "某项政策今日起正式实施，涉及多个方面的调整和变化"
+    snippets = snippet_duplicates()
+    assert snippets.add(0, f"{title} 新华网 2024-05-01") is None
+    assert snippets.add(1, f"{title} 新华网 2024-05-01 转载") == 0
+    assert snippets.add(2, "另一条完全不同的新闻标题，讲述的是别的事情，与前面无关") is None
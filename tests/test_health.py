@@ -0,0 +1,112 @@
+import pytest
+
+from web_service.web_search import health
+from web_service.web_search.health import CAPTCHA, CLOSED, EMPTY, ERROR, HALF_OPEN, OK, OPEN, HealthRegistry
+from web_service.web_search.search import WebSearch
+from web_service.web_search.search_types import SearchConfig, SearchResponse, SearchResult
+
+
+class Clock:
+    """Stands in for the time module in health.py."""
+    now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(health, "time", clock)
+    monkeypatch.setattr(health, "CIRCUIT_FAILURES", 3)
+    monkeypatch.setattr(health, "CIRCUIT_COOLDOWN", 10)
+    return clock
+
+
+def state(registry, provider="a"):
+    return registry.snapshot()[provider]["state"]
+
+
+def test_consecutive_failures_open_the_circuit(clock):
+    """CIRCUIT_FAILURES failures in a row open the circuit; a success in between resets the count."""
+    registry = HealthRegistry()
+    for outcome in (ERROR, EMPTY, OK, ERROR, EMPTY):
+        registry.record("a", outcome, 0.1)
+    assert state(registry) == CLOSED and registry.allow("a")
+    registry.record("a", ERROR, 0.1)
+    assert state(registry) == OPEN and not registry.allow("a")
+
+
+def test_captcha_opens_the_circuit_at_once(clock):
+    registry = HealthRegistry()
+    registry.record("a", CAPTCHA, 0.1)
+    assert state(registry) == OPEN and not registry.allow("a")
+
+
+def test_half_open_probe_closes_the_circuit_on_success(clock):
+    """After the cooldown one probe is let through; its success closes the circuit and forgets the trips."""
+    registry = HealthRegistry()
+    registry.record("a", CAPTCHA, 0.1)
+    clock.now += 10
+    assert registry.allow("a") and state(registry) == HALF_OPEN
+    assert not registry.allow("a")
+    registry.record("a", OK, 0.1)
+    assert state(registry) == CLOSED and registry.allow("a")
+    assert registry.snapshot()["a"]["trips"] == 0
+
+
+def test_failed_probe_reopens_with_a_doubled_cooldown(clock):
+    registry = HealthRegistry()
+    registry.record("a", CAPTCHA, 0.1)
+    clock.now += 10
+    assert registry.allow("a")
+    registry.record("a", EMPTY, 0.1)
+    assert state(registry) == OPEN
+    clock.now += 19
+    assert not registry.allow("a")
+    clock.now += 1
+    assert registry.allow("a") and state(registry) == HALF_OPEN
+
+
+def test_stuck_probe_is_retried_after_the_cooldown(clock):
+    """A probe that never reports back does not keep the engine disabled forever."""
+    registry = HealthRegistry()
+    registry.record("a", CAPTCHA, 0.1)
+    clock.now += 10
+    assert registry.allow("a")
+    clock.now += 10
+    assert registry.allow("a")
+
+
+def test_open_circuits_are_ordered_last(clock):
+    registry = HealthRegistry()
+    registry.record("a", CAPTCHA, 0.1)
+    assert registry.order(["a", "b", "c"]) == ["b", "c", "a"]
+
+
+class FailingEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, max_results, deadline=None):
+        self.calls += 1
+        if self.calls <= 3:
+            raise ConnectionError("refused")
+        return SearchResponse(results=[SearchResult(title="t", url="https://example.com/", content="c")])
+
+
+def test_web_search_skips_an_engine_while_its_circuit_is_open(clock):
+    """Requests are not sent while the circuit is open; the probe after the cooldown closes it again."""
+    search = WebSearch(SearchConfig(provider="bing", max_results=10, timeout=10), use_cache=False)
+    search.engine = engine = FailingEngine()
+    search.health = HealthRegistry()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            search.search("query")
+
+    response = search.search("query")
+    assert response.metadata["circuit"] == "open" and engine.calls == 3
+
+    clock.now += 10
+    assert search.search("query").results and engine.calls == 4
+    assert state(search.health, "bing") == CLOSED
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+from web_service.web_search import http_pool
+
+
+def test_async_client_is_closed_with_its_event_loop():
+    """asyncio.run closes the pooled client before its loop shuts down, and the next loop gets a new one."""
+    async def client():
+        return http_pool.get_async_client()
+
+    first = asyncio.run(client())
+    assert first.is_closed
+    second = asyncio.run(client())
+    assert second is not first
+
+
+def test_client_of_a_running_loop_is_closed_when_replaced():
+    """A client still owned by a live loop in another thread is closed there once another loop takes over."""
+    async def client():
+        return http_pool.get_async_client()
+
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        old = asyncio.run_coroutine_threadsafe(client(), other).result()
+        asyncio.run(client())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), other).result()
+        assert old.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
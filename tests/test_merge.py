@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+from web_service import services
+from web_service.web_search.merge import canonicalize_url, merge_responses
+from web_service.web_search.search_types import SearchResponse, SearchResult
+
+
+def response(*urls, prefix="snippet"):
+    return SearchResponse(results=[SearchResult(title=f"{prefix} {url}", url=url, content=f"{prefix} {url}")
+                                   for url in urls])
+
+
+def test_rrf_ranks_pages_returned_by_several_engines_first():
+    """score = sum of 1 / (k + rank); a page both engines return beats each engine's unshared top result."""
+    merged = merge_responses([
+        ("a", response("https://one.example.com/", "https://shared.example.com/")),
+        ("b", response("https://two.example.com/", "https://shared.example.com/")),
+    ], k=60)
+    assert [result.url for result in merged.results] == [
+        "https://shared.example.com/", "https://one.example.com/", "https://two.example.com/"]
+    assert merged.results[0].metadata["rrf_score"] == round(2 / 62, 6)
+    assert merged.results[0].metadata["engines"] == ["a", "b"]
+    assert merged.metadata["engines"] == ["a", "b"] and merged.metadata["total_results"] == 3
+
+
+def test_equal_scores_keep_best_rank_then_provider_priority():
+    merged = merge_responses([
+        ("a", response("https://a1.example.com/", "https://a2.example.com/")),
+        ("b", response("https://b1.example.com/", "https://b2.example.com/")),
+    ], max_results=3)
+    assert [result.url for result in merged.results] == [
+        "https://a1.example.com/", "https://b1.example.com/", "https://a2.example.com/"]
+
+
+def test_canonical_duplicates_merge_into_one_result():
+    """Scheme, www., tracking parameters and trailing slashes do not split a page; repeats in one engine count once."""
+    assert canonicalize_url("http://www.Example.com/page/?utm_source=x&b=2&a=1#top") == \
+        canonicalize_url("https://example.com/page?a=1&b=2")
+    merged = merge_responses([
+        ("a", response("http://www.example.com/page/?utm_source=feed", "https://example.com/page", prefix="a")),
+        ("b", response("https://other.example.com/", "https://example.com/page",
+                       prefix="a longer snippet from b")),
+    ], k=60)
+    page = merged.results[0]
+    assert len(merged.results) == 2
+    assert page.title == "a http://www.example.com/page/?utm_source=feed"
+    assert page.content == "a longer snippet from b https://example.com/page"
+    assert page.metadata["rrf_score"] == round(1 / 61 + 1 / 62, 6)
+
+
+def test_merge_mode_fuses_engines_that_answer_in_time(monkeypatch):
+    """Merge mode drops failed engines and ones slower than MERGE_TIMEOUT, and fuses the rest."""
+    release = threading.Event()
+    plan = {
+        "a": response("https://one.example.com/", "https://shared.example.com/"),
+        "b": response("https://shared.example.com/"),
+        "failing": RuntimeError("blocked"),
+        "slow": response("https://slow.example.com/"),
+    }
+
+    def search_provider(provider, query, deadline=None):
+        if provider == "slow":
+            release.wait(5)
+        if isinstance(plan[provider], Exception):
+            raise plan[provider]
+        return plan[provider]
+
+    async def main():
+        try:
+            return await services._search("query", "merge", None, services.Deadline())
+        finally:
+            release.set()
+
+    monkeypatch.setattr(services, "_search_provider", search_provider)
+    monkeypatch.setattr(services, "SEARCH_PROVIDERS", list(plan))
+    monkeypatch.setattr(services, "MERGE_TIMEOUT", 0.2)
+    merged = asyncio.run(main())
+
+    assert [result.url for result in merged.results] == ["https://shared.example.com/", "https://one.example.com/"]
+    assert merged.metadata["engine"] == "merge" and merged.metadata["engines"] == ["a", "b"]
+    assert merged.metadata["engines_tried"] == list(plan)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from web_service.web_search import politeness
+from web_service.web_search.deadline import Deadline, DeadlineExceeded
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(politeness, "HOST_CONCURRENCY", 2)
+    monkeypatch.setattr(politeness, "HOST_RATE", 0)
+    return politeness.HostScheduler()
+
+
+def test_sync_and_async_requests_share_the_host_limit(scheduler):
+    """Threads and coroutines requesting one host together never exceed HOST_CONCURRENCY."""
+    url = "https://example.com/page"
+    lock = threading.Lock()
+    active = peak = 0
+
+    def hold(seconds):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(seconds)
+        with lock:
+            active -= 1
+
+    def sync_request():
+        with scheduler.slot(url):
+            hold(0.05)
+
+    async def async_request():
+        async with scheduler.slot_async(url):
+            hold(0.05)
+
+    async def main():
+        threads = [threading.Thread(target=sync_request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        await asyncio.gather(*(async_request() for _ in range(4)))
+        for thread in threads:
+            thread.join()
+
+    asyncio.run(main())
+    assert peak == 2
+    host = scheduler.stats()["hosts"]["example.com"]
+    assert host["in_flight"] == 0 and host["waiting"] == 0
+
+
+def test_timed_out_waiter_gives_up_its_place(scheduler):
+    """A request whose budget runs out while queued is removed and later requests still get slots."""
+    url = "https://example.com/page"
+
+    async def main():
+        async with scheduler.slot_async(url), scheduler.slot_async(url):
+            with pytest.raises(DeadlineExceeded):
+                async with scheduler.slot_async(url, Deadline(0.05)):
+                    pass
+        async with scheduler.slot_async(url), scheduler.slot_async(url):
+            pass
+
+    asyncio.run(main())
+    assert scheduler.stats()["hosts"]["example.com"]["waiting"] == 0
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from web_service.web_search.prune import prune_html
+from web_service.web_search.util import decode_body, extract_main_content
+
+ARTICLES = sorted((Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "articles").glob("*.html"))
+
+
+@pytest.mark.parametrize("extractor", ["lxml", "simple"])
+@pytest.mark.parametrize("page", ARTICLES, ids=lambda page: page.stem)
+def test_pruning_keeps_extracted_content(page, extractor):
+    """Pruning only removes what readability discards itself, so the extracted markdown is unchanged."""
+    html = decode_body(page.read_bytes(), "text/html")
+    assert extract_main_content(html, extractor, prune=True) == extract_main_content(html, extractor, prune=False)
+
+
+def test_pruning_strips_scripts_and_icon_shapes():
+    """Scripts, comments, hidden elements and SVG shapes go; the <svg> elements and visible text stay."""
+    icon = '<svg viewBox="0 0 16 16"><path d="M0 0L16 16"/><circle r="4"/></svg>'
+    html = (f'<html><body><!-- ad --><script>var state = {{}};</script><div hidden>hidden</div>'
+            f'<div style="display: none">none</div><p onclick="go()" style="color: red" data-state="{"x" * 600}">'
+            f'text</p><div><a href="/a">{icon}like</a></div></body></html>')
+    pruned = prune_html(html)
+    for gone in ("<!--", "<script", "hidden", "none", "onclick", "style=", "data-state", "<circle"):
+        assert gone not in pruned
+    assert '<svg viewbox="0 0 16 16"><path></path></svg>like' in pruned
+    assert "text</p>" in pruned
@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from web_service.web_search.engines.baidu import BaiduSearchEngine
+from web_service.web_search.engines.bing import BingSearchEngine
+from web_service.web_search.engines.duckduckgo import DuckDuckGoSearchEngine
+from web_service.web_search.engines.google import GoogleSearchEngine
+from web_service.web_search.engines.sogou import SogouSearchEngine
+from web_service.web_search.parsers import BACKENDS
+
+ENGINES = {
+    "baidu": BaiduSearchEngine,
+    "bing": BingSearchEngine,
+    "duckduckgo": DuckDuckGoSearchEngine,
+    "google": GoogleSearchEngine,
+    "sogou": SogouSearchEngine,
+}
+FIXTURES = sorted((Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "serp").glob("*.html"))
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.stem)
+def test_parser_backend_matches_saved_results(fixture, backend):
+    """Each parser backend returns the results the original BeautifulSoup code produced for a saved page."""
+    expected = [(r["title"], r["url"], r["content"])
+                for r in json.loads(fixture.with_suffix(".expected.json").read_text(encoding="utf-8"))]
+    html = fixture.read_text(encoding="utf-8")
+    engine = ENGINES[fixture.stem.split("-")[0]]()
+    # 不解析跳转链接，避免发起网络请求
+    engine.config.defer_redirects = True
+    engine.set_parser(backend)
+    engine._make_request = lambda url, params=None, deadline=None: html
+
+    response = engine.search("fixture", 10)
+
+    assert [(r.title, r.url, r.content) for r in response.results] == expected
+    assert response.metadata["total_results"] == len(expected)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from web_service import services
+from web_service.web_search.deadline import Deadline
+from web_service.web_search.search_types import SearchResponse, SearchResult
+
+
+def test_content_results_repeated_id_of_folded_duplicate():
+    """A result whose id first appeared as a folded near-duplicate joins that duplicate's item."""
+    results = [
+        SearchResult(title="original", url="https://a.example.com/1", content="snippet a"),
+        SearchResult(title="repost", url="https://www.baidu.com/link?url=one", content="snippet b"),
+        SearchResult(title="repost again", url="https://www.baidu.com/link?url=two", content="snippet c"),
+    ]
+    contents = [
+        ("article", "https://a.example.com/1", None),
+        ("article", "https://b.example.com/copy", 0),
+        ("article", "https://b.example.com/copy", 0),
+    ]
+    items = services._content_results("query", results, contents)
+    assert len(items) == 1
+    assert [duplicate["url"] for duplicate in items[0]["duplicates"]] == ["https://b.example.com/copy"]
+
+
+def test_content_results_failed_fetch_falls_back_to_snippet():
+    """A fetch that failed (empty content) returns the engine snippet, like one that timed out."""
+    results = [
+        SearchResult(title="failed", url="https://a.example.com/1", content="snippet a"),
+        SearchResult(title="timed out", url="https://b.example.com/2", content="snippet b"),
+    ]
+    contents = [("", "https://a.example.com/1", None), ("snippet b", "https://b.example.com/2", None)]
+    items = services._content_results("query", results, contents)
+    assert [item["content"] for item in items] == ["snippet a", "snippet b"]
+
+
+def test_expand_search_result_reads_the_store_off_the_loop(monkeypatch):
+    """A returned result is expanded by id; the store lookup runs through run_io."""
+    calls = []
+
+    async def recording_run_io(func, *args):
+        calls.append(func)
+        return func(*args)
+
+    async def fetch(url, deadline=None):
+        return f"page of {url}", url
+
+    monkeypatch.setattr(services, "run_io", recording_run_io)
+    monkeypatch.setattr(services, "get_web_content_async", fetch)
+    result = SearchResult(title="t", url="https://a.example.com/expand", content="snippet")
+    items = services._snippet_results("query", [result])
+
+    expanded = json.loads(asyncio.run(services._expand_search_result(items[0]["id"])))
+    assert expanded["content"] == "page of https://a.example.com/expand" and expanded["expanded"]
+    assert services._stored_result in calls
+    assert "未找到" in asyncio.run(services._expand_search_result("missing"))
+
+
+@pytest.fixture
+def hedged_search(monkeypatch):
+    """
+    Run _search_providers over stub providers: plan[name] = (seconds, titles or exception).
+
+    Returns (response, seconds taken); providers still running afterwards are released
+    so the event loop can shut down without waiting for them.
+    """
+    release = threading.Event()
+
+    def run(plan, hedge_delay, deadline=None):
+        def search_provider(provider, query, deadline=None):
+            seconds, outcome = plan[provider]
+            release.wait(seconds)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return SearchResponse(results=[
+                SearchResult(title=title, url=f"https://{provider}.example.com/{title}", content=title)
+                for title in outcome
+            ])
+
+        async def main():
+            start = time.monotonic()
+            response = await services._search_providers("query", list(plan), hedge_delay, deadline)
+            elapsed = time.monotonic() - start
+            release.set()
+            return response, elapsed
+
+        release.clear()
+        monkeypatch.setattr(services, "_search_provider", search_provider)
+        return asyncio.run(main())
+
+    return run
+
+
+def test_slow_primary_is_hedged_by_the_next_provider(hedged_search):
+    """A primary that has not answered within hedge_delay races the next provider, and the first results win."""
+    response, elapsed = hedged_search({"a": (5, ["slow"]), "b": (0, ["fast"])}, 0.05)
+    assert [result.title for result in response.results] == ["fast"]
+    assert response.metadata["engine"] == "b" and response.metadata["engines_tried"] == ["a", "b"]
+    assert elapsed < 1
+
+
+def test_primary_answering_in_time_is_not_hedged(hedged_search):
+    response, _ = hedged_search({"a": (0, ["first"]), "b": (0, ["second"])}, 1)
+    assert response.metadata["engine"] == "a" and response.metadata["engines_tried"] == ["a"]
+
+
+def test_failed_or_empty_provider_starts_the_next_without_waiting(hedged_search):
+    """Failures and empty pages launch the next provider at once instead of after hedge_delay."""
+    plan = {"a": (0, RuntimeError("blocked")), "b": (0, []), "c": (0, ["found"])}
+    response, elapsed = hedged_search(plan, 5)
+    assert response.metadata["engine"] == "c" and response.metadata["engines_tried"] == ["a", "b", "c"]
+    assert elapsed < 1
+
+
+def test_stragglers_are_abandoned_when_the_budget_runs_out(hedged_search):
+    """Providers still running when the budget expires are given up; the empty fallback names every one tried."""
+    response, elapsed = hedged_search({"a": (5, ["late"]), "b": (5, ["later"])}, 0.05, Deadline(0.3))
+    assert response.results == [] and response.error
+    assert response.metadata["engine"] is None and response.metadata["engines_tried"] == ["a", "b"]
+    assert elapsed < 1
+
+
+class ShortWaits(Deadline):
+    """A budget whose waits time out before it is used up, like a wait returning just ahead of expiry."""
+
+    def cap(self, seconds):
+        return 0.01
+
+
+def test_wait_timeout_with_no_provider_left_keeps_waiting(hedged_search):
+    """A wait timing out after every provider was launched keeps waiting instead of launching again."""
+    response, _ = hedged_search({"a": (0.2, ["only"])}, 0.05, ShortWaits())
+    assert response.metadata["engine"] == "a"
+    response, _ = hedged_search({}, 0.05)
+    assert response.error and response.metadata["engines_tried"] == []
+
+
+def fetched_pages(monkeypatch, pages):
+    """Serve get_web_content_async from pages (url -> content); returns the list of fetched URLs."""
+    fetched = []
+
+    async def fetch(url, timings=None, deadline=None):
+        fetched.append(url)
+        return pages[url], url
+
+    monkeypatch.setattr(services, "get_web_content_async", fetch)
+    return fetched
+
+
+def article(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 8)))
+                    for _ in range(words))
+
+
+def test_near_duplicate_pages_collapse_into_the_first(monkeypatch):
+    """A page whose content repeats an earlier result is listed under it and is not streamed on its own."""
+    results = [
+        SearchResult(title="first", url="https://a.example.com/1", content="snippet one"),
+        SearchResult(title="other", url="https://b.example.com/2", content="a different snippet"),
+        SearchResult(title="repost", url="https://c.example.com/3", content="unrelated summary text"),
+    ]
+    fetched_pages(monkeypatch, {
+        "https://a.example.com/1": article(1),
+        "https://b.example.com/2": article(2),
+        "https://c.example.com/3": "转载：" + article(1) + " 本文来源网络",
+    })
+    streamed = []
+
+    async def on_progress(completed, total, item):
+        if item is not None:
+            streamed.append(item["url"])
+
+    contents = asyncio.run(services._fetch_results_content(results, 5, 5, on_progress=on_progress))
+    assert [duplicate_of for _, _, duplicate_of in contents] == [None, None, 0]
+    assert sorted(streamed) == ["https://a.example.com/1", "https://b.example.com/2"]
+
+    items = services._content_results("query", results, contents)
+    assert [item["url"] for item in items] == ["https://a.example.com/1", "https://b.example.com/2"]
+    assert [duplicate["url"] for duplicate in items[0]["duplicates"]] == ["https://c.example.com/3"]
+
+
+def test_snippet_reposts_are_fetched_only_when_the_first_copy_fails(monkeypatch):
+    title = "某项政策今日起正式实施，涉及多个方面的调整和变化"
+    results = [
+        SearchResult(title=title, url="https://a.example.com/1", content="新华网 2024-05-01"),
+        SearchResult(title=title, url="https://b.example.com/2", content="新华网 2024-05-01"),
+    ]
+    fetched = fetched_pages(monkeypatch, {"https://a.example.com/1": article(1), "https://b.example.com/2": article(2)})
+    contents = asyncio.run(services._fetch_results_content(results, 5, 5))
+    assert fetched == ["https://a.example.com/1"]
+    assert contents[1] == (None, "https://b.example.com/2", 0)
+    assert len(services._content_results("query", results, contents)) == 1
+
+    fetched = fetched_pages(monkeypatch, {"https://a.example.com/1": "", "https://b.example.com/2": article(2)})
+    contents = asyncio.run(services._fetch_results_content(results, 5, 5))
+    assert fetched == ["https://a.example.com/1", "https://b.example.com/2"]
+    assert [duplicate_of for _, _, duplicate_of in contents] == [None, None]